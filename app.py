@@ -1,12 +1,44 @@
-import os, io, datetime
-from flask import Flask, render_template, redirect, url_for, request, session, flash, abort, send_file
-from flask_migrate import Migrate
+import os, hashlib, datetime, tempfile
+import click
+from flask import (
+    Flask, render_template, redirect, url_for, request, session, flash, abort, send_file,
+    make_response, g, jsonify, stream_with_context
+)
 from flask_babel import Babel, _
 from models import (
-    db, Property, Contact, Rule, HowTo, IssueFlow, Emergency,
-    LocalPlace, CheckinStep, CheckoutStep, FAQ, Message, PageView, seed
+    db, Property, Contact, Rule, HowTo, Emergency,
+    LocalPlace, CheckinStep, CheckoutStep, FAQ, Message, TELEMETRY, purge_telemetry, seed
 )
-import qrcode
+from pageviews import ViewBuffer
+import rollups
+import useragents
+import bootstrap
+import db_profile
+from page_cache import PageCache
+from qr_cache import QRCache, FORMATS as QR_FORMATS, public_url
+from print_artifacts import PrintArtifacts, FORMATS as PRINT_FORMATS
+from static_assets import StaticAssets, COMPRESSORS
+from compression import Compression, ENCODINGS as COMPRESS_ENCODINGS, exempt as compress_exempt
+import loading
+import offline
+import static_export
+from search import SearchIndex, render_highlight
+from instrumentation import Instrumentation
+import data_export
+import bundles
+import inbox
+import retention
+from images import ImageStore, ImageFetchError, VARIANTS as IMAGE_VARIANTS, MIMETYPES as IMAGE_MIMETYPES, supported_formats
+
+def release_digest(app):
+    h = hashlib.sha1()
+    for root in (os.path.join(app.root_path, app.template_folder), app.static_folder):
+        for dirpath, dirs, files in os.walk(root):
+            dirs.sort()
+            for name in sorted(files):
+                with open(os.path.join(dirpath, name), "rb") as f:
+                    h.update(name.encode()); h.update(f.read())
+    return h.hexdigest()[:12]
 
 def create_app():
     app = Flask(__name__, static_folder="static", template_folder="templates")
@@ -15,44 +47,225 @@ def create_app():
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "devkey")
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "sqlite:///guest_manual.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # Views/messages may live in their own database; by default they share the main one.
+    app.config["SQLALCHEMY_BINDS"] = {
+        TELEMETRY: os.getenv("TELEMETRY_DATABASE_URL") or app.config["SQLALCHEMY_DATABASE_URI"],
+    }
+    app.config["CONTENT_REPLICA_URL"] = os.getenv("CONTENT_REPLICA_URL", "")
+    app.config["DB_POOL_PROFILE"] = os.getenv("DB_POOL_PROFILE", "default")  # default / small / large / pgbouncer
+    app.config["SQLITE_TUNING"] = os.getenv("SQLITE_TUNING", "1") == "1"
+    app.config["SQLITE_JOURNAL_MODE"] = os.getenv("SQLITE_JOURNAL_MODE", "wal")
+    app.config["SQLITE_SYNCHRONOUS"] = os.getenv("SQLITE_SYNCHRONOUS", "normal")
+    app.config["SQLITE_BUSY_TIMEOUT_MS"] = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    app.config["SQLITE_CACHE_SIZE"] = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))
+    app.config["SQLITE_MMAP_SIZE"] = int(os.getenv("SQLITE_MMAP_SIZE", str(128 * 1024 * 1024)))
     app.config["APP_NAME"] = os.getenv("APP_NAME", "Guest Manual")
     app.config["BRAND_PRIMARY"] = os.getenv("BRAND_PRIMARY", "#0E7C86")
     app.config["BRAND_ACCENT"] = os.getenv("BRAND_ACCENT", "#E7F5F6")
     app.config["ADMIN_PASSWORD"] = os.getenv("ADMIN_PASSWORD", "admin")
     app.config["THEME"] = os.getenv("THEME", "classic")
     app.config["LANGUAGES"] = ["en", "fr", "es"]
+    app.config["VIEW_BUFFER_ENABLED"] = os.getenv("VIEW_BUFFER_ENABLED", "1") == "1"
+    app.config["VIEW_FLUSH_SIZE"] = int(os.getenv("VIEW_FLUSH_SIZE", "100"))
+    app.config["VIEW_FLUSH_INTERVAL"] = float(os.getenv("VIEW_FLUSH_INTERVAL", "2.0"))
+    app.config["VIEW_MAX_UNFLUSHED"] = int(os.getenv("VIEW_MAX_UNFLUSHED", "500"))
+    app.config["VIEW_BOT_POLICY"] = os.getenv("VIEW_BOT_POLICY", "skip")  # skip / tag
+    app.config["PAGE_CACHE_BACKEND"] = os.getenv("PAGE_CACHE_BACKEND", "memory")  # memory / file / none
+    app.config["PAGE_CACHE_MAX_BYTES"] = int(os.getenv("PAGE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    if os.getenv("PAGE_CACHE_DIR"):
+        app.config["PAGE_CACHE_DIR"] = os.getenv("PAGE_CACHE_DIR")
+    app.config["DB_INIT_MODE"] = os.getenv("DB_INIT_MODE", "lazy")  # lazy / off
+    app.config["IMAGE_PROXY_ENABLED"] = os.getenv("IMAGE_PROXY_ENABLED", "1") == "1"
+    app.config["IMAGE_CACHE_DIR"] = os.getenv("IMAGE_CACHE_DIR", os.path.join(app.instance_path, "image_cache"))
+    app.config["SEARCH_BACKEND"] = os.getenv("SEARCH_BACKEND", "auto")  # auto / fts5 / memory
+    app.config["RETENTION_RAW_DAYS"] = int(os.getenv("RETENTION_RAW_DAYS", "90"))
+    app.config["RETENTION_HOURLY_DAYS"] = int(os.getenv("RETENTION_HOURLY_DAYS", "35"))
+    app.config["RETENTION_BATCH_SIZE"] = int(os.getenv("RETENTION_BATCH_SIZE", "5000"))
+    app.config["RETENTION_BATCH_PAUSE"] = float(os.getenv("RETENTION_BATCH_PAUSE", "0.05"))
+    app.config["QUERY_BUDGET_MODE"] = os.getenv("QUERY_BUDGET_MODE", "off")  # off / warn / raise
+    app.config["INSTRUMENTATION_ENABLED"] = os.getenv("INSTRUMENTATION_ENABLED", "0") == "1"
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN", "")
+    app.config["PROFILE_SAMPLE_RATE"] = int(os.getenv("PROFILE_SAMPLE_RATE", "0"))  # 1 in N requests, 0 = off
+    if os.getenv("PROFILE_DIR"):
+        app.config["PROFILE_DIR"] = os.getenv("PROFILE_DIR")
+    app.config["QR_CACHE_DIR"] = os.getenv("QR_CACHE_DIR", os.path.join(app.instance_path, "qr_cache"))
+    app.config["QR_CACHE_MAX_FILES"] = int(os.getenv("QR_CACHE_MAX_FILES", "2000"))
+    app.config["PRINT_DIR"] = os.getenv("PRINT_DIR", os.path.join(app.instance_path, "print"))
+    app.config["PRINT_BACKGROUND"] = os.getenv("PRINT_BACKGROUND", "1") == "1"
+    app.config["PRINT_REGEN_DELAY"] = float(os.getenv("PRINT_REGEN_DELAY", "3"))
+    app.config["PUBLIC_BASE_URL"] = os.getenv("PUBLIC_BASE_URL", "")
+    app.config["OFFLINE_ENABLED"] = os.getenv("OFFLINE_ENABLED", "1") == "1"
+    app.config["STATIC_FINGERPRINT"] = os.getenv("STATIC_FINGERPRINT", "1") == "1"
+    app.config["STATIC_BUILD_DIR"] = os.getenv("STATIC_BUILD_DIR", os.path.join(app.instance_path, "static_build"))
+    app.config["COMPRESS_ENABLED"] = os.getenv("COMPRESS_ENABLED", "1") == "1"
+    app.config["COMPRESS_MIN_SIZE"] = int(os.getenv("COMPRESS_MIN_SIZE", "500"))
+    app.config["COMPRESS_GZIP_LEVEL"] = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    app.config["COMPRESS_BROTLI_QUALITY"] = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
 
     # ---- Extensions ----
+    db_profile.configure(app)
     db.init_app(app)
-    Migrate(app, db)
+    db_profile.init_app(app)
+    if os.environ.get("FLASK_RUN_FROM_CLI") == "true":
+        # Alembic is only needed for `flask db ...`; keep it out of worker boot.
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    views_buffer = ViewBuffer(app)
+    page_cache = PageCache(app)
+    qr_cache = QRCache(app.config["QR_CACHE_DIR"], app.config["QR_CACHE_MAX_FILES"])
+    loading.init_app(app)
+    Instrumentation(app)
+    image_store = ImageStore(app.config["IMAGE_CACHE_DIR"], app.config["SECRET_KEY"])
+    image_formats = supported_formats()
+    search_index = SearchIndex(app)
+    static_assets = StaticAssets(app)
+    compression = Compression(app)
 
     def get_locale():
         return request.accept_languages.best_match(app.config["LANGUAGES"]) or "en"
     Babel(app, locale_selector=get_locale)
 
-    # ---- DB init / seed ----
-    with app.app_context():
-        db.create_all()
-        seed(db)
+    # ---- DB init / seed (lazy, or `flask init-db`) ----
+    bootstrap.init_app(app)
+
+    # Deploying new templates or static files must not leave browsers on stale 304s.
+    release = os.getenv("RELEASE") or release_digest(app)
+    print_artifacts = PrintArtifacts(app, release=release)
 
     # ---- Template context ----
     @app.context_processor
     def inject_config():
         return dict(config=app.config, now=datetime.datetime.utcnow())
 
+    # Hero/gallery images go through the resizing proxy (see image_proxy).
+    @app.template_global()
+    def img_src(url, variant="full"):
+        url = (url or "").strip()
+        if not url or not app.config["IMAGE_PROXY_ENABLED"] or g.get("static_export"):
+            return url
+        return url_for("image_proxy", token=image_store.token(url), variant=variant)
+
+    @app.template_global()
+    def img_srcset(url):
+        if not (url or "").strip() or not app.config["IMAGE_PROXY_ENABLED"] or g.get("static_export"):
+            return ""
+        return ", ".join(f"{img_src(url, name)} {w}w" for name, w in IMAGE_VARIANTS.items())
+
     # ---- Helpers ----
-    def log_view(prop, section):
-        pv = PageView(
-            property_id=prop.id,
+    def log_view(pid, section):
+        ua = useragents.normalize(request.headers.get("User-Agent"))
+        is_bot = useragents.is_bot(ua)
+        if is_bot and app.config["VIEW_BOT_POLICY"] == "skip":
+            return
+        views_buffer.add(
+            property_id=pid,
             section=section,
-            user_agent=request.headers.get("User-Agent",""),
+            user_agent=ua,
+            is_bot=is_bot,
             ip=request.remote_addr
         )
-        db.session.add(pv); db.session.commit()
 
     def is_authed():
         return session.get("authed") is True
 
+    def is_fragment_request():
+        return request.headers.get("X-Requested-With") == "XMLHttpRequest"
+
+    def property_meta(slug):
+        # One indexed lookup is enough to answer a revalidation. Always asks the
+        # primary, so a lagging replica can't hand out an old version.
+        meta = (db.session.query(Property.id, Property.content_version, Property.updated_at)
+                .filter_by(slug=slug).execution_options(use_primary=True).first())
+        if meta is None:
+            abort(404)
+        return meta
+
+    def content_etag(meta, *parts):
+        raw = "|".join(str(x) for x in (release, meta.id, meta.content_version) + parts)
+        return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+    def not_modified(etag, updated_at):
+        if session.get("_flashes"):
+            return None
+        if request.if_none_match:
+            # Compressed responses carry "<etag>-gzip" / "<etag>-br"; any of them
+            # names this content version.
+            matched = next((tag for tag in [etag] + [f"{etag}-{enc}" for enc in COMPRESS_ENCODINGS]
+                            if request.if_none_match.contains_weak(tag)), None)
+            fresh = matched is not None
+            etag = matched or etag
+        else:
+            since = request.if_modified_since
+            fresh = bool(since and updated_at and
+                         updated_at.replace(microsecond=0) <= since.replace(tzinfo=None))
+        if not fresh:
+            return None
+        resp = app.response_class(status=304)
+        return add_validators(resp, etag, updated_at)
+
+    def add_validators(resp, etag, updated_at):
+        resp.set_etag(f"{etag}-{resp.content_encoding}" if resp.content_encoding else etag)
+        if updated_at:
+            resp.last_modified = updated_at
+        resp.cache_control.no_cache = True
+        resp.vary.add("Accept-Language")
+        resp.vary.add("X-Requested-With")
+        return resp
+
+    def render_property_page(slug, section):
+        # XHR navigation gets only the <main> body; flashed messages are
+        # per-visitor, so those renders bypass the cache.
+        locale = get_locale()
+        fragment = is_fragment_request()
+        variant = "fragment" if fragment else "page"
+        meta = property_meta(slug)
+        if request.headers.get("X-Prefetch") != "1":
+            log_view(meta.id, section)
+        etag = content_etag(meta, section, locale, variant)
+        resp = not_modified(etag, meta.updated_at)
+        if resp is not None:
+            return resp
+        cacheable = not session.get("_flashes")
+        encoding = compression.encoding("text/html") if cacheable else None
+        if encoding:
+            body = page_cache.get_encoded(slug, section, locale, meta.content_version, variant, encoding)
+            if body is not None:
+                return add_validators(encoded_response(body, encoding), etag, meta.updated_at)
+        hit = page_cache.get(slug, section, locale, meta.content_version, variant) if cacheable else None
+        version = meta.content_version
+        if hit is not None:
+            html = hit[1]
+        else:
+            prop = loading.property_for(section, slug=slug).first_or_404()
+            if prop.content_version != meta.content_version:
+                # The replica hasn't caught up with this edit yet.
+                db_profile.use_primary()
+                prop = loading.property_for(section, slug=slug).populate_existing().first_or_404()
+            html = render_template(f"property/{section}.html", p=prop, section=section, fragment=fragment)
+            loading.check_budget(app, section, extra=1)
+            version = prop.content_version
+            if cacheable:
+                page_cache.set(slug, section, locale, version, prop.id, html, variant)
+        if encoding and len(html) >= app.config["COMPRESS_MIN_SIZE"]:
+            body = compression.compress(html.encode("utf-8"), encoding)
+            page_cache.set_encoded(slug, section, locale, version, meta.id, variant, encoding, body)
+            return add_validators(encoded_response(body, encoding), etag, meta.updated_at)
+        resp = add_validators(make_response(html), etag, meta.updated_at)
+        if not cacheable:
+            # Keeps the one-off flash out of the service worker's copy too.
+            resp.cache_control.no_store = True
+        return resp
+
+    def encoded_response(body, encoding):
+        resp = make_response(body)
+        resp.content_encoding = encoding
+        resp.vary.add("Accept-Encoding")
+        return resp
+
+    def content_changed(pid):
+        slug = db.session.query(Property.slug).filter_by(id=pid).scalar()
+        page_cache.invalidate(slug)
+
     # =======================
     # Public routes
     # =======================
@@ -63,38 +276,148 @@ def create_app():
 
     @app.route("/p/<slug>")
     def property_home(slug):
-        prop = Property.query.filter_by(slug=slug).first_or_404()
-        log_view(prop, "welcome")
-        return render_template("property/welcome.html", p=prop, section="welcome")
+        return render_property_page(slug, "welcome")
 
     @app.route("/p/<slug>/<section>")
     def property_section(slug, section):
-        prop = Property.query.filter_by(slug=slug).first_or_404()
         sections = ["welcome","check-in","rules","how-to","issues","emergency","local","checkout","faqs","social","print","reviews"]
         if section not in sections:
             abort(404)
-        tpl = f"property/{section}.html"
-        log_view(prop, section)
-        return render_template(tpl, p=prop, section=section)
+        return render_property_page(slug, section)
+
+    # Tab switches app.js serves from its fragment cache (or a prefetch) never
+    # reach the page route, so it reports them here with navigator.sendBeacon.
+    @app.post("/p/<slug>/view")
+    def property_view(slug):
+        section = request.form.get("section", "")
+        if section not in static_export.SECTIONS:
+            abort(400)
+        log_view(property_meta(slug).id, section)
+        return "", 204
 
     # How-to detail page (Manual button)
     @app.route("/p/<slug>/howto/<int:id>")
     def property_howto_detail(slug, id):
-        prop = Property.query.filter_by(slug=slug).first_or_404()
+        meta = property_meta(slug)
+        etag = content_etag(meta, "howto", id, get_locale())
+        resp = not_modified(etag, meta.updated_at)
+        if resp is not None:
+            return resp
+        prop = loading.property_for("howto_detail", slug=slug).first_or_404()
         h = HowTo.query.get_or_404(id)
         if hasattr(h, "prop_id") and h.prop_id != prop.id:
             abort(404)
-        return render_template("property/howto_detail.html", p=prop, h=h)
+        html = render_template("property/howto_detail.html", p=prop, h=h)
+        loading.check_budget(app, "howto_detail", extra=2)
+        return add_validators(make_response(html), etag, meta.updated_at)
 
-    # Shareable QR (PNG)
-    @app.get("/p/<slug>/qr.png")
-    def property_qr(slug):
-        prop = Property.query.filter_by(slug=slug).first_or_404()
-        url = url_for("property_home", slug=slug, _external=True)
-        img = qrcode.make(url)
-        buf = io.BytesIO()
-        img.save(buf, format="PNG"); buf.seek(0)
-        return send_file(buf, mimetype="image/png")
+    # Shareable QR (PNG / SVG), e.g. /p/<slug>/qr.png?size=6 or ?format=svg
+    @app.get("/p/<slug>/qr.png", defaults={"fmt": "png"})
+    @app.get("/p/<slug>/qr.svg", defaults={"fmt": "svg"})
+    @compress_exempt
+    def property_qr(slug, fmt):
+        if db.session.query(Property.id).filter_by(slug=slug).first() is None:
+            abort(404)
+        fmt = request.args.get("format", fmt).lower()
+        if fmt not in QR_FORMATS:
+            abort(404)
+        box_size = min(max(request.args.get("size", 10, type=int), 1), 40)
+        url = public_url(app, "property_home", slug=slug)
+        path, key = qr_cache.get(url, fmt=fmt, box_size=box_size)
+        # The URL stays the same when PUBLIC_BASE_URL or the slug's target moves,
+        # so caches revalidate against the key (a 304 while it is unchanged).
+        resp = send_file(path, mimetype=QR_FORMATS[fmt], etag=key, conditional=True)
+        resp.cache_control.public = True
+        resp.cache_control.no_cache = True
+        return resp
+
+    # Print-ready manual (PDF / paginated HTML), rebuilt only when content changes.
+    @app.get("/p/<slug>/manual.pdf", defaults={"fmt": "pdf"})
+    @app.get("/p/<slug>/manual.html", defaults={"fmt": "html"})
+    def property_manual(slug, fmt):
+        pid = db.session.query(Property.id).filter_by(slug=slug).scalar()
+        if pid is None:
+            abort(404)
+        found = print_artifacts.get(pid, fmt)
+        if found is None:
+            abort(404)
+        path, key = found
+        resp = send_file(path, mimetype=PRINT_FORMATS[fmt], etag=key, conditional=True,
+                         download_name=f"{slug}.{fmt}", as_attachment=request.args.get("download") == "1")
+        resp.cache_control.no_cache = True
+        return resp
+
+    # Offline manual: what the service worker (/sw.js) precaches for a property.
+    # The version changes with every content edit and deploy.
+    @app.get("/p/<slug>/offline.json")
+    def property_offline_manifest(slug):
+        if not app.config["OFFLINE_ENABLED"]:
+            abort(404)
+        meta = property_meta(slug)
+        etag = content_etag(meta, "offline")
+        resp = not_modified(etag, meta.updated_at)
+        if resp is not None:
+            return resp
+        prop = loading.property_for("offline", slug=slug).first_or_404()
+        resp = jsonify(offline.manifest(prop, etag, img_src))
+        return add_validators(resp, etag, meta.updated_at)
+
+    @app.get("/sw.js")
+    def service_worker():
+        # Served from the root so it may control /p/; always revalidated so a
+        # deploy (new release) replaces it promptly.
+        resp = make_response(render_template("sw.js", release=release, enabled=app.config["OFFLINE_ENABLED"]))
+        resp.mimetype = "application/javascript"
+        resp.cache_control.no_cache = True
+        return resp
+
+    # Search across FAQs, how-tos, rules, issue flows and local places.
+    # ?format=json (or an Accept: application/json fetch) powers as-you-type results.
+    @app.get("/p/<slug>/search")
+    def property_search(slug):
+        q = request.args.get("q", "").strip()[:200]
+        limit = min(max(request.args.get("limit", 20, type=int), 1), 50)
+        want_json = request.args.get("format") == "json" or request.accept_mimetypes.best == "application/json"
+        if want_json:
+            pid = property_meta(slug).id
+            hits = search_index.search(pid, q, limit) if q else []
+            return jsonify(query=q, results=[
+                dict(kind=h["kind"], title=str(render_highlight(h["title"])),
+                     snippet=str(render_highlight(h["snippet"])), url=search_result_url(slug, h))
+                for h in hits
+            ])
+        prop = loading.property_for("search", slug=slug).first_or_404()
+        hits = search_index.search(prop.id, q, limit) if q else []
+        return render_template("property/search.html", p=prop, section="search", q=q, results=hits,
+                               result_url=search_result_url, highlight=render_highlight,
+                               fragment=is_fragment_request())
+
+    def search_result_url(slug, hit):
+        if hit["kind"] == "howto":
+            return url_for("property_howto_detail", slug=slug, id=hit["ref_id"])
+        if hit["section"] == "welcome":
+            return url_for("property_home", slug=slug)
+        return url_for("property_section", slug=slug, section=hit["section"])
+
+    # Resized / re-encoded hero and gallery images
+    @app.get("/img/<token>/<variant>")
+    @compress_exempt
+    def image_proxy(token, variant):
+        url = image_store.url_for_token(token)
+        if url is None or variant not in IMAGE_VARIANTS:
+            abort(404)
+        accept = request.headers.get("Accept", "")
+        fmt = next((f for f in image_formats if IMAGE_MIMETYPES[f] in accept), "jpeg")
+        try:
+            path, etag = image_store.variant(url, IMAGE_VARIANTS[variant], fmt)
+        except ImageFetchError as e:
+            app.logger.warning("Image proxy fell back to origin: %s", e)
+            return redirect(url)
+        resp = send_file(path, mimetype=IMAGE_MIMETYPES[fmt], etag=etag, max_age=31536000, conditional=True)
+        resp.cache_control.public = True
+        resp.cache_control.immutable = True
+        resp.vary.add("Accept")
+        return resp
 
     # Contact / Issue form
     @app.post("/p/<slug>/message")
@@ -107,7 +430,9 @@ def create_app():
             category=request.form.get("category","General"),
             body=request.form.get("body","").strip()
         )
-        db.session.add(m); db.session.commit()
+        db.session.add(m)
+        inbox.message_added(m)
+        db.session.commit()
         flash(_("Thanks — we received your message."), "ok")
         return redirect(request.referrer or url_for("property_home", slug=slug))
 
@@ -134,14 +459,69 @@ def create_app():
         if not is_authed():
             return redirect(url_for("admin_login"))
         props = Property.query.order_by(Property.name).all()
-        from datetime import datetime, timedelta
-        since = datetime.utcnow() - timedelta(days=30)
-        views = PageView.query.filter(PageView.created_at >= since).all()
-        by_prop = {}
-        for v in views:
-            by_prop.setdefault(v.property_id, 0)
-            by_prop[v.property_id] += 1
-        return render_template("admin/dashboard.html", props=props, views=by_prop)
+        by_prop = rollups.views_by_property(days=30)
+        return render_template("admin/dashboard.html", props=props, views=by_prop,
+                               unread=inbox.unread_by_property())
+
+    # Guest messages, newest first, e.g.
+    # /admin/property/3/inbox?status=unread&category=Keys&since=2026-01-01&cursor=<opaque>
+    @app.get("/admin/property/<int:pid>/inbox")
+    def admin_inbox(pid):
+        if not is_authed(): return redirect(url_for("admin_login"))
+        p = Property.query.get_or_404(pid)
+        filters = {k: request.args.get(k) or None for k in ("category", "status", "since", "until")}
+        if filters["status"] not in (None,) + inbox.STATUSES:
+            abort(400, description="Unknown status")
+        try:
+            messages, next_cursor = inbox.page(
+                p.id, category=filters["category"], status=filters["status"],
+                since=data_export.parse_date(filters["since"]), until=data_export.parse_date(filters["until"]),
+                cursor=request.args.get("cursor"))
+        except (ValueError, data_export.ExportError) as e:
+            abort(400, description=str(e))
+        return render_template("admin/inbox.html", p=p, messages=messages, next_cursor=next_cursor,
+                               counts=inbox.counts(p.id), filters=filters, statuses=inbox.STATUSES)
+
+    @app.post("/admin/property/<int:pid>/inbox")
+    def admin_inbox_update(pid):
+        if not is_authed(): return redirect(url_for("admin_login"))
+        p = Property.query.get_or_404(pid)
+        status = request.form.get("status")
+        if status not in inbox.STATUSES:
+            abort(400, description="Unknown status")
+        ids = [int(i) for i in request.form.getlist("ids") if i.isdigit()]
+        n = inbox.set_status(p.id, ids, status)
+        db.session.commit()
+        flash(_("%(n)d messages marked %(status)s", n=n, status=status), "ok")
+        back = {k: v for k, v in request.form.items() if k in ("category", "status_filter", "since", "until", "cursor") and v}
+        if "status_filter" in back:
+            back["status"] = back.pop("status_filter")
+        return redirect(url_for("admin_inbox", pid=p.id, **back))
+
+    # Streaming CSV / NDJSON export, e.g.
+    # /admin/export/views?format=csv&gzip=1&property=<slug>&section=rules&since=2026-01-01
+    @app.get("/admin/export/<kind>")
+    def admin_export(kind):
+        if not is_authed():
+            return redirect(url_for("admin_login"))
+        fmt = request.args.get("format", "csv")
+        gzip = request.args.get("gzip") == "1"
+        try:
+            chunks = data_export.stream(
+                kind, fmt, gzip=gzip,
+                property_id=data_export.resolve_property(request.args.get("property")),
+                match=request.args.get("section") or request.args.get("category"),
+                since=data_export.parse_date(request.args.get("since")),
+                until=data_export.parse_date(request.args.get("until")),
+            )
+        except data_export.ExportError as e:
+            abort(400, description=str(e))
+        filename = f"{kind}.{fmt}" + (".gz" if gzip else "")
+        resp = app.response_class(stream_with_context(chunks), mimetype=data_export.FORMATS[fmt])
+        if gzip:
+            resp.mimetype = "application/gzip"
+        resp.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return resp
 
     # =======================
     # Admin: property CRUD (basic)
@@ -154,6 +534,7 @@ def create_app():
         p = Property.query.get(pid) if pid else None
         if request.method == "POST":
             data = request.form
+            old_slug = p.slug if p else None
             if not p: p = Property()
             for field in [
                 "slug","name","address_display","map_url","checkin_time","checkout_time",
@@ -163,6 +544,8 @@ def create_app():
             ]:
                 setattr(p, field, data.get(field,"").strip())
             db.session.add(p); db.session.commit()
+            page_cache.invalidate(old_slug, p.slug)
+            qr_cache.get(public_url(app, "property_home", slug=p.slug))
             flash(_("Saved property"), "ok")
             return redirect(url_for("admin_dashboard"))
         return render_template("admin/property_form.html", p=p)
@@ -173,9 +556,87 @@ def create_app():
             return redirect(url_for("admin_login"))
         p = Property.query.get_or_404(pid)
         db.session.delete(p); db.session.commit()
+        purge_telemetry([pid])
+        page_cache.invalidate(p.slug)
         flash(_("Deleted"), "ok")
         return redirect(url_for("admin_dashboard"))
 
+    # Every property's printable manual in one ZIP, for printing binders.
+    @app.get("/admin/print.zip")
+    def admin_print_zip():
+        if not is_authed(): return redirect(url_for("admin_login"))
+        buf = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+        stale = print_artifacts.write_zip(buf, Property.query.order_by(Property.slug).all())
+        if stale:
+            flash(_("%(n)d manuals are being rebuilt and were left out (see STALE.txt)", n=len(stale)), "error")
+        buf.seek(0)
+        return send_file(buf, mimetype="application/zip", as_attachment=True, download_name="manuals.zip")
+
+    # Bulk JSON/YAML bundles: export, import (one transaction) and clone
+    def bundle_written(written):
+        # Bulk statements bypass the ORM hooks, so search and the page cache are refreshed here.
+        search_index.reindex([pid for pid, _ in written])
+        db.session.commit()
+        page_cache.invalidate(*(slug for _, slug in written))
+        print_artifacts.schedule([pid for pid, _ in written])
+
+    def bundle_response(props, fmt, filename):
+        if fmt not in bundles.FORMATS:
+            abort(400, description=f"Unknown format: {fmt!r}")
+        try:
+            body = bundles.dumps(bundles.export(props), fmt)
+        except bundles.BundleError as e:
+            abort(400, description=str(e))
+        resp = app.response_class(body, mimetype=bundles.FORMATS[fmt])
+        resp.headers["Content-Disposition"] = f'attachment; filename="{filename}.{fmt}"'
+        return resp
+
+    @app.get("/admin/properties/export")
+    def admin_properties_export():
+        if not is_authed(): return redirect(url_for("admin_login"))
+        props = Property.query.order_by(Property.id).all()
+        return bundle_response(props, request.args.get("format", "json"), "properties")
+
+    @app.get("/admin/property/<int:pid>/export")
+    def admin_property_export(pid):
+        if not is_authed(): return redirect(url_for("admin_login"))
+        p = Property.query.get_or_404(pid)
+        return bundle_response([p], request.args.get("format", "json"), p.slug)
+
+    @app.post("/admin/properties/import")
+    def admin_properties_import():
+        if not is_authed(): return redirect(url_for("admin_login"))
+        upload = request.files.get("bundle")
+        if upload is None or not upload.filename:
+            flash(_("Choose a JSON or YAML file to import"), "error")
+            return redirect(url_for("admin_dashboard"))
+        fmt = "yaml" if upload.filename.lower().endswith((".yaml", ".yml")) else None
+        try:
+            doc = bundles.loads(upload.read().decode("utf-8-sig"), fmt)
+            written = bundles.import_bundle(doc, replace=request.form.get("replace") == "1")
+            bundle_written(written)
+        except (bundles.BundleError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            flash(_("Import failed: %(error)s", error=str(e)), "error")
+            return redirect(url_for("admin_dashboard"))
+        flash(_("Imported %(n)d properties", n=len(written)), "ok")
+        return redirect(url_for("admin_dashboard"))
+
+    @app.post("/admin/property/<int:pid>/clone")
+    def admin_property_clone(pid):
+        if not is_authed(): return redirect(url_for("admin_login"))
+        p = Property.query.get_or_404(pid)
+        slug = request.form.get("slug", "").strip()
+        try:
+            written = bundles.clone(p, [slug], name=request.form.get("name", "").strip() or None)
+            bundle_written(written)
+        except bundles.BundleError as e:
+            db.session.rollback()
+            flash(_("Clone failed: %(error)s", error=str(e)), "error")
+            return redirect(url_for("admin_dashboard"))
+        flash(_("Cloned to %(slug)s", slug=slug), "ok")
+        return redirect(url_for("admin_property_manage", pid=written[0][0]))
+
     # Quick add: single rule (compat)
     @app.post("/admin/<int:pid>/rule")
     def add_rule(pid):
@@ -189,6 +650,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(r); db.session.commit()
+        page_cache.invalidate(p.slug)
         return redirect(url_for("admin_dashboard"))
 
     # =======================
@@ -198,8 +660,10 @@ def create_app():
     @app.get("/admin/property/<int:pid>/manage")
     def admin_property_manage(pid):
         if not is_authed(): return redirect(url_for("admin_login"))
-        p = Property.query.get_or_404(pid)
-        return render_template("admin/property_manage.html", p=p)
+        p = loading.property_for("manage", id=pid).first_or_404()
+        html = render_template("admin/property_manage.html", p=p)
+        loading.check_budget(app, "manage")
+        return html
 
     @app.post("/admin/<int:pid>/faq")
     def admin_add_faq(pid):
@@ -207,6 +671,7 @@ def create_app():
         p = Property.query.get_or_404(pid)
         f = FAQ(q=request.form.get("q",""), a=request.form.get("a",""), related=request.form.get("related",""), prop_id=p.id)
         db.session.add(f); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("FAQ added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -224,6 +689,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(e); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("Emergency contact added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -243,6 +709,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(l); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("Local place added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -260,6 +727,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(h); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("How-to added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -277,6 +745,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(s); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("Check-in step added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -292,6 +761,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(s); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("Check-out step added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -307,6 +777,7 @@ def create_app():
             prop_id=p.id
         )
         db.session.add(c); db.session.commit()
+        page_cache.invalidate(p.slug)
         flash("Contact added", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -315,6 +786,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = FAQ.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -323,6 +795,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = Emergency.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -331,6 +804,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = LocalPlace.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -339,6 +813,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = HowTo.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -347,6 +822,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = CheckinStep.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -355,6 +831,7 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = CheckoutStep.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
@@ -363,9 +840,190 @@ def create_app():
         if not is_authed(): return redirect(url_for("admin_login"))
         m = Contact.query.get_or_404(id); pid = m.prop_id
         db.session.delete(m); db.session.commit()
+        content_changed(pid)
         flash("Deleted", "ok")
         return redirect(url_for("admin_property_manage", pid=pid))
 
+    # =======================
+    # CLI
+    # =======================
+    @app.cli.command("init-db")
+    @click.option("--seed/--no-seed", default=True, help="Insert the demo property into an empty database.")
+    def init_db_command(seed):
+        """Create missing tables (and seed an empty database)."""
+        bootstrap.init_db(app, with_seed=seed)
+        print("Database ready")
+
+    @app.cli.command("seed")
+    def seed_command():
+        """Insert the demo property if the database is empty."""
+        with app.app_context():
+            seed(db)
+        print("Seed done")
+
+    @app.cli.command("search-reindex")
+    def search_reindex():
+        """Rebuild the full-text search index from scratch."""
+        search_index.rebuild()
+        print(f"Rebuilt search index ({search_index.backend.name})")
+
+    @app.cli.command("export-data")
+    @click.argument("kind", type=click.Choice(sorted(data_export.EXPORTS)))
+    @click.option("--format", "fmt", type=click.Choice(sorted(data_export.FORMATS)), default="csv")
+    @click.option("--gzip", is_flag=True, help="Gzip the output.")
+    @click.option("--property", "prop", help="Property id or slug.")
+    @click.option("--section", "--category", "match", help="Section (views) or category (messages).")
+    @click.option("--since", help="Start date, inclusive (YYYY-MM-DD).")
+    @click.option("--until", help="End date, exclusive (YYYY-MM-DD).")
+    @click.option("-o", "--output", type=click.File("wb"), default="-")
+    def export_data(kind, fmt, gzip, prop, match, since, until, output):
+        """Stream page views or guest messages as CSV/NDJSON."""
+        try:
+            chunks = data_export.stream(
+                kind, fmt, gzip=gzip, property_id=data_export.resolve_property(prop), match=match,
+                since=data_export.parse_date(since), until=data_export.parse_date(until))
+            for chunk in chunks:
+                output.write(chunk)
+        except data_export.ExportError as e:
+            raise click.UsageError(str(e))
+
+    @app.cli.command("property-export")
+    @click.argument("slugs", nargs=-1)
+    @click.option("--format", "fmt", type=click.Choice(sorted(bundles.FORMATS)), default="json")
+    @click.option("-o", "--output", type=click.File("w", encoding="utf-8"), default="-")
+    def property_export(slugs, fmt, output):
+        """Write properties (all, or the given slugs) and their content as a JSON/YAML bundle."""
+        q = Property.query.order_by(Property.id)
+        if slugs:
+            q = q.filter(Property.slug.in_(slugs))
+        try:
+            output.write(bundles.dumps(bundles.export(q.all()), fmt))
+        except bundles.BundleError as e:
+            raise click.UsageError(str(e))
+
+    @app.cli.command("property-import")
+    @click.argument("path", type=click.Path(exists=True, dir_okay=False))
+    @click.option("--replace", is_flag=True, help="Overwrite properties whose slug already exists.")
+    def property_import(path, replace):
+        """Import a JSON/YAML bundle in one transaction."""
+        fmt = "yaml" if path.lower().endswith((".yaml", ".yml")) else None
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+        try:
+            written = bundles.import_bundle(bundles.loads(text, fmt), replace=replace)
+            bundle_written(written)
+        except bundles.BundleError as e:
+            db.session.rollback()
+            raise click.ClickException("\n".join(e.errors))
+        print(f"Imported {len(written)} properties")
+
+    @app.cli.command("property-clone")
+    @click.argument("source")
+    @click.argument("slug")
+    @click.option("--name", help="Name for the copy; {n} is replaced by the copy number.")
+    @click.option("--count", type=int, default=1, help="Make COUNT copies; SLUG must contain {n}.")
+    def property_clone(source, slug, name, count):
+        """Copy a property's manual to a new slug (or to many, e.g. unit-{n} --count 200)."""
+        p = Property.query.filter_by(slug=source).first()
+        if p is None:
+            raise click.UsageError(f"Unknown property: {source!r}")
+        if count > 1 and "{n}" not in slug:
+            raise click.UsageError("With --count, SLUG must contain {n}")
+        try:
+            written = bundles.clone(p, [slug.replace("{n}", str(i)) for i in range(1, count + 1)], name=name)
+            bundle_written(written)
+        except bundles.BundleError as e:
+            db.session.rollback()
+            raise click.ClickException("\n".join(e.errors))
+        print(f"Cloned {source} to {len(written)} properties")
+
+    @app.cli.command("retention")
+    @click.option("--dry-run", is_flag=True, help="Only report what would be reclaimed.")
+    @click.option("--no-vacuum", is_flag=True, help="Skip VACUUM / space reclamation.")
+    def retention_command(dry_run, no_vacuum):
+        """Fold old raw page views into rollups, delete them in batches and reclaim space."""
+        r = retention.report(app)
+        print(f"Raw views before {r['raw_cutoff']:%Y-%m-%d}: {r['raw_rows']:,} of {r['raw_total']:,} rows "
+              f"(~{r['raw_bytes'] / 1048576:.1f} MB)")
+        print(f"Hourly rollups before {r['hourly_cutoff']:%Y-%m-%d}: {r['hourly_rows']:,} of {r['hourly_total']:,} rows "
+              f"(~{r['hourly_bytes'] / 1048576:.1f} MB)")
+        if dry_run:
+            return
+        done = retention.run(app, vacuum=not no_vacuum)
+        print(f"Folded {done['folded_days']} day(s); deleted {done['raw_rows']:,} raw views and "
+              f"{done['hourly_rows']:,} hourly rollups; reclaim: {done['reclaim'] or 'skipped'}")
+
+    @app.cli.command("inbox-recount")
+    def inbox_recount():
+        """Rebuild the per-property message counters from the message table."""
+        n = inbox.recount()
+        print(f"Rebuilt {n} message counters")
+
+    @app.cli.command("rollup-backfill")
+    def rollup_backfill():
+        """Rebuild hourly/daily view rollups from PageView history."""
+        n = rollups.rebuild()
+        print(f"Rebuilt rollups from {n} page views")
+
+    @app.cli.command("ua-backfill")
+    def ua_backfill():
+        """Intern User-Agent strings of views recorded before the lookup table existed."""
+        n = useragents.backfill(views_buffer.user_agents)
+        print(f"Interned user agents for {n} page views")
+
+    @app.cli.command("db-profile")
+    def db_profile_info():
+        """Show the effective pool and SQLite pragma settings of each database."""
+        engines = dict(db.engines)
+        if "replica" in app.extensions:
+            engines["replica"] = app.extensions["replica"]
+        for bind, engine in engines.items():
+            print(bind or "default", db_profile.describe(engine))
+
+    @app.cli.command("telemetry-copy")
+    @click.argument("source_url")
+    def telemetry_copy(source_url):
+        """Copy views/messages from the old shared database into TELEMETRY_DATABASE_URL."""
+        if db.engines[TELEMETRY].url == db.engines[None].url:
+            raise click.ClickException("Set TELEMETRY_DATABASE_URL to the new telemetry database first")
+        for table, n in db_profile.copy_telemetry(source_url).items():
+            print(f"{table}: {n} rows")
+
+    @app.cli.command("qr-pregenerate")
+    @click.option("--base-url", default=None, help="Public host the QR codes point at (default PUBLIC_BASE_URL).")
+    def qr_pregenerate(base_url):
+        """Pre-render the default QR code for every property."""
+        for p in Property.query.order_by(Property.id):
+            qr_cache.get(public_url(app, "property_home", base_url=base_url, slug=p.slug))
+            print(p.slug)
+
+    @app.cli.command("print-build")
+    @click.option("--base-url", default=None, help="Public host the QR codes point at (default PUBLIC_BASE_URL).")
+    def print_build(base_url):
+        """Build the print PDF/HTML manual for every property whose content changed."""
+        base_url = base_url.rstrip("/") + "/" if base_url else print_artifacts.base_url()
+        for p in Property.query.order_by(Property.id):
+            found = print_artifacts.get(p.id, "pdf", base_url)
+            if found:
+                print(p.slug, found[1])
+
+    @app.cli.command("static-build")
+    def static_build():
+        """Fingerprint and precompress static/ (also done at startup)."""
+        manifest = static_assets.build()
+        click.echo(f"Built {len(manifest)} static files into {static_assets.root} ({', '.join(COMPRESSORS)}).")
+
+    @app.cli.command("export-static")
+    @click.argument("out_dir")
+    @click.option("--base-url", default="http://localhost:5000", help="Public host the manuals are served from.")
+    @click.option("--force", is_flag=True, help="Re-render every property, not just changed ones.")
+    def export_static(out_dir, base_url, force):
+        """Render all guest manuals to static files for nginx/CDN."""
+        # RELEASE names the deploy; the digest also catches template/static edits made without bumping it.
+        exported, skipped, removed = static_export.export_all(
+            app, out_dir, base_url, force=force, release=f"{release}|{release_digest(app)}")
+        print(f"Exported {len(exported)}, unchanged {len(skipped)}, removed {len(removed)}")
+
     # ---- return (keep at the very end) ----
     return app
 
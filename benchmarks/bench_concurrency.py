@@ -0,0 +1,128 @@
+"""Concurrent writers on SQLite, with and without the database profile.
+
+Starts --workers processes (one app each, like gunicorn sync workers) against
+one SQLite file. Every worker serves guest pages, which record a PageView
+inline (VIEW_BUFFER_ENABLED=0, the worst case), and posts guest messages for
+--seconds. It is run twice on fresh databases: SQLITE_TUNING=0 (SQLite
+defaults: rollback journal, synchronous=FULL) and SQLITE_TUNING=1 (WAL,
+busy_timeout, cache/mmap pragmas). Reports requests/s, p95 latency, failed
+requests and page views dropped on "database is locked".
+
+    python benchmarks/bench_concurrency.py --workers 8 --seconds 10
+    python benchmarks/bench_concurrency.py --profiles tuned --message-ratio 0.5
+"""
+import os, sys, json, time, argparse, tempfile, subprocess, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = {"untuned": {"SQLITE_TUNING": "0"}, "tuned": {"SQLITE_TUNING": "1"}}
+
+WORKER = r"""
+import sys, json, time, random
+start_at, seconds, ratio, seed = float(sys.argv[1]), float(sys.argv[2]), float(sys.argv[3]), int(sys.argv[4])
+import app as app_module
+client = app_module.app.test_client()
+slug = "vibe-modern-rustic-apartment"
+rnd = random.Random(seed)
+latencies, views, messages, failed, errors = [], 0, 0, 0, {}
+time.sleep(max(0.0, start_at - time.time()))
+end = time.time() + seconds
+while time.time() < end:
+    t0 = time.perf_counter()
+    try:
+        if rnd.random() < ratio:
+            resp = client.post(f"/p/{slug}/message", data={"name": "Load", "contact": "load@example.com",
+                                                            "category": "General", "body": "Concurrency test."})
+            ok = resp.status_code == 302
+            messages += ok
+        else:
+            resp = client.get(f"/p/{slug}")
+            ok = resp.status_code == 200
+            views += ok
+        if not ok:
+            failed += 1
+            errors[str(resp.status_code)] = errors.get(str(resp.status_code), 0) + 1
+    except Exception as e:
+        failed += 1
+        key = type(e).__name__ + ": " + str(e).splitlines()[0][:80]
+        errors[key] = errors.get(key, 0) + 1
+    latencies.append(time.perf_counter() - t0)
+print(json.dumps({"latencies": latencies, "views": views, "messages": messages, "failed": failed, "errors": errors}))
+"""
+
+COUNT = r"""
+import json
+import app as app_module
+from models import db, PageView, Message
+with app_module.app.app_context():
+    print(json.dumps({"views": db.session.query(PageView).count(), "messages": db.session.query(Message).count()}))
+"""
+
+
+def run_profile(name, args):
+    data_dir = tempfile.mkdtemp(prefix=f"bench-concurrency-{name}-")
+    env = dict(os.environ, **PROFILES[name],
+               DATABASE_URL="sqlite:///" + os.path.join(data_dir, "bench.db"),
+               DB_INIT_MODE="off", VIEW_BUFFER_ENABLED="0", PAGE_CACHE_BACKEND="none",
+               PRINT_BACKGROUND="0", FLASK_APP="app")
+    subprocess.run([sys.executable, "-m", "flask", "init-db"], cwd=ROOT, env=env, check=True, capture_output=True)
+    base = json.loads(subprocess.run([sys.executable, "-c", COUNT], cwd=ROOT, env=env, check=True,
+                                     capture_output=True, text=True).stdout.strip().splitlines()[-1])
+    start_at = time.time() + 3.0  # let every worker finish importing first
+    procs = [subprocess.Popen([sys.executable, "-c", WORKER, str(start_at), str(args.seconds),
+                               str(args.message_ratio), str(i)],
+                              cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+             for i in range(args.workers)]
+    results = []
+    for p in procs:
+        out, err = p.communicate()
+        if p.returncode != 0:
+            sys.exit(f"worker failed:\n{err}")
+        results.append(json.loads(out.strip().splitlines()[-1]))
+    after = json.loads(subprocess.run([sys.executable, "-c", COUNT], cwd=ROOT, env=env, check=True,
+                                      capture_output=True, text=True).stdout.strip().splitlines()[-1])
+
+    latencies = sorted(l for r in results for l in r["latencies"])
+    errors = {}
+    for r in results:
+        for k, n in r["errors"].items():
+            errors[k] = errors.get(k, 0) + n
+    served_views = sum(r["views"] for r in results)
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / args.seconds, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2) if latencies else None,
+        "failed": sum(r["failed"] for r in results),
+        "views_dropped": served_views - (after["views"] - base["views"]),
+        "messages_written": after["messages"] - base["messages"],
+        "errors": errors,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent worker processes.")
+    ap.add_argument("--seconds", type=float, default=10.0, help="Measured run time per profile.")
+    ap.add_argument("--message-ratio", type=float, default=0.2, help="Share of requests that post a message.")
+    ap.add_argument("--profiles", default="untuned,tuned", help=f"Comma-separated, from {', '.join(PROFILES)}.")
+    ap.add_argument("--json", action="store_true", help="Print raw results as JSON.")
+    args = ap.parse_args()
+
+    results = {}
+    for name in args.profiles.split(","):
+        results[name] = run_profile(name, args)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.workers} workers, {args.seconds:g}s, {args.message_ratio:.0%} message posts")
+    print(f"{'profile':<10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'failed':>7} {'views lost':>11}")
+    for name, r in results.items():
+        print(f"{name:<10} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['failed']:>7} {r['views_dropped']:>11}")
+        for err, n in sorted(r["errors"].items(), key=lambda kv: -kv[1]):
+            print(f"{'':<10} {n:>6} x {err}")
+    if "untuned" in results and "tuned" in results and results["untuned"]["rps"]:
+        print(f"tuned/untuned throughput: {results['tuned']['rps'] / results['untuned']['rps']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
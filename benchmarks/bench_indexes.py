@@ -0,0 +1,122 @@
+"""Scan-versus-index timings for the hot lookup queries.
+
+Builds a synthetic SQLite database (page views, messages and FAQ rows spread
+over many properties), times each query with no secondary indexes, then
+creates the indexes declared in models.py and times them again.
+
+    python benchmarks/bench_indexes.py --views 2000000
+"""
+import os, sys, time, random, sqlite3, argparse, tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.dialects import sqlite as sqlite_dialect
+from sqlalchemy.schema import CreateTable, CreateIndex
+from models import db
+
+TABLES = ["property", "page_view", "message", "faq"]
+SECTIONS = ["welcome", "check-in", "rules", "how-to", "issues", "emergency",
+            "local", "checkout", "faqs", "social", "print", "reviews"]
+
+QUERIES = [
+    ("dashboard 30d count", "SELECT count(*) FROM page_view WHERE property_id = ? AND created_at >= ?",
+     lambda a: (a.pid, a.since)),
+    ("section 30d count", "SELECT count(*) FROM page_view WHERE property_id = ? AND section = ? AND created_at >= ?",
+     lambda a: (a.pid, "rules", a.since)),
+    ("views since (all props)", "SELECT count(*) FROM page_view WHERE created_at >= ?",
+     lambda a: (a.recent,)),
+    ("latest messages", "SELECT id FROM message WHERE property_id = ? ORDER BY created_at DESC LIMIT 50",
+     lambda a: (a.pid,)),
+    ("faq children", "SELECT * FROM faq WHERE prop_id = ?",
+     lambda a: (a.pid,)),
+]
+
+
+def create_tables(conn):
+    # Tables only; the secondary indexes are added after the scan timings.
+    for name in TABLES:
+        conn.execute(str(CreateTable(db.metadata.tables[name]).compile(dialect=sqlite_dialect.dialect())))
+
+
+def populate(conn, args):
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    conn.executemany("INSERT INTO property (id, slug, name) VALUES (?, ?, ?)",
+                     [(i, f"unit-{i}", f"Unit {i}") for i in range(1, args.properties + 1)])
+
+    def rows(n, make):
+        batch = []
+        for _ in range(n):
+            batch.append(make())
+            if len(batch) == 50000:
+                yield batch; batch = []
+        if batch:
+            yield batch
+
+    def ts():
+        return (now - timedelta(seconds=rnd.randint(0, args.days * 86400))).isoformat(" ")
+
+    for batch in rows(args.views, lambda: (rnd.randint(1, args.properties), rnd.choice(SECTIONS), "Mozilla/5.0", "127.0.0.1", ts())):
+        conn.executemany("INSERT INTO page_view (property_id, section, user_agent, ip, created_at) VALUES (?, ?, ?, ?, ?)", batch)
+    for batch in rows(args.messages, lambda: (rnd.randint(1, args.properties), "Guest", "General", "Hello", ts())):
+        conn.executemany("INSERT INTO message (property_id, name, category, body, created_at) VALUES (?, ?, ?, ?, ?)", batch)
+    for batch in rows(args.faqs, lambda: (rnd.randint(1, args.properties), "Question?", "Answer.")):
+        conn.executemany("INSERT INTO faq (prop_id, q, a) VALUES (?, ?, ?)", batch)
+    conn.commit()
+
+
+def timed(conn, sql, params, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - t0)
+    plan = " / ".join(r[-1] for r in conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+    return best, plan
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--views", type=int, default=2_000_000)
+    ap.add_argument("--messages", type=int, default=200_000)
+    ap.add_argument("--faqs", type=int, default=100_000)
+    ap.add_argument("--properties", type=int, default=500)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--db", help="SQLite file to use (default: a temp file)")
+    args = ap.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "bench_indexes.db")
+    if os.path.exists(path):
+        os.remove(path)
+    conn = sqlite3.connect(path)
+    create_tables(conn)
+    t0 = time.perf_counter()
+    populate(conn, args)
+    print(f"Loaded {args.views:,} views, {args.messages:,} messages, {args.faqs:,} FAQs "
+          f"in {time.perf_counter() - t0:.1f}s ({path})")
+
+    args.pid = args.properties // 2
+    args.since = (datetime.utcnow() - timedelta(days=30)).isoformat(" ")
+    args.recent = (datetime.utcnow() - timedelta(days=1)).isoformat(" ")
+
+    scans = {name: timed(conn, sql, params(args), args.repeat) for name, sql, params in QUERIES}
+
+    t0 = time.perf_counter()
+    for name in TABLES:
+        for ix in db.metadata.tables[name].indexes:
+            conn.execute(str(CreateIndex(ix).compile(dialect=sqlite_dialect.dialect())))
+    conn.execute("ANALYZE")
+    print(f"Built indexes in {time.perf_counter() - t0:.1f}s\n")
+
+    print(f"{'query':<26}{'scan ms':>10}{'index ms':>10}{'speedup':>10}  plan (indexed)")
+    for name, sql, params in QUERIES:
+        scan, _ = scans[name]
+        idx, plan = timed(conn, sql, params(args), args.repeat)
+        print(f"{name:<26}{scan * 1000:>10.2f}{idx * 1000:>10.2f}{scan / max(idx, 1e-9):>9.1f}x  {plan}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
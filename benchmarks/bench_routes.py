@@ -0,0 +1,309 @@
+"""Latency, throughput and queries per request for every public route.
+
+Builds synthetic SQLite datasets of 1, 100 and 10,000 properties (copies of
+the seed() property with all of its child rows, plus messages and 30 days of
+view rollups each), then drives the guest pages, how-to detail, QR image,
+message form and admin dashboard through the WSGI test client and, with
+--gunicorn, a local gunicorn. p50/p95/p99 latency, throughput and (test
+client only) SQL statements per request are compared against a baseline.
+
+    python benchmarks/bench_routes.py --sizes 1,100 --requests 200
+    python benchmarks/bench_routes.py --gunicorn --concurrency 8 --data-dir /tmp/bench-data
+    python benchmarks/bench_routes.py --save-baseline
+"""
+import os, sys, json, time, random, socket, argparse, tempfile, threading, statistics, subprocess
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlencode
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+SECTIONS = ["check-in", "rules", "how-to", "issues", "emergency", "local",
+            "checkout", "faqs", "social", "print", "reviews"]
+MESSAGES_PER_PROPERTY = 5
+ROLLUP_DAYS = 30
+
+
+# ---- Datasets ----
+def build_dataset(app, size):
+    """Seed the sample property, then clone it (with every child row) to `size` properties."""
+    import bootstrap, inbox
+    from models import db, Property, Message, ViewRollupDaily, CONTENT_MODELS
+    bootstrap.init_db(app)
+    with app.app_context():
+        src = Property.query.order_by(Property.id).first()
+        prop_row = {c.name: getattr(src, c.name) for c in Property.__table__.columns if c.name != "id"}
+        children = {
+            model: [{c.name: getattr(obj, c.name) for c in model.__table__.columns if c.name != "id"}
+                    for obj in model.query.filter_by(prop_id=src.id)]
+            for model in CONTENT_MODELS
+        }
+        for start in range(1, size, 500):
+            ids = range(src.id + start, src.id + min(start + 500, size))
+            db.session.execute(db.insert(Property), [
+                dict(prop_row, id=pid, slug=f"{src.slug}-{pid}", name=f"{src.name} #{pid}") for pid in ids])
+            for model, rows in children.items():
+                if rows:
+                    db.session.execute(db.insert(model), [dict(r, prop_id=pid) for pid in ids for r in rows])
+            db.session.commit()
+        rnd = random.Random(1)
+        today, now = datetime.utcnow().date(), datetime.utcnow()
+        pids = [pid for (pid,) in db.session.query(Property.id)]
+        for start in range(0, len(pids), 500):
+            batch = pids[start:start + 500]
+            db.session.execute(db.insert(Message), [
+                {"property_id": pid, "name": "Guest", "contact": "guest@example.com", "category": "General",
+                 "body": "Synthetic benchmark message.", "created_at": now - timedelta(hours=i)}
+                for pid in batch for i in range(MESSAGES_PER_PROPERTY)])
+            db.session.execute(db.insert(ViewRollupDaily), [
+                {"property_id": pid, "section": "welcome", "day": today - timedelta(days=d), "count": rnd.randint(1, 50)}
+                for pid in batch for d in range(ROLLUP_DAYS)])
+        db.session.commit()
+        inbox.recount()
+
+
+def dataset_env(data_dir, size, extra=None):
+    work = os.path.join(data_dir, f"props-{size}")
+    os.makedirs(work, exist_ok=True)
+    return dict(os.environ,
+                DATABASE_URL=f"sqlite:///{os.path.join(work, 'bench.db')}",
+                DB_INIT_MODE="off",
+                PAGE_CACHE_DIR=os.path.join(work, "page_cache"),
+                QR_CACHE_DIR=os.path.join(work, "qr_cache"),
+                IMAGE_CACHE_DIR=os.path.join(work, "image_cache"),
+                IMAGE_PROXY_ENABLED="0",
+                **(extra or {}))
+
+
+def targets(app, rnd, n):
+    """{route: [(method, path, form), ...]} with properties sampled at random."""
+    from models import db, Property, HowTo
+    with app.app_context():
+        slugs = dict(db.session.query(Property.id, Property.slug))
+        howtos = {}
+        for hid, pid in db.session.query(HowTo.id, HowTo.prop_id):
+            howtos.setdefault(pid, []).append(hid)
+    pids, with_howtos = sorted(slugs), sorted(howtos)
+    pick = lambda: rnd.choice(pids)
+    plans = {"property_home": lambda: ("GET", f"/p/{slugs[pick()]}", None)}
+    for section in SECTIONS:
+        plans[f"section:{section}"] = lambda s=section: ("GET", f"/p/{slugs[pick()]}/{s}", None)
+
+    def howto():
+        pid = rnd.choice(with_howtos)
+        return "GET", f"/p/{slugs[pid]}/howto/{rnd.choice(howtos[pid])}", None
+    plans["howto_detail"] = howto
+    plans["qr.png"] = lambda: ("GET", f"/p/{slugs[pick()]}/qr.png", None)
+    plans["create_message"] = lambda: ("POST", f"/p/{slugs[pick()]}/message",
+                                       {"name": "Bench", "contact": "bench@example.com",
+                                        "category": "General", "body": "Benchmark message"})
+    plans["admin_dashboard"] = lambda: ("GET", "/admin", None)
+    return {route: [plan() for _ in range(n)] for route, plan in plans.items()}
+
+
+def summarize(latencies, wall=None, queries=None):
+    q = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    out = {"n": len(latencies),
+           "p50_ms": round(q[49] * 1000, 3), "p95_ms": round(q[94] * 1000, 3), "p99_ms": round(q[98] * 1000, 3),
+           "rps": round(len(latencies) / (wall or sum(latencies)), 1)}
+    if queries is not None:
+        out["queries"] = round(statistics.mean(queries), 2)
+        out["max_queries"] = max(queries)  # the cache-miss path; stable across runs
+    return out
+
+
+# ---- WSGI test client ----
+def run_client(size, args):
+    # Runs in its own interpreter (see main) so each dataset gets a fresh app.
+    sys.path.insert(0, ROOT)
+    from sqlalchemy import event
+    from app import create_app
+    from models import db
+    app = create_app()
+    if not os.path.exists(app.config["SQLALCHEMY_DATABASE_URI"].removeprefix("sqlite:///")):
+        t0 = time.perf_counter()
+        build_dataset(app, size)
+        print(f"built {size} properties in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    app.extensions["db_ready"] = True
+
+    main_thread = threading.get_ident()
+    counter = [0]
+    def _count(*_):
+        if threading.get_ident() == main_thread:  # not the view-buffer flush thread
+            counter[0] += 1
+    with app.app_context():
+        for engine in db.engines.values():  # content and telemetry binds
+            event.listen(engine, "before_cursor_execute", _count)
+
+    guest = app.test_client()
+    poster = app.test_client()  # flashed "thanks" messages would make guest renders uncacheable
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s["authed"] = True
+    client_for = {"create_message": poster, "admin_dashboard": admin}
+
+    results = {}
+    plans = targets(app, random.Random(args.seed), args.warmup + args.requests)
+    for route, reqs in plans.items():
+        client = client_for.get(route, guest)
+        latencies, queries = [], []
+        for i, (method, path, form) in enumerate(reqs):
+            before = counter[0]
+            t0 = time.perf_counter()
+            resp = client.open(path, method=method, data=form)
+            elapsed = time.perf_counter() - t0
+            if resp.status_code >= 400:
+                raise SystemExit(f"{route}: {method} {path} -> {resp.status_code}")
+            if i >= args.warmup:
+                latencies.append(elapsed)
+                queries.append(counter[0] - before)
+        results[route] = summarize(latencies, queries=queries)
+    app.extensions["view_buffer"].close()
+    return results
+
+
+# ---- gunicorn ----
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(port, proc, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit("gunicorn exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit("gunicorn did not start")
+
+
+def http_request(port, method, path, form=None, cookie=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    headers = {"Cookie": cookie} if cookie else {}
+    body = None
+    if form is not None:
+        body = urlencode(form)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    t0 = time.perf_counter()
+    conn.request(method, path, body=body, headers=headers)
+    resp = conn.getresponse()
+    resp.read()
+    elapsed = time.perf_counter() - t0
+    conn.close()
+    return resp, elapsed
+
+
+def run_gunicorn(size, env, args):
+    port = free_port()
+    env = dict(env, GUNICORN_BIND=f"127.0.0.1:{port}", GUNICORN_WORKERS=str(args.workers))
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for(port, proc)
+        resp, _ = http_request(port, "POST", "/admin/login", {"password": env.get("ADMIN_PASSWORD", "admin")})
+        cookie = resp.getheader("Set-Cookie", "").split(";")[0]
+        sys.path.insert(0, ROOT)
+        os.environ.update(env)
+        from app import create_app
+        app = create_app()
+        app.extensions["db_ready"] = True
+        plans = targets(app, random.Random(args.seed), args.warmup + args.requests)
+        results = {}
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            for route, reqs in plans.items():
+                send = lambda r: http_request(port, r[0], r[1], r[2], cookie if route == "admin_dashboard" else None)
+                list(pool.map(send, reqs[:args.warmup]))
+                t0 = time.perf_counter()
+                done = list(pool.map(send, reqs[args.warmup:]))
+                wall = time.perf_counter() - t0
+                bad = [resp.status for resp, _ in done if resp.status >= 400]
+                if bad:
+                    raise SystemExit(f"{route}: HTTP {bad[0]} under gunicorn")
+                results[route] = summarize([elapsed for _, elapsed in done], wall=wall)
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+# ---- Baseline ----
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Print every measurement next to its baseline; return the keys that regressed."""
+    regressed = []
+    print(f"{'run':<44}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'queries':>9}{'max q':>7}{'p95 vs base':>13}")
+    for key, r in sorted(results.items()):
+        base = baseline.get(key)
+        delta = ""
+        if base:
+            change = r["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0
+            delta = f"{change:+.0%}"
+            slower = change > tolerance and r["p95_ms"] - base["p95_ms"] > min_delta_ms
+            if slower or r.get("max_queries", 0) > base.get("max_queries", float("inf")):
+                regressed.append(key)
+                delta += " !"
+        queries = f"{r['queries']:.1f}" if "queries" in r else "-"
+        max_queries = str(r.get("max_queries", "-"))
+        print(f"{key:<44}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['rps']:>9.0f}"
+              f"{queries:>9}{max_queries:>7}{delta:>13}")
+    return regressed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", default="1,100,10000", help="Comma-separated property counts.")
+    ap.add_argument("--requests", type=int, default=200, help="Measured requests per route.")
+    ap.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per route first.")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--data-dir", help="Keep datasets here and reuse them across runs.")
+    ap.add_argument("--gunicorn", action="store_true", help="Also load-test a local gunicorn.")
+    ap.add_argument("--workers", type=int, default=2)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--tolerance", type=float, default=0.25,
+                    help="Fail when p95 is this much slower than baseline (or queries went up).")
+    ap.add_argument("--min-delta-ms", type=float, default=1.0,
+                    help="Ignore p95 changes smaller than this (timer noise on sub-ms routes).")
+    ap.add_argument("--save-baseline", action="store_true")
+    ap.add_argument("--one-size", type=int, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.one_size is not None:
+        print(json.dumps(run_client(args.one_size, args)))
+        return
+
+    data_dir = args.data_dir or tempfile.mkdtemp()
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        env = dict(dataset_env(data_dir, size), VIEW_FLUSH_INTERVAL="0.5")
+        cmd = [sys.executable, os.path.abspath(__file__), "--one-size", str(size), "--seed", str(args.seed),
+               "--requests", str(args.requests), "--warmup", str(args.warmup)]
+        out = subprocess.run(cmd, cwd=ROOT, env=env, stdout=subprocess.PIPE, text=True, check=True)
+        for route, r in json.loads(out.stdout.strip().splitlines()[-1]).items():
+            results[f"client/{size}/{route}"] = r
+        if args.gunicorn:
+            for route, r in run_gunicorn(size, env, args).items():
+                results[f"gunicorn/{size}/{route}"] = r
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressed = compare(results, baseline, args.tolerance, args.min_delta_ms)
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(dict(baseline, **results), f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {args.baseline}")
+    elif regressed:
+        print(f"{len(regressed)} regression(s) against {args.baseline}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
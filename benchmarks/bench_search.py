@@ -0,0 +1,85 @@
+"""Search latency for properties with thousands of entries.
+
+Seeds one property with N FAQs, how-tos, rules, issue flows and local places
+(synthetic text), then times typical as-you-type and full-word queries on
+each available backend (SQLite FTS5 and the in-process inverted index).
+
+    python benchmarks/bench_search.py --entries 5000
+"""
+import os, sys, time, random, argparse, tempfile, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = ("wifi router password heater boiler radiator kettle oven fridge freezer towel "
+         "linen bins recycling keys lockbox door window balcony shower boiler hairdryer "
+         "ironing laundry washer dryer parking bus tube station cafe bakery pharmacy market "
+         "checkout checkin luggage storage noise neighbours smoking pets lift stairs fuse").split()
+QUERIES = ["wi", "wifi", "wifi pass", "heat", "boiler radiator", "luggage storage", "pharm", "xyzzy"]
+
+
+def sentence(rnd, n):
+    return " ".join(rnd.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def seed(entries):
+    from models import db, Property, FAQ, HowTo, Rule, IssueFlow, LocalPlace
+    rnd = random.Random(7)
+    p = Property(slug="bench", name="Bench Apartment", wifi_ssid="BenchNet", wifi_password="secret")
+    db.session.add(p); db.session.flush()
+    per = max(entries // 5, 1)
+    rows = []
+    for i in range(per):
+        rows += [
+            FAQ(q=sentence(rnd, 6) + "?", a=sentence(rnd, 40), related=sentence(rnd, 3), prop_id=p.id),
+            HowTo(area="Kitchen", appliance=sentence(rnd, 2), how=sentence(rnd, 60), issues=sentence(rnd, 20), prop_id=p.id),
+            Rule(title=sentence(rnd, 4), description=sentence(rnd, 30), prop_id=p.id),
+            IssueFlow(category=sentence(rnd, 2), try_first=sentence(rnd, 30), prop_id=p.id),
+            LocalPlace(category="Food", name=sentence(rnd, 3), blurb=sentence(rnd, 25), prop_id=p.id),
+        ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return p.id
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--entries", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'search.db')}",
+                      DB_INIT_MODE="off", VIEW_BUFFER_ENABLED="0")
+    from app import create_app
+    import bootstrap, search
+
+    backends = ["memory"] + (["fts5"] if search.fts5_available() else [])
+    pid = None
+    print(f"{'backend':<8}{'build ms':>10}  " + "".join(f"{q!r:>18}" for q in QUERIES))
+    for name in backends:
+        app = create_app()
+        app.config["SEARCH_BACKEND"] = name
+        with app.app_context():
+            if pid is None:
+                bootstrap.init_db(app, with_seed=False)
+                pid = seed(args.entries)
+            index = app.extensions["search"]
+            t0 = time.perf_counter()
+            index.rebuild()
+            index.search(pid, "warmup")
+            build = (time.perf_counter() - t0) * 1000
+            cells = []
+            for q in QUERIES:
+                samples = []
+                for _ in range(args.repeat):
+                    t0 = time.perf_counter()
+                    index.search(pid, q)
+                    samples.append(time.perf_counter() - t0)
+                cells.append(f"{statistics.median(samples) * 1000:>13.2f} ms")
+        print(f"{name:<8}{build:>10.1f}  " + "".join(f"{c:>18}" for c in cells))
+    print(f"({args.entries:,} entries; median of {args.repeat} runs per query)")
+
+
+if __name__ == "__main__":
+    main()
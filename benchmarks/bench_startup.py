@@ -0,0 +1,63 @@
+"""Import-to-first-request latency, checked against a startup budget.
+
+Each run is a fresh interpreter: it imports app.py (create_app() runs at
+import) and serves one guest page through the WSGI test client. The
+database is initialised once up front, as `flask init-db` would at deploy.
+
+    python benchmarks/bench_startup.py --runs 10 --budget-ms 1000
+"""
+import os, sys, json, argparse, tempfile, subprocess, statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import time, json
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+client = app_module.app.test_client()
+resp = client.get("/p/vibe-modern-rustic-apartment")
+t2 = time.perf_counter()
+assert resp.status_code == 200, resp.status_code
+print(json.dumps({"import": t1 - t0, "first_request": t2 - t1}))
+"""
+
+
+def run(env):
+    out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--budget-ms", type=float, default=1000.0,
+                    help="Fail if median import + first request exceeds this.")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    env = dict(os.environ,
+               DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+               VIEW_BUFFER_ENABLED="0",
+               PAGE_CACHE_DIR=os.path.join(tmp, "page_cache"),
+               QR_CACHE_DIR=os.path.join(tmp, "qr_cache"),
+               IMAGE_CACHE_DIR=os.path.join(tmp, "image_cache"))
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"],
+                   cwd=ROOT, env=env, check=True, capture_output=True)
+
+    failed = False
+    print(f"{'mode':<8}{'import ms':>12}{'1st req ms':>12}{'total ms':>12}")
+    for mode in ("off", "lazy"):
+        samples = [run(dict(env, DB_INIT_MODE=mode)) for _ in range(args.runs)]
+        imp = statistics.median(s["import"] for s in samples) * 1000
+        req = statistics.median(s["first_request"] for s in samples) * 1000
+        total = imp + req
+        failed |= total > args.budget_ms
+        print(f"{mode:<8}{imp:>12.1f}{req:>12.1f}{total:>12.1f}")
+    print(f"budget {args.budget_ms:.0f} ms: {'EXCEEDED' if failed else 'ok'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
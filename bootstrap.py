@@ -0,0 +1,33 @@
+import threading
+from flask import request
+from models import db, seed
+
+
+def init_db(app, with_seed=True):
+    with app.app_context():
+        db.create_all()
+        if "search" in app.extensions:
+            # Here rather than in a guest's first search.
+            app.extensions["search"].ensure_built()
+        if with_seed:
+            seed(db)
+    app.extensions["db_ready"] = True
+
+
+def init_app(app):
+    # DB_INIT_MODE=lazy creates tables and seed data on the first request a
+    # process serves (once per process, or once in the gunicorn master with
+    # --preload); DB_INIT_MODE=off leaves it to `flask init-db`.
+    app.config.setdefault("DB_INIT_MODE", "lazy")
+    app.extensions.setdefault("db_ready", False)
+    if app.config["DB_INIT_MODE"] != "lazy":
+        return
+    lock = threading.Lock()
+
+    @app.before_request
+    def _lazy_init_db():
+        if app.extensions["db_ready"] or request.endpoint == "static":
+            return
+        with lock:
+            if not app.extensions["db_ready"]:
+                init_db(app)
@@ -0,0 +1,197 @@
+import re, json
+from datetime import datetime
+from models import (db, Property, Contact, Rule, HowTo, IssueFlow, Emergency,
+                    LocalPlace, CheckinStep, CheckoutStep, FAQ)
+
+# A bundle is one document describing whole manuals:
+#   {"format": "guest-manual", "version": 1,
+#    "properties": [{"slug": ..., "name": ..., ..., "faqs": [{"q": ..., "a": ...}], ...}]}
+FORMAT, VERSION = "guest-manual", 1
+CHILDREN = {
+    "contacts": Contact, "rules": Rule, "howtos": HowTo, "issues": IssueFlow,
+    "emergencies": Emergency, "locals": LocalPlace, "checkin_steps": CheckinStep,
+    "checkout_steps": CheckoutStep, "faqs": FAQ,
+}
+INTERNAL = {"id", "prop_id", "content_version", "updated_at"}
+FORMATS = {"json": "application/json", "yaml": "application/yaml"}
+SLUG_RE = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+class BundleError(ValueError):
+    def __init__(self, errors):
+        self.errors = errors if isinstance(errors, list) else [errors]
+        super().__init__("; ".join(self.errors[:10]) + (f" (+{len(self.errors) - 10} more)" if len(self.errors) > 10 else ""))
+
+
+def _columns(model):
+    return {c.name: c for c in model.__table__.columns if c.name not in INTERNAL}
+
+
+PROPERTY_FIELDS = _columns(Property)
+CHILD_FIELDS = {key: _columns(model) for key, model in CHILDREN.items()}
+
+
+# ---- Export ----
+def export(props):
+    """Bundle for `props`: one query per child table, whatever the number of properties."""
+    ids = [p.id for p in props]
+    rows = {key: {} for key in CHILDREN}
+    for key, model in CHILDREN.items():
+        for obj in model.query.filter(model.prop_id.in_(ids)).order_by(model.prop_id, model.id):
+            rows[key].setdefault(obj.prop_id, []).append(
+                {name: getattr(obj, name) for name in CHILD_FIELDS[key]})
+    out = []
+    for p in props:
+        item = {name: getattr(p, name) for name in PROPERTY_FIELDS}
+        for key in CHILDREN:
+            item[key] = rows[key].get(p.id, [])
+        out.append(item)
+    return {"format": FORMAT, "version": VERSION, "properties": out}
+
+
+def dumps(doc, fmt="json"):
+    if fmt == "yaml":
+        return _yaml().safe_dump(doc, allow_unicode=True, sort_keys=False)
+    return json.dumps(doc, ensure_ascii=False, indent=2)
+
+
+def loads(text, fmt=None):
+    if fmt is None:
+        fmt = "json" if text.lstrip().startswith(("{", "[")) else "yaml"
+    try:
+        return _yaml().safe_load(text) if fmt == "yaml" else json.loads(text)
+    except ValueError as e:
+        raise BundleError(f"Unreadable {fmt.upper()}: {e}")
+    except Exception as e:
+        if type(e).__module__.startswith("yaml"):
+            raise BundleError(f"Unreadable YAML: {e}")
+        raise
+
+
+def _yaml():
+    # Imported on first use to keep it out of worker boot. A deploy that skipped
+    # requirements.txt gets a readable 400 rather than a 500.
+    try:
+        import yaml
+    except ImportError:
+        raise BundleError("YAML bundles need PyYAML (pip install pyyaml); use JSON instead")
+    return yaml
+
+
+# ---- Validation ----
+def _check_row(where, data, fields, errors):
+    if not isinstance(data, dict):
+        errors.append(f"{where}: expected an object")
+        return {}
+    row = {}
+    for name, value in data.items():
+        col = fields.get(name)
+        if col is None:
+            errors.append(f"{where}: unknown field {name!r}")
+            continue
+        if value is None:
+            row[name] = None
+        elif col.type.python_type is int:
+            if isinstance(value, bool) or not isinstance(value, (int, str)) or not str(value).strip().lstrip("-").isdigit():
+                errors.append(f"{where}.{name}: expected an integer")
+                continue
+            row[name] = int(value)
+        else:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                value = str(value)  # e.g. YAML reads 15:00 or a bare phone number as a number
+            if not isinstance(value, str):
+                errors.append(f"{where}.{name}: expected text")
+                continue
+            length = getattr(col.type, "length", None)
+            if length and len(value) > length:
+                errors.append(f"{where}.{name}: longer than {length} characters")
+                continue
+            row[name] = value
+    return row
+
+
+def validate(doc):
+    """Return [(property_row, {child_key: [rows]})] or raise BundleError listing every problem."""
+    if isinstance(doc, list):
+        doc = {"format": FORMAT, "version": VERSION, "properties": doc}
+    if not isinstance(doc, dict) or not isinstance(doc.get("properties"), list):
+        raise BundleError("Expected an object with a \"properties\" list")
+    if doc.get("format", FORMAT) != FORMAT or doc.get("version", VERSION) != VERSION:
+        raise BundleError(f"Unsupported bundle {doc.get('format')!r} version {doc.get('version')!r}")
+    errors, out, seen = [], [], set()
+    for i, item in enumerate(doc["properties"]):
+        where = f"properties[{i}]"
+        if not isinstance(item, dict):
+            errors.append(f"{where}: expected an object")
+            continue
+        children = {}
+        for key in CHILDREN:
+            rows = item.get(key) or []
+            if not isinstance(rows, list):
+                errors.append(f"{where}.{key}: expected a list")
+                continue
+            children[key] = [_check_row(f"{where}.{key}[{j}]", r, CHILD_FIELDS[key], errors) for j, r in enumerate(rows)]
+        prop = _check_row(where, {k: v for k, v in item.items() if k not in CHILDREN}, PROPERTY_FIELDS, errors)
+        slug = (prop.get("slug") or "").strip()
+        if not SLUG_RE.match(slug):
+            errors.append(f"{where}.slug: use lowercase letters, digits and hyphens")
+        elif slug in seen:
+            errors.append(f"{where}.slug: {slug!r} appears twice in the bundle")
+        seen.add(slug)
+        if not (prop.get("name") or "").strip():
+            errors.append(f"{where}.name: required")
+        prop["slug"] = slug
+        out.append((prop, children))
+    if errors:
+        raise BundleError(errors)
+    return out
+
+
+# ---- Import ----
+def import_bundle(doc, replace=False):
+    """Validate `doc` and write it with bulk statements in the current transaction.
+
+    Existing slugs are an error unless `replace`, which overwrites that
+    property's fields and content. Bulk statements skip the ORM flush hooks,
+    so content_version/updated_at are set here; the caller commits and
+    refreshes caches/search. Returns [(property_id, slug)].
+    """
+    items = validate(doc)
+    slugs = [prop["slug"] for prop, _ in items]
+    existing = dict(db.session.query(Property.slug, Property.id).filter(Property.slug.in_(slugs)))
+    if existing and not replace:
+        raise BundleError([f"Property {s!r} already exists" for s in slugs if s in existing])
+    now = datetime.utcnow()
+
+    replaced = list(existing.values())
+    for prop, _ in items:
+        if prop["slug"] in existing:
+            fields = {name: prop.get(name) for name in PROPERTY_FIELDS if name != "slug"}
+            db.session.execute(db.update(Property).where(Property.id == existing[prop["slug"]]).values(
+                **fields, content_version=Property.content_version + 1, updated_at=now))
+    new = [dict({name: prop.get(name) for name in PROPERTY_FIELDS}, updated_at=now)
+           for prop, _ in items if prop["slug"] not in existing]
+    if new:
+        for row in db.session.execute(db.insert(Property).returning(Property.id, Property.slug), new):
+            existing[row.slug] = row.id
+    if replaced:
+        for model in CHILDREN.values():
+            db.session.execute(db.delete(model).where(model.prop_id.in_(replaced)))
+
+    for key, model in CHILDREN.items():
+        fields = CHILD_FIELDS[key]
+        rows = [dict({name: r.get(name) for name in fields}, prop_id=existing[prop["slug"]])
+                for prop, children in items for r in children.get(key, [])]
+        if rows:
+            db.session.execute(db.insert(model), rows)
+    db.session.expire_all()
+    return [(existing[s], s) for s in slugs]
+
+
+def clone(src, slugs, name=None):
+    """Copy `src` (a Property) and all its content to each new slug. Returns [(property_id, slug)]."""
+    item = export([src])["properties"][0]
+    copies = []
+    for i, slug in enumerate(slugs, 1):
+        copies.append(dict(item, slug=slug, name=(name or item["name"]).replace("{n}", str(i))))
+    return import_bundle({"format": FORMAT, "version": VERSION, "properties": copies})
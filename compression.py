@@ -0,0 +1,105 @@
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional: gzip alone covers every browser
+    brotli = None
+
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)  # order of preference
+COMPRESSIBLE_TYPES = {
+    "text/html", "text/plain", "text/css", "text/csv", "text/javascript", "application/javascript",
+    "application/json", "application/x-ndjson", "application/yaml", "application/xml", "image/svg+xml",
+}
+
+
+def negotiate(available=ENCODINGS):
+    """Best of `available` encodings the request accepts, or None for identity."""
+    accept = request.accept_encodings
+    return next((enc for enc in ("br", "gzip") if enc in available and accept[enc] > 0), None)
+
+
+def exempt(view):
+    """Never compress this view's responses (e.g. images, already compressed)."""
+    view.compress_exempt = True
+    return view
+
+
+class Compression:
+    # Compresses HTML/JSON/text responses on the way out, gzip or brotli per
+    # Accept-Encoding, once the body reaches COMPRESS_MIN_SIZE bytes. Streamed
+    # responses (exports) are compressed as they go. Files from send_file, bodies
+    # that already carry a Content-Encoding (precompressed static assets, page
+    # cache hits) and views marked @exempt pass through untouched.
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ENABLED", True)
+        app.config.setdefault("COMPRESS_MIN_SIZE", 500)
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BROTLI_QUALITY", 5)
+        self.app = app
+        app.extensions["compression"] = self
+        if app.config["COMPRESS_ENABLED"]:
+            app.after_request(self._after_request)
+
+    def encoding(self, mimetype="text/html"):
+        """The encoding this request's `mimetype` body would get, or None."""
+        if not self.app.config["COMPRESS_ENABLED"] or mimetype not in COMPRESSIBLE_TYPES:
+            return None
+        return negotiate()
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            c = brotli.Compressor(quality=self.app.config["COMPRESS_BROTLI_QUALITY"])
+            return c.process, c.finish
+        c = zlib.compressobj(self.app.config["COMPRESS_GZIP_LEVEL"], zlib.DEFLATED, 31)  # 31 = gzip container
+        return c.compress, c.flush
+
+    def compress(self, data, encoding):
+        feed, finish = self._compressor(encoding)
+        return feed(data) + finish()
+
+    def stream(self, chunks, encoding):
+        feed, finish = self._compressor(encoding)
+        try:
+            for chunk in chunks:
+                out = feed(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                if out:
+                    yield out
+            yield finish()
+        finally:
+            # Closing the source ends stream_with_context's request context.
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    def _after_request(self, resp):
+        if resp.mimetype not in COMPRESSIBLE_TYPES:
+            return resp
+        resp.vary.add("Accept-Encoding")
+        view = self.app.view_functions.get(request.endpoint)
+        if (resp.content_encoding or resp.direct_passthrough or resp.status_code in (204, 206, 304)
+                or "no-transform" in resp.headers.get("Cache-Control", "")
+                or getattr(view, "compress_exempt", False)):
+            return resp
+        encoding = negotiate()
+        if encoding is None:
+            return resp
+        if resp.is_streamed:
+            resp.response = self.stream(resp.response, encoding)
+            resp.headers.pop("Content-Length", None)
+        else:
+            data = resp.get_data()
+            if len(data) < self.app.config["COMPRESS_MIN_SIZE"]:
+                return resp
+            resp.set_data(self.compress(data, encoding))
+        resp.content_encoding = encoding
+        # A compressed body is a different representation of the same content, so
+        # it gets its own validator ("<etag>-gzip"), as static_assets does.
+        tag, weak = resp.get_etag()
+        if tag:
+            resp.set_etag(f"{tag}-{encoding}", weak=weak)
+        return resp
@@ -0,0 +1,116 @@
+import io, csv, json, zlib
+from datetime import datetime, date
+from sqlalchemy import func
+from models import db, Property, PageView, Message, UserAgent
+
+# kind -> (model, exported columns, extra filter column)
+EXPORTS = {
+    "views": (PageView, ("id", "property_id", "section", "user_agent", "is_bot", "ip", "created_at"), "section"),
+    "messages": (Message, ("id", "property_id", "name", "contact", "category", "status", "body", "created_at"), "category"),
+}
+# Columns that are not plain attributes of the model
+EXPRESSIONS = {
+    ("views", "user_agent"): func.coalesce(UserAgent.ua, PageView.user_agent).label("user_agent"),
+}
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class ExportError(ValueError):
+    pass
+
+
+def parse_date(value):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ExportError(f"Bad date: {value!r} (use YYYY-MM-DD or ISO 8601)")
+
+
+def resolve_property(value):
+    if not value:
+        return None
+    q = db.session.query(Property.id)
+    pid = (q.filter_by(id=int(value)) if value.isdigit() else q.filter_by(slug=value)).scalar()
+    if pid is None:
+        raise ExportError(f"Unknown property: {value!r}")
+    return pid
+
+
+def iter_rows(kind, property_id=None, match=None, since=None, until=None, batch_size=1000):
+    """Yield export rows as tuples, fetched `batch_size` at a time from a server-side cursor."""
+    model, columns, match_col = EXPORTS[kind]
+    stmt = db.select(*(EXPRESSIONS.get((kind, c), getattr(model, c)) for c in columns)).order_by(model.id)
+    if model is PageView:
+        stmt = stmt.outerjoin(UserAgent, UserAgent.id == PageView.user_agent_id)
+    if property_id is not None:
+        stmt = stmt.where(model.property_id == property_id)
+    if match:
+        stmt = stmt.where(getattr(model, match_col) == match)
+    if since is not None:
+        stmt = stmt.where(model.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(model.created_at < until)
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        for row in partition:
+            yield tuple(row)
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, (datetime, date)) else value
+
+
+def _csv_cell(value):
+    # Guests write message text; a leading = + - @ would run as a formula when
+    # the export is opened in a spreadsheet.
+    value = _jsonable(value)
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def csv_chunks(columns, rows, rows_per_chunk=500):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for n, row in enumerate(rows, 1):
+        writer.writerow(_csv_cell(v) for v in row)
+        if n % rows_per_chunk == 0:
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+
+def ndjson_chunks(columns, rows, rows_per_chunk=500):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps({c: _jsonable(v) for c, v in zip(columns, row)}, ensure_ascii=False))
+        if len(lines) == rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def gzip_chunks(chunks):
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = z.compress(chunk.encode("utf-8"))
+        if out:
+            yield out
+    yield z.flush()
+
+
+def stream(kind, fmt, gzip=False, **filters):
+    """Return a generator of encoded chunks for `kind` in `fmt`."""
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export: {kind!r}")
+    if fmt not in FORMATS:
+        raise ExportError(f"Unknown format: {fmt!r}")
+    columns = EXPORTS[kind][1]
+    rows = iter_rows(kind, **filters)
+    chunks = (csv_chunks if fmt == "csv" else ndjson_chunks)(columns, rows)
+    return gzip_chunks(chunks) if gzip else (c.encode("utf-8") for c in chunks)
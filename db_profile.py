@@ -0,0 +1,144 @@
+from flask import request
+from sqlalchemy import event, create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from models import db, TELEMETRY, TELEMETRY_MODELS, UserAgent
+
+# SQLALCHEMY_ENGINE_OPTIONS presets for PostgreSQL, picked with DB_POOL_PROFILE.
+# Each gunicorn worker gets its own pool, so the server sees up to
+# workers x (pool_size + max_overflow) connections; size presets for that.
+POOL_PROFILES = {
+    # A few sync workers against a dedicated server.
+    "default": {"pool_size": 5, "max_overflow": 5, "pool_timeout": 10, "pool_recycle": 1800, "pool_pre_ping": True},
+    # Many workers / a small managed plan with a low max_connections.
+    "small": {"pool_size": 2, "max_overflow": 2, "pool_timeout": 10, "pool_recycle": 900, "pool_pre_ping": True},
+    # Threaded workers (gunicorn --threads) that each need a connection.
+    "large": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 30, "pool_recycle": 1800, "pool_pre_ping": True},
+    # Behind PgBouncer in transaction mode, which does the pooling itself.
+    "pgbouncer": {"poolclass": NullPool},
+}
+
+# Per-connection SQLite settings: WAL lets readers proceed while a worker
+# writes, busy_timeout makes writers queue for the lock instead of failing
+# with "database is locked", and synchronous=NORMAL is durable under WAL
+# (only a power cut can lose the last commits, never corrupt the file).
+SQLITE_PRAGMAS = {
+    "journal_mode": "SQLITE_JOURNAL_MODE",
+    "synchronous": "SQLITE_SYNCHRONOUS",
+    "busy_timeout": "SQLITE_BUSY_TIMEOUT_MS",
+    "cache_size": "SQLITE_CACHE_SIZE",
+    "mmap_size": "SQLITE_MMAP_SIZE",
+}
+
+
+def configure(app):
+    """Fill in SQLALCHEMY_ENGINE_OPTIONS for the configured database; call before db.init_app."""
+    app.config.setdefault("DB_POOL_PROFILE", "default")
+    app.config.setdefault("SQLITE_TUNING", True)
+    app.config.setdefault("SQLITE_JOURNAL_MODE", "wal")
+    app.config.setdefault("SQLITE_SYNCHRONOUS", "normal")
+    app.config.setdefault("SQLITE_BUSY_TIMEOUT_MS", 5000)
+    app.config.setdefault("SQLITE_CACHE_SIZE", -16000)  # negative = KiB, so ~16 MB per connection
+    app.config.setdefault("SQLITE_MMAP_SIZE", 128 * 1024 * 1024)
+    app.config.setdefault("CONTENT_REPLICA_URL", "")
+    profile = app.config["DB_POOL_PROFILE"]
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Unknown DB_POOL_PROFILE {profile!r}; choose from {', '.join(POOL_PROFILES)}")
+    if _is_postgres(app.config["SQLALCHEMY_DATABASE_URI"]):
+        options = dict(POOL_PROFILES[profile])
+        options.update(app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})  # explicit settings win
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+    # SQLALCHEMY_ENGINE_OPTIONS only covers the default bind
+    binds = app.config.get("SQLALCHEMY_BINDS") or {}
+    for key, value in binds.items():
+        if isinstance(value, str) and _is_postgres(value):
+            binds[key] = dict(POOL_PROFILES[profile], url=value)
+
+
+def _is_postgres(url):
+    return make_url(url).get_backend_name() == "postgresql"
+
+
+def init_app(app):
+    # Engines exist once db.init_app has run; covers every bind.
+    if app.config["SQLITE_TUNING"]:
+        pragmas = {name: app.config[key] for name, key in SQLITE_PRAGMAS.items() if app.config[key] is not None}
+        with app.app_context():
+            engines = list(db.engines.values())
+        for engine in engines:
+            if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+                event.listen(engine, "connect", _sqlite_connect(pragmas))
+    if app.config["CONTENT_REPLICA_URL"]:
+        init_replica(app)
+
+
+# ---- Read replica (CONTENT_REPLICA_URL) ----
+def init_replica(app):
+    url = app.config["CONTENT_REPLICA_URL"]
+    options = dict(POOL_PROFILES[app.config["DB_POOL_PROFILE"]]) if _is_postgres(url) else {}
+    replica = create_engine(url, **options)
+    app.extensions["replica"] = replica
+    if not event.contains(Session, "after_flush", _mark_written):
+        event.listen(Session, "after_flush", _mark_written)
+
+    @app.before_request
+    def _use_replica():
+        # Guest page GETs only. Admin screens read their own writes, so they
+        # never see replication lag.
+        if request.method in ("GET", "HEAD") and not (request.endpoint or "").startswith("admin"):
+            db.session.info["replica"] = replica
+
+
+def _mark_written(session, flush_context):
+    session.info["wrote"] = True
+
+
+def use_primary():
+    """Send the rest of this request's reads to the primary (e.g. the replica is behind)."""
+    db.session.info.pop("replica", None)
+
+
+def _sqlite_connect(pragmas):
+    def on_connect(dbapi_conn, connection_record):
+        cur = dbapi_conn.cursor()
+        try:
+            for name, value in pragmas.items():
+                cur.execute(f"PRAGMA {name}={value}")
+        finally:
+            cur.close()
+    return on_connect
+
+
+def copy_telemetry(source_url, batch_size=5000):
+    """Copy telemetry rows from the old shared database at `source_url` into the
+    telemetry bind, which must be empty. Returns {table: rows}."""
+    source = create_engine(source_url)
+    copied = {}
+    with source.connect() as src, db.engines[TELEMETRY].begin() as dst:
+        for model in (UserAgent,) + TELEMETRY_MODELS:
+            table = model.__table__
+            if dst.execute(db.select(db.func.count()).select_from(table)).scalar():
+                raise ValueError(f"{table.name} already has rows in the telemetry database")
+            columns = [c for c in table.columns if c.name in
+                       {col["name"] for col in inspect(source).get_columns(table.name)}]
+            result = src.execution_options(yield_per=batch_size).execute(
+                db.select(*columns).order_by(table.c.id))
+            copied[table.name] = 0
+            for rows in result.partitions():
+                dst.execute(table.insert(), [row._asdict() for row in rows])
+                copied[table.name] += len(rows)
+    source.dispose()
+    return copied
+
+
+def describe(engine):
+    """Effective settings of `engine`, for `flask db-profile`."""
+    info = {"dialect": engine.dialect.name, "pool": type(engine.pool).__name__}
+    if hasattr(engine.pool, "size"):
+        info["pool_size"] = engine.pool.size()
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            for name in SQLITE_PRAGMAS:
+                info[name] = conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return info
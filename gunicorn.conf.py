@@ -0,0 +1,44 @@
+import os, sys
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+# Import and initialise the app once in the master; forked workers share it copy-on-write.
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+
+
+def _app():
+    mod = sys.modules.get("app")
+    return getattr(mod, "app", None)
+
+
+def when_ready(server):
+    # With --preload the master runs the lazy DB init once, so workers don't
+    # all race to create tables on their first request.
+    app = _app()
+    if app is None or app.config.get("DB_INIT_MODE") != "lazy":
+        return
+    import bootstrap
+    from models import db
+    bootstrap.init_db(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared with workers.
+    app = _app()
+    if app is not None:
+        from models import db
+        with app.app_context():
+            for engine in db.engines.values():
+                engine.dispose(close=False)
+        if "replica" in app.extensions:
+            app.extensions["replica"].dispose(close=False)
+
+
+def worker_exit(server, worker):
+    # Drain buffered page views before the worker goes away.
+    app = _app()
+    if app is not None and "view_buffer" in app.extensions:
+        app.extensions["view_buffer"].close()
@@ -0,0 +1,104 @@
+import os, io, hashlib, urllib.request
+from PIL import Image, ImageOps
+from itsdangerous import URLSafeSerializer, BadSignature
+import storage
+
+# Responsive widths offered for hero and gallery images.
+VARIANTS = {"thumb": 320, "card": 640, "full": 1200}
+MIMETYPES = {"avif": "image/avif", "webp": "image/webp", "jpeg": "image/jpeg"}
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+def supported_formats():
+    Image.init()
+    return [fmt for fmt in ("avif", "webp") if fmt.upper() in Image.SAVE]
+
+
+class ImageStore:
+    # Origins are fetched once and stored by content hash; each resized
+    # variant is rendered once and kept next to them.
+    #   <root>/urls/<sha1(url)>          -> digest of the origin bytes
+    #   <root>/orig/<digest>             -> origin bytes
+    #   <root>/var/<digest>-<w>.<fmt>    -> resized variant
+
+    def __init__(self, root, secret, max_bytes=20 * 1024 * 1024, timeout=10):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.signer = URLSafeSerializer(secret, salt="image-proxy")
+        os.makedirs(root, exist_ok=True)
+
+    # ---- URL tokens ----
+    def token(self, url):
+        return self.signer.dumps(url)
+
+    def url_for_token(self, token):
+        try:
+            return self.signer.loads(token)
+        except BadSignature:
+            return None
+
+    # ---- Origins ----
+    def origin(self, url):
+        # Returns the content digest of the origin image, fetching it on first use.
+        pointer = os.path.join(self.root, "urls", hashlib.sha1(url.encode()).hexdigest())
+        try:
+            with open(pointer) as f:
+                return f.read().strip()
+        except OSError:
+            pass
+        data = self._fetch(url)
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.root, "orig", digest)
+        if not os.path.exists(path):
+            storage.atomic_write(path, data)
+        storage.atomic_write(pointer, digest.encode())
+        return digest
+
+    def _fetch(self, url):
+        if not url.startswith(("http://", "https://")):
+            raise ImageFetchError(f"Unsupported image URL: {url}")
+        req = urllib.request.Request(url, headers={"User-Agent": "GuestManual-ImageProxy/1.0"})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                if not resp.headers.get_content_type().startswith("image/"):
+                    raise ImageFetchError(f"Not an image: {url}")
+                data = resp.read(self.max_bytes + 1)
+        except OSError as e:
+            raise ImageFetchError(str(e)) from e
+        if len(data) > self.max_bytes:
+            raise ImageFetchError(f"Image too large: {url}")
+        return data
+
+    # ---- Variants ----
+    def variant(self, url, width, fmt):
+        # Returns (path, etag) for `url` resized to `width` in `fmt`.
+        digest = self.origin(url)
+        name = f"{digest[:32]}-{width}.{fmt}"
+        path = os.path.join(self.root, "var", name)
+        if not os.path.exists(path):
+            with open(os.path.join(self.root, "orig", digest), "rb") as f:
+                data = render_variant(f.read(), width, fmt)
+            storage.atomic_write(path, data)
+        return path, name
+
+
+def render_variant(data, width, fmt):
+    try:
+        img = Image.open(io.BytesIO(data))
+        img = ImageOps.exif_transpose(img)
+    except Exception as e:
+        raise ImageFetchError(f"Unreadable image: {e}") from e
+    if img.width > width:
+        img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+    if fmt == "jpeg" or img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGB" if fmt == "jpeg" else "RGBA")
+    buf = io.BytesIO()
+    if fmt == "jpeg":
+        img.save(buf, format="JPEG", quality=82, optimize=True, progressive=True)
+    else:
+        img.save(buf, format=fmt.upper(), quality=75)
+    return buf.getvalue()
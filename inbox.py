@@ -0,0 +1,117 @@
+import base64
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import func, tuple_
+from models import db, Message, MessageCount
+import storage
+
+STATUSES = ("unread", "read", "handled")
+PAGE_SIZE = 50
+
+
+def normalize_category(value):
+    return " ".join((value or "").split())[:80] or "General"
+
+
+def _bump(deltas):
+    # deltas: {(property_id, category, status): +/-n}, applied in the caller's transaction.
+    rows = [{"property_id": pid, "category": cat, "status": st, "count": n}
+            for (pid, cat, st), n in deltas.items() if n]
+    if not rows:
+        return
+    storage.add_counts(MessageCount, ["property_id", "category", "status"], rows)
+
+
+def message_added(m):
+    """Count a new (unflushed) message; commits with it."""
+    m.category = normalize_category(m.category)
+    m.status = m.status or "unread"
+    _bump({(m.property_id, m.category, m.status): 1})
+
+
+def set_status(property_id, ids, status):
+    """Move messages to `status`, keeping the counters in step. Returns how many changed."""
+    if status not in STATUSES:
+        raise ValueError(f"Unknown status: {status!r}")
+    changing = (db.session.query(Message.id, Message.category, Message.status)
+                .filter(Message.property_id == property_id, Message.id.in_(ids), Message.status != status)
+                .with_for_update().all())
+    if not changing:
+        return 0
+    deltas = Counter()
+    for _, category, old in changing:
+        deltas[(property_id, category, old)] -= 1
+        deltas[(property_id, category, status)] += 1
+    db.session.execute(db.update(Message).where(Message.id.in_([mid for mid, _, _ in changing]))
+                       .values(status=status))
+    _bump(deltas)
+    return len(changing)
+
+
+def counts(property_id):
+    """{"total": n, "status": {status: n}, "category": {category: n}} from the counter rows."""
+    by_status, by_category = Counter(), Counter()
+    for category, status, n in (db.session.query(MessageCount.category, MessageCount.status, MessageCount.count)
+                                .filter(MessageCount.property_id == property_id)):
+        by_status[status] += n
+        by_category[category] += n
+    return {"total": sum(by_status.values()),
+            "status": {s: by_status.get(s, 0) for s in STATUSES},
+            "category": dict(sorted((c, n) for c, n in by_category.items() if n))}
+
+
+def unread_by_property():
+    q = (db.session.query(MessageCount.property_id, func.sum(MessageCount.count))
+         .filter(MessageCount.status == "unread").group_by(MessageCount.property_id))
+    return {pid: int(n) for pid, n in q}
+
+
+def recount():
+    """Rebuild every counter from the message table. Returns the number of counter rows."""
+    category = func.coalesce(Message.category, "General")
+    q = (db.session.query(Message.property_id, category, Message.status, func.count(Message.id))
+         .filter(Message.property_id.isnot(None))
+         .group_by(Message.property_id, category, Message.status))
+    deltas = {(pid, cat, st): n for pid, cat, st, n in q}
+    db.session.execute(db.delete(MessageCount))
+    _bump(deltas)
+    db.session.commit()
+    return len(deltas)
+
+
+# ---- Keyset pagination ----
+def encode_cursor(m):
+    raw = f"{m.created_at.isoformat()}|{m.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value):
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        ts, mid = raw.split("|")
+        return datetime.fromisoformat(ts), int(mid)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Bad cursor")
+
+
+def page(property_id, category=None, status=None, since=None, until=None, cursor=None, limit=PAGE_SIZE):
+    """Newest-first page of messages and the cursor for the next (older) page, or None.
+
+    Each page is an index range scan seeking past the cursor, so page 1,000
+    costs the same as page 1.
+    """
+    q = Message.query.filter(Message.property_id == property_id)
+    if category:
+        q = q.filter(Message.category == category)
+    if status:
+        q = q.filter(Message.status == status)
+    if since is not None:
+        q = q.filter(Message.created_at >= since)
+    if until is not None:
+        q = q.filter(Message.created_at < until)
+    if cursor:
+        q = q.filter(tuple_(Message.created_at, Message.id) < tuple_(*decode_cursor(cursor)))
+    rows = q.order_by(Message.created_at.desc(), Message.id.desc()).limit(limit + 1).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return rows, (encode_cursor(rows[-1]) if more else None)
@@ -0,0 +1,174 @@
+import os, hmac, time, cProfile, threading, itertools
+from flask import g, request, abort, has_request_context, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PREFIX = "guestmanual"
+
+
+class Metrics:
+    # Per-process aggregates by endpoint. Each gunicorn worker keeps its own,
+    # so a scrape reports the worker that answered it (labelled with its pid).
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}   # (endpoint, method, status) -> count
+        self.endpoints = {}  # endpoint -> {"count", "total", "db", "statements", "template", "buckets"}
+
+    def observe(self, endpoint, method, status, total, db, statements, template):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            e = self.endpoints.get(endpoint)
+            if e is None:
+                e = self.endpoints[endpoint] = {"count": 0, "total": 0.0, "db": 0.0, "statements": 0,
+                                                "template": 0.0, "buckets": [0] * len(BUCKETS)}
+            e["count"] += 1
+            e["total"] += total
+            e["db"] += db
+            e["statements"] += statements
+            e["template"] += template
+            for i, le in enumerate(BUCKETS):
+                if total <= le:
+                    e["buckets"][i] += 1
+
+    def render(self):
+        pid = os.getpid()
+        out = []
+
+        def header(name, kind, help_):
+            out.append(f"# HELP {PREFIX}_{name} {help_}")
+            out.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        with self._lock:
+            header("requests_total", "counter", "Requests served, by endpoint, method and status.")
+            for (endpoint, method, status), n in sorted(self.requests.items()):
+                out.append(f'{PREFIX}_requests_total{{endpoint="{endpoint}",method="{method}",'
+                           f'status="{status}",pid="{pid}"}} {n}')
+            header("request_seconds", "histogram", "Time from request start to response, by endpoint.")
+            for endpoint, e in sorted(self.endpoints.items()):
+                labels = f'endpoint="{endpoint}",pid="{pid}"'
+                for le, n in zip(BUCKETS, e["buckets"]):
+                    out.append(f'{PREFIX}_request_seconds_bucket{{{labels},le="{le}"}} {n}')
+                out.append(f'{PREFIX}_request_seconds_bucket{{{labels},le="+Inf"}} {e["count"]}')
+                out.append(f'{PREFIX}_request_seconds_sum{{{labels}}} {e["total"]:.6f}')
+                out.append(f'{PREFIX}_request_seconds_count{{{labels}}} {e["count"]}')
+            for name, field, kind, help_ in (
+                ("db_seconds_total", "db", "counter", "Time spent executing SQL, by endpoint."),
+                ("db_statements_total", "statements", "counter", "SQL statements executed, by endpoint."),
+                ("template_seconds_total", "template", "counter", "Time spent rendering Jinja templates, by endpoint."),
+            ):
+                header(name, kind, help_)
+                for endpoint, e in sorted(self.endpoints.items()):
+                    value = e[field] if field == "statements" else f"{e[field]:.6f}"
+                    out.append(f'{PREFIX}_{name}{{endpoint="{endpoint}",pid="{pid}"}} {value}')
+        return "\n".join(out) + "\n"
+
+
+def _before_cursor(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "instr" in g:
+        conn.info.setdefault("instr_start", []).append(time.perf_counter())
+
+
+def _after_cursor(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("instr_start")
+    if starts and has_request_context() and "instr" in g:
+        g.instr["db"] += time.perf_counter() - starts.pop()
+        g.instr["statements"] += 1
+
+
+class Instrumentation:
+    # Opt-in (INSTRUMENTATION_ENABLED=1) per-request timings: total, SQL time and
+    # statement count (engine events), Jinja render time (template signals).
+    # Exposed as a Server-Timing header and a Prometheus text endpoint; every
+    # PROFILE_SAMPLE_RATE-th request is also run under cProfile into PROFILE_DIR.
+
+    def __init__(self, app=None):
+        self.metrics = Metrics()
+        self._seq = itertools.count(1)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("INSTRUMENTATION_ENABLED", False)
+        app.config.setdefault("SERVER_TIMING_HEADER", True)
+        app.config.setdefault("METRICS_PATH", "/metrics")
+        app.config.setdefault("METRICS_TOKEN", "")
+        app.config.setdefault("PROFILE_SAMPLE_RATE", 0)
+        app.config.setdefault("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+        app.extensions["instrumentation"] = self
+        if not app.config["INSTRUMENTATION_ENABLED"]:
+            return
+        self.app = app
+        if not event.contains(Engine, "before_cursor_execute", _before_cursor):
+            event.listen(Engine, "before_cursor_execute", _before_cursor)
+            event.listen(Engine, "after_cursor_execute", _after_cursor)
+        before_render_template.connect(self._template_started, app)
+        template_rendered.connect(self._template_finished, app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        if app.config["METRICS_TOKEN"]:
+            app.add_url_rule(app.config["METRICS_PATH"], "metrics", self._metrics_view)
+        else:
+            # The client address can't tell a local scraper from a request relayed by
+            # a reverse proxy on the same host, so there is no unauthenticated mode.
+            app.logger.warning("METRICS_TOKEN is not set; %s is disabled", app.config["METRICS_PATH"])
+
+    def _start(self):
+        g.instr = {"start": time.perf_counter(), "db": 0.0, "statements": 0, "template": 0.0, "renders": []}
+        rate = self.app.config["PROFILE_SAMPLE_RATE"]
+        if rate and next(self._seq) % rate == 0:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return  # another profiler is active on this thread
+            g.instr["profiler"] = profiler
+
+    def _template_started(self, sender, template, context, **extra):
+        if "instr" in g:
+            g.instr["renders"].append(time.perf_counter())
+
+    def _template_finished(self, sender, template, context, **extra):
+        if "instr" in g and g.instr["renders"]:
+            g.instr["template"] += time.perf_counter() - g.instr["renders"].pop()
+
+    def _finish(self, resp):
+        instr = g.pop("instr", None)
+        if instr is None:
+            return resp
+        total = time.perf_counter() - instr["start"]
+        endpoint = request.endpoint or "unmatched"
+        self.metrics.observe(endpoint, request.method, resp.status_code,
+                             total, instr["db"], instr["statements"], instr["template"])
+        if self.app.config["SERVER_TIMING_HEADER"]:
+            resp.headers["Server-Timing"] = ", ".join([
+                f'db;dur={instr["db"] * 1000:.2f};desc="SQL x{instr["statements"]}"',
+                f'tpl;dur={instr["template"] * 1000:.2f}',
+                f'total;dur={total * 1000:.2f}',
+            ])
+        profiler = instr.get("profiler")
+        if profiler is not None:
+            profiler.disable()
+            self._dump(profiler, endpoint, total)
+        return resp
+
+    def _teardown(self, exc):
+        # after_request is skipped when a view raises; don't leave a profiler running.
+        instr = g.pop("instr", None)
+        if instr is not None and instr.get("profiler") is not None:
+            instr["profiler"].disable()
+
+    def _dump(self, profiler, endpoint, total):
+        root = self.app.config["PROFILE_DIR"]
+        os.makedirs(root, exist_ok=True)
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{endpoint}-{total * 1000:.0f}ms.prof"
+        profiler.dump_stats(os.path.join(root, name))
+
+    def _metrics_view(self):
+        expected = f"Bearer {self.app.config['METRICS_TOKEN']}"
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode(), expected.encode()):
+            abort(403)
+        return self.metrics.render(), 200, {"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
@@ -0,0 +1,84 @@
+from flask import g, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+from models import Property
+
+# Relationships each page template walks. Anything not listed stays lazy.
+SECTION_LOADS = {
+    "welcome": (),
+    "check-in": ("checkin_steps",),
+    "rules": ("rules",),
+    "how-to": ("howtos",),
+    "issues": ("issues",),
+    "emergency": ("emergencies",),
+    "local": ("locals",),
+    "checkout": ("checkout_steps",),
+    "faqs": ("faqs",),
+    "social": (),
+    "print": ("rules", "howtos", "emergencies", "locals"),
+    "reviews": (),
+    "howto_detail": (),
+    "search": (),
+    "manage": ("faqs", "emergencies", "locals", "howtos", "checkin_steps", "checkout_steps", "contacts"),
+    "offline": ("howtos",),
+    "print_artifact": ("checkin_steps", "rules", "howtos", "issues", "emergencies", "locals", "checkout_steps",
+                       "faqs", "contacts"),
+}
+
+# Collections that grow without bound; page renders must never load them.
+UNBOUNDED = ("messages", "views", "hourly_views", "daily_views")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def load_options(section):
+    rels = SECTION_LOADS[section]
+    # A single collection rides along in the property SELECT; several are
+    # fetched with one IN query each to avoid a cartesian join.
+    strategy = joinedload if len(rels) == 1 else selectinload
+    opts = [strategy(getattr(Property, name)) for name in rels]
+    opts += [raiseload(getattr(Property, name)) for name in UNBOUNDED]
+    return opts
+
+
+def query_budget(section):
+    rels = SECTION_LOADS[section]
+    return 1 if len(rels) <= 1 else 1 + len(rels)
+
+
+def property_for(section, **filters):
+    return Property.query.options(*load_options(section)).filter_by(**filters)
+
+
+# ---- Query counting (QUERY_BUDGET_MODE = off / warn / raise) ----
+def init_app(app):
+    app.config.setdefault("QUERY_BUDGET_MODE", "off")
+    if app.config["QUERY_BUDGET_MODE"] == "off":
+        return
+    if not event.contains(Engine, "before_cursor_execute", _count_query):
+        event.listen(Engine, "before_cursor_execute", _count_query)
+
+    @app.before_request
+    def _reset_query_count():
+        g.query_count = 0
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "query_count" in g:
+        g.query_count += 1
+
+
+def check_budget(app, section, extra=0):
+    mode = app.config.get("QUERY_BUDGET_MODE", "off")
+    if mode == "off" or "query_count" not in g:
+        return
+    used, budget = g.query_count, query_budget(section) + extra
+    if used <= budget:
+        return
+    msg = f"Section {section!r} ran {used} queries (budget {budget})"
+    if mode == "raise":
+        raise QueryBudgetExceeded(msg)
+    app.logger.warning(msg)
@@ -0,0 +1,133 @@
+import logging
+from logging.config import fileConfig
+
+from flask import current_app
+
+from alembic import context
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+fileConfig(config.config_file_name)
+logger = logging.getLogger('alembic.env')
+
+
+def get_engine(bind_key=None):
+    return current_app.extensions['migrate'].db.engines[bind_key]
+
+
+def get_engine_url(bind_key=None):
+    return get_engine(bind_key).url.render_as_string(
+        hide_password=False).replace('%', '%%')
+
+
+# add your model's MetaData object here
+# for 'autogenerate' support
+# from myapp import mymodel
+# target_metadata = mymodel.Base.metadata
+config.set_main_option('sqlalchemy.url', get_engine_url())
+target_db = current_app.extensions['migrate'].db
+# One migration history, run once per bind ('' is the main database). Each
+# revision has upgrade_<bind>() / downgrade_<bind>() functions.
+bind_names = [''] + list(current_app.config.get('SQLALCHEMY_BINDS') or {})
+for bind in bind_names[1:]:
+    config.set_section_option(bind, 'sqlalchemy.url', get_engine_url(bind))
+
+# other values from the config, defined by the needs of env.py,
+# can be acquired:
+# my_important_option = config.get_main_option("my_important_option")
+# ... etc.
+
+
+def get_metadata(bind):
+    return target_db.metadatas[bind or None]
+
+
+def version_table(bind):
+    # Binds may point at the same database (the default), so each keeps its
+    # own version table.
+    return 'alembic_version' + ('_%s' % bind if bind else '')
+
+
+def run_migrations_offline():
+    """Run migrations in 'offline' mode.
+
+    This configures the context with just a URL
+    and not an Engine, though an Engine is acceptable
+    here as well.  By skipping the Engine creation
+    we don't even need a DBAPI to be available.
+
+    Calls to context.execute() here emit the given string to the
+    script output.
+
+    """
+    for bind in bind_names:
+        url = (config.get_section_option(bind, 'sqlalchemy.url') if bind
+               else config.get_main_option('sqlalchemy.url'))
+        logger.info('Writing migrations for %s to %s.sql', bind or '<default>', bind)
+        with open('%s.sql' % bind, 'w') as buffer:
+            context.configure(
+                url=url, output_buffer=buffer, target_metadata=get_metadata(bind),
+                version_table=version_table(bind), literal_binds=True
+            )
+            with context.begin_transaction():
+                context.run_migrations(engine_name=bind)
+
+
+def run_migrations_online():
+    """Run migrations in 'online' mode.
+
+    In this scenario we need to create an Engine
+    and associate a connection with the context.
+
+    """
+
+    # this callback is used to prevent an auto-migration from being generated
+    # when there are no changes to the schema
+    # reference: http://alembic.zzzcomputing.com/en/latest/cookbook.html
+    def process_revision_directives(context, revision, directives):
+        if getattr(config.cmd_opts, 'autogenerate', False):
+            script = directives[0]
+            if all(ops.is_empty() for ops in script.upgrade_ops_list):
+                directives[:] = []
+                logger.info('No changes in schema detected.')
+
+    conf_args = current_app.extensions['migrate'].configure_args
+    if conf_args.get("process_revision_directives") is None:
+        conf_args["process_revision_directives"] = process_revision_directives
+
+    def include_name_for(bind):
+        # Skip search_index (FTS5, managed by search.py), other version tables
+        # and tables of the other binds, which may share this database.
+        foreign = {t for b in bind_names if b != bind for t in get_metadata(b).tables}
+        foreign.update(version_table(b) for b in bind_names)
+
+        def include_name(name, type_, parent_names):
+            return not (type_ == "table" and name and
+                        (name.startswith("search_index") or name in foreign))
+        return include_name
+
+    # Binds are migrated one after another, each in its own transaction: when
+    # they share a SQLite file, two open write transactions would deadlock.
+    for bind in bind_names:
+        logger.info('Migrating database %s', bind or '<default>')
+        with get_engine(bind or None).connect() as connection:
+            context.configure(
+                connection=connection,
+                target_metadata=get_metadata(bind),
+                version_table=version_table(bind),
+                upgrade_token='%s_upgrades' % bind,
+                downgrade_token='%s_downgrades' % bind,
+                **dict({'include_name': include_name_for(bind)}, **conf_args)
+            )
+            with context.begin_transaction():
+                context.run_migrations(engine_name=bind)
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
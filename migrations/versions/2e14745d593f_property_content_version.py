@@ -0,0 +1,45 @@
+"""Property content version
+
+Revision ID: 2e14745d593f
+Revises: a6cc80593f81
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e14745d593f'
+down_revision = 'a6cc80593f81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_():
+    with op.batch_alter_table('property') as batch_op:
+        batch_op.add_column(sa.Column('content_version', sa.Integer(), nullable=False, server_default='1'))
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade_():
+    with op.batch_alter_table('property') as batch_op:
+        batch_op.drop_column('updated_at')
+        batch_op.drop_column('content_version')
+
+
+# Predates the telemetry bind: these ran against the shared database above.
+def upgrade_telemetry():
+    pass
+
+
+def downgrade_telemetry():
+    pass
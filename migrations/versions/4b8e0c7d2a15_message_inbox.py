@@ -0,0 +1,67 @@
+"""Message inbox state and counters
+
+Revision ID: 4b8e0c7d2a15
+Revises: 7c1d2b9e4f60
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e0c7d2a15'
+down_revision = '7c1d2b9e4f60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_():
+    with op.batch_alter_table('message') as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=10), nullable=False, server_default='unread'))
+    op.execute("UPDATE message SET category = 'General' WHERE category IS NULL OR TRIM(category) = ''")
+    op.drop_index('ix_message_property_created', table_name='message', if_exists=True)
+    op.create_index('ix_message_property_created', 'message', ['property_id', 'created_at', 'id'])
+    op.create_index('ix_message_property_status_created', 'message', ['property_id', 'status', 'created_at', 'id'])
+    op.create_index('ix_message_property_category_created', 'message', ['property_id', 'category', 'created_at', 'id'])
+    op.create_table('message_count',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=80), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['property_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'category', 'status'),
+    )
+    op.execute(
+        "INSERT INTO message_count (property_id, category, status, count) "
+        "SELECT property_id, category, status, COUNT(*) FROM message "
+        "WHERE property_id IS NOT NULL GROUP BY property_id, category, status")
+
+
+def downgrade_():
+    op.drop_table('message_count')
+    op.drop_index('ix_message_property_category_created', table_name='message')
+    op.drop_index('ix_message_property_status_created', table_name='message')
+    op.drop_index('ix_message_property_created', table_name='message')
+    op.create_index('ix_message_property_created', 'message', ['property_id', 'created_at'])
+    with op.batch_alter_table('message') as batch_op:
+        batch_op.drop_column('status')
+
+
+# Predates the telemetry bind: these ran against the shared database above.
+def upgrade_telemetry():
+    pass
+
+
+def downgrade_telemetry():
+    pass
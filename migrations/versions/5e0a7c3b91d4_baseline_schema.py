@@ -0,0 +1,183 @@
+"""Baseline schema
+
+Revision ID: 5e0a7c3b91d4
+Revises: 
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a7c3b91d4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+def _child(name, *columns):
+    # Content rows hanging off a property; a6cc80593f81 indexes prop_id.
+    op.create_table(name,
+        sa.Column('id', sa.Integer(), nullable=False),
+        *columns,
+        sa.Column('prop_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['prop_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+
+
+def upgrade_():
+    # The tables as db.create_all() made them before the first migration, so
+    # `flask db upgrade` can build a database from nothing. Databases created
+    # by create_all() already have them.
+    op.create_table('property',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('slug', sa.String(length=120), nullable=False),
+        sa.Column('name', sa.String(length=200), nullable=False),
+        sa.Column('address_display', sa.String(length=300), nullable=True),
+        sa.Column('map_url', sa.String(length=500), nullable=True),
+        sa.Column('checkin_time', sa.String(length=20), nullable=True),
+        sa.Column('checkout_time', sa.String(length=20), nullable=True),
+        sa.Column('wifi_ssid', sa.String(length=120), nullable=True),
+        sa.Column('wifi_password', sa.String(length=120), nullable=True),
+        sa.Column('parking', sa.Text(), nullable=True),
+        sa.Column('quiet_hours', sa.String(length=50), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('hero_url', sa.String(length=800), nullable=True),
+        sa.Column('gallery_urls', sa.Text(), nullable=True),
+        sa.Column('instagram_url', sa.String(length=300), nullable=True),
+        sa.Column('facebook_url', sa.String(length=300), nullable=True),
+        sa.Column('tiktok_url', sa.String(length=300), nullable=True),
+        sa.Column('whatsapp_url', sa.String(length=300), nullable=True),
+        sa.Column('phone_number', sa.String(length=60), nullable=True),
+        sa.Column('email_address', sa.String(length=120), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('slug'),
+        if_not_exists=True,
+    )
+    _child('contact',
+        sa.Column('role', sa.String(length=50), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('phone', sa.String(length=60), nullable=True),
+        sa.Column('whatsapp', sa.String(length=60), nullable=True))
+    _child('rule',
+        sa.Column('title', sa.String(length=200), nullable=True),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('penalty', sa.String(length=120), nullable=True),
+        sa.Column('rationale', sa.Text(), nullable=True))
+    _child('how_to',
+        sa.Column('area', sa.String(length=120), nullable=True),
+        sa.Column('appliance', sa.String(length=120), nullable=True),
+        sa.Column('brand_model', sa.String(length=120), nullable=True),
+        sa.Column('how', sa.Text(), nullable=True),
+        sa.Column('manual_url', sa.String(length=500), nullable=True),
+        sa.Column('issues', sa.Text(), nullable=True))
+    _child('issue_flow',
+        sa.Column('category', sa.String(length=120), nullable=True),
+        sa.Column('try_first', sa.Text(), nullable=True),
+        sa.Column('when_to_contact', sa.Text(), nullable=True),
+        sa.Column('info_needed', sa.Text(), nullable=True),
+        sa.Column('auto_reply', sa.Text(), nullable=True))
+    _child('emergency',
+        sa.Column('etype', sa.String(length=50), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('phone', sa.String(length=60), nullable=True),
+        sa.Column('when', sa.Text(), nullable=True),
+        sa.Column('address', sa.String(length=300), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True))
+    _child('local_place',
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('name', sa.String(length=200), nullable=True),
+        sa.Column('blurb', sa.Text(), nullable=True),
+        sa.Column('address', sa.String(length=300), nullable=True),
+        sa.Column('map_link', sa.String(length=500), nullable=True),
+        sa.Column('hours', sa.String(length=120), nullable=True),
+        sa.Column('link', sa.String(length=500), nullable=True),
+        sa.Column('price', sa.String(length=10), nullable=True))
+    _child('checkin_step',
+        sa.Column('step', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('image', sa.String(length=200), nullable=True),
+        sa.Column('video', sa.String(length=200), nullable=True),
+        sa.Column('tip', sa.Text(), nullable=True))
+    _child('checkout_step',
+        sa.Column('step', sa.Integer(), nullable=True),
+        sa.Column('title', sa.String(length=200), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True))
+    _child('faq',
+        sa.Column('q', sa.String(length=300), nullable=True),
+        sa.Column('a', sa.Text(), nullable=True),
+        sa.Column('related', sa.String(length=200), nullable=True))
+    op.create_table('message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('contact', sa.String(length=120), nullable=True),
+        sa.Column('category', sa.String(length=80), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table('page_view',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('section', sa.String(length=40), nullable=True),
+        sa.Column('user_agent', sa.String(length=300), nullable=True),
+        sa.Column('ip', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['property_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        if_not_exists=True,
+    )
+    op.create_table('view_rollup_hourly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=40), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['property_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'section', 'hour'),
+        if_not_exists=True,
+    )
+    op.create_table('view_rollup_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=40), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['property_id'], ['property.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'section', 'day'),
+        if_not_exists=True,
+    )
+
+
+def downgrade_():
+    for table in ['view_rollup_daily', 'view_rollup_hourly', 'page_view', 'message', 'faq',
+                  'checkout_step', 'checkin_step', 'local_place', 'emergency', 'issue_flow',
+                  'how_to', 'rule', 'contact', 'property']:
+        op.drop_table(table)
+
+
+# Predates the telemetry bind: these ran against the shared database above.
+def upgrade_telemetry():
+    pass
+
+
+def downgrade_telemetry():
+    pass
@@ -0,0 +1,58 @@
+"""User-agent lookup table
+
+Revision ID: 7c1d2b9e4f60
+Revises: 2e14745d593f
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c1d2b9e4f60'
+down_revision = '2e14745d593f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_():
+    op.create_table('user_agent',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ua', sa.String(length=300), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('is_bot', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ua'),
+        if_not_exists=True,
+    )
+    with op.batch_alter_table('page_view') as batch_op:
+        batch_op.add_column(sa.Column('user_agent_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('is_bot', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.create_foreign_key('fk_page_view_user_agent_id', 'user_agent', ['user_agent_id'], ['id'])
+
+
+def downgrade_():
+    with op.batch_alter_table('page_view') as batch_op:
+        batch_op.drop_constraint('fk_page_view_user_agent_id', type_='foreignkey')
+        batch_op.drop_column('is_bot')
+        batch_op.drop_column('user_agent_id')
+    op.drop_table('user_agent')
+
+
+# Predates the telemetry bind: these ran against the shared database above.
+def upgrade_telemetry():
+    pass
+
+
+def downgrade_telemetry():
+    pass
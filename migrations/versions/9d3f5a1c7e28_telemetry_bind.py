@@ -0,0 +1,137 @@
+"""Telemetry tables on their own bind: drop foreign keys to property
+
+Revision ID: 9d3f5a1c7e28
+Revises: 4b8e0c7d2a15
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d3f5a1c7e28'
+down_revision = '4b8e0c7d2a15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+TABLES = ['message', 'message_count', 'page_view', 'view_rollup_hourly', 'view_rollup_daily']
+# SQLite reflects these constraints unnamed; the convention names them for batch mode.
+NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def upgrade_():
+    pass
+
+
+def downgrade_():
+    pass
+
+
+def create_tables():
+    # The telemetry tables as of this revision, for a telemetry database of its
+    # own that the earlier revisions (main database only) never touched.
+    op.create_table('user_agent',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ua', sa.String(length=300), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('is_bot', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('ua'),
+    )
+    op.create_table('page_view',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('section', sa.String(length=40), nullable=True),
+        sa.Column('user_agent', sa.String(length=300), nullable=True),
+        sa.Column('user_agent_id', sa.Integer(), nullable=True),
+        sa.Column('is_bot', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('ip', sa.String(length=64), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_agent_id'], ['user_agent.id'], name='fk_page_view_user_agent_id'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_page_view_created_at', 'page_view', ['created_at'])
+    op.create_index('ix_page_view_property_created', 'page_view', ['property_id', 'created_at'])
+    op.create_index('ix_page_view_property_section_created', 'page_view', ['property_id', 'section', 'created_at'])
+    op.create_table('message',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=True),
+        sa.Column('name', sa.String(length=120), nullable=True),
+        sa.Column('contact', sa.String(length=120), nullable=True),
+        sa.Column('category', sa.String(length=80), nullable=True),
+        sa.Column('body', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('status', sa.String(length=10), nullable=False, server_default='unread'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_message_property_created', 'message', ['property_id', 'created_at', 'id'])
+    op.create_index('ix_message_property_status_created', 'message', ['property_id', 'status', 'created_at', 'id'])
+    op.create_index('ix_message_property_category_created', 'message', ['property_id', 'category', 'created_at', 'id'])
+    op.create_table('message_count',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('category', sa.String(length=80), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'category', 'status'),
+    )
+    op.create_table('view_rollup_hourly',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=40), nullable=False),
+        sa.Column('hour', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'section', 'hour'),
+    )
+    op.create_table('view_rollup_daily',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('property_id', sa.Integer(), nullable=False),
+        sa.Column('section', sa.String(length=40), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('property_id', 'section', 'day'),
+    )
+    op.create_index('ix_view_rollup_daily_day', 'view_rollup_daily', ['day'])
+
+
+def upgrade_telemetry():
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('page_view'):
+        create_tables()
+        return
+    # Only databases that started out shared have these constraints.
+    for table in TABLES:
+        if not inspector.has_table(table):
+            continue
+        fks = [fk for fk in inspector.get_foreign_keys(table) if fk['referred_table'] == 'property']
+        if not fks:
+            continue
+        with op.batch_alter_table(table, naming_convention=NAMING) as batch_op:
+            for fk in fks:
+                batch_op.drop_constraint(fk['name'] or 'fk_%s_property_id_property' % table, type_='foreignkey')
+
+
+def downgrade_telemetry():
+    # A separate telemetry database has no property table to point at.
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('property'):
+        return
+    for table in TABLES:
+        if inspector.has_table(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.create_foreign_key('fk_%s_property_id_property' % table, 'property',
+                                            ['property_id'], ['id'])
@@ -0,0 +1,57 @@
+"""Indexes for hot lookup columns
+
+Revision ID: a6cc80593f81
+Revises: 5e0a7c3b91d4
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6cc80593f81'
+down_revision = '5e0a7c3b91d4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+CHILD_TABLES = [
+    'contact', 'rule', 'how_to', 'issue_flow', 'emergency',
+    'local_place', 'checkin_step', 'checkout_step', 'faq',
+]
+
+INDEXES = [
+    ('ix_page_view_created_at', 'page_view', ['created_at']),
+    ('ix_page_view_property_created', 'page_view', ['property_id', 'created_at']),
+    ('ix_page_view_property_section_created', 'page_view', ['property_id', 'section', 'created_at']),
+    ('ix_message_property_created', 'message', ['property_id', 'created_at']),
+    ('ix_view_rollup_daily_day', 'view_rollup_daily', ['day']),
+] + [('ix_%s_prop_id' % t, t, ['prop_id']) for t in CHILD_TABLES]
+
+
+def upgrade_():
+    # Databases created by db.create_all() may already have these.
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols, unique=False, if_not_exists=True)
+
+
+def downgrade_():
+    for name, table, cols in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+# Predates the telemetry bind: these ran against the shared database above.
+def upgrade_telemetry():
+    pass
+
+
+def downgrade_telemetry():
+    pass
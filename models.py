@@ -1,7 +1,32 @@
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session as BindSession
+from sqlalchemy import event, Select
+from sqlalchemy.orm import Session
 from datetime import datetime
 
-db = SQLAlchemy()
+# Bind key of the high-churn tables (views, messages and their rollups), so they
+# can live in their own database (TELEMETRY_DATABASE_URL). Nothing joins or
+# cascades across the split: property_id there is a plain column.
+TELEMETRY = "telemetry"
+
+
+class RoutingSession(BindSession):
+    # Sends plain content SELECTs to the read replica while session.info["replica"]
+    # holds its engine (set per request by db_profile). Writes, locking reads,
+    # anything after this session's first flush and statements marked with
+    # execution_options(use_primary=True) stay on the primary.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        replica = self.info.get("replica")
+        if (replica is not None and bind is None and engine is self._db.engines.get(None)
+                and not self._flushing and not self.info.get("wrote")
+                and isinstance(clause, Select) and clause._for_update_arg is None
+                and not clause.get_execution_options().get("use_primary")):
+            return replica
+        return engine
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 class Property(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -24,6 +49,9 @@ class Property(db.Model):
     whatsapp_url  = db.Column(db.String(300))
     phone_number  = db.Column(db.String(60))
     email_address = db.Column(db.String(120))
+    # Bumped on any change to the property or its content rows (see _bump_content_versions)
+    content_version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     contacts = db.relationship("Contact", backref="property", cascade="all, delete-orphan")
     rules = db.relationship("Rule", backref="property", cascade="all, delete-orphan")
@@ -34,8 +62,12 @@ class Property(db.Model):
     checkin_steps = db.relationship("CheckinStep", backref="property", cascade="all, delete-orphan")
     checkout_steps = db.relationship("CheckoutStep", backref="property", cascade="all, delete-orphan")
     faqs = db.relationship("FAQ", backref="property", cascade="all, delete-orphan")
-    messages = db.relationship("Message", backref="property", cascade="all, delete-orphan")
-    views = db.relationship("PageView", backref="property", cascade="all, delete-orphan")
+    # Telemetry lives on another bind: read-only, and removed by purge_telemetry()
+    messages = db.relationship("Message", primaryjoin="Property.id == foreign(Message.property_id)", viewonly=True)
+    message_counts = db.relationship("MessageCount", primaryjoin="Property.id == foreign(MessageCount.property_id)", viewonly=True)
+    views = db.relationship("PageView", primaryjoin="Property.id == foreign(PageView.property_id)", viewonly=True)
+    hourly_views = db.relationship("ViewRollupHourly", primaryjoin="Property.id == foreign(ViewRollupHourly.property_id)", viewonly=True)
+    daily_views = db.relationship("ViewRollupDaily", primaryjoin="Property.id == foreign(ViewRollupDaily.property_id)", viewonly=True)
 
 class Contact(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -43,7 +75,7 @@ class Contact(db.Model):
     name = db.Column(db.String(120))
     phone = db.Column(db.String(60))
     whatsapp = db.Column(db.String(60))
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class Rule(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -51,7 +83,7 @@ class Rule(db.Model):
     description = db.Column(db.Text)
     penalty = db.Column(db.String(120))
     rationale = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class HowTo(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -61,7 +93,7 @@ class HowTo(db.Model):
     how = db.Column(db.Text)
     manual_url = db.Column(db.String(500))
     issues = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class IssueFlow(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -70,7 +102,7 @@ class IssueFlow(db.Model):
     when_to_contact = db.Column(db.Text)
     info_needed = db.Column(db.Text)
     auto_reply = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class Emergency(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -80,7 +112,7 @@ class Emergency(db.Model):
     when = db.Column(db.Text)
     address = db.Column(db.String(300))
     notes = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class LocalPlace(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -92,7 +124,7 @@ class LocalPlace(db.Model):
     hours = db.Column(db.String(120))
     link = db.Column(db.String(500))
     price = db.Column(db.String(10))
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class CheckinStep(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -102,7 +134,7 @@ class CheckinStep(db.Model):
     image = db.Column(db.String(200))
     video = db.Column(db.String(200))
     tip = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class CheckoutStep(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -110,37 +142,129 @@ class CheckoutStep(db.Model):
     title = db.Column(db.String(200))
     body = db.Column(db.Text)
     notes = db.Column(db.Text)
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class FAQ(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     q = db.Column(db.String(300))
     a = db.Column(db.Text)
     related = db.Column(db.String(200))
-    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    prop_id = db.Column(db.Integer, db.ForeignKey("property.id"), index=True)
 
 class Message(db.Model):
+    __bind_key__ = TELEMETRY
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    property_id = db.Column(db.Integer)
     name = db.Column(db.String(120))
     contact = db.Column(db.String(120))
     category = db.Column(db.String(80))
     body = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    status = db.Column(db.String(10), nullable=False, default="unread", server_default="unread")  # unread / read / handled
+    # Inbox keyset pagination walks (property_id, [status|category,] created_at, id) backwards
+    __table_args__ = (
+        db.Index("ix_message_property_created", "property_id", "created_at", "id"),
+        db.Index("ix_message_property_status_created", "property_id", "status", "created_at", "id"),
+        db.Index("ix_message_property_category_created", "property_id", "category", "created_at", "id"),
+    )
+
+# Message counts per (property, category, status), maintained by inbox.py so
+# the inbox never has to COUNT(*) the message table
+class MessageCount(db.Model):
+    __tablename__ = "message_count"
+    __bind_key__ = TELEMETRY
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, nullable=False)
+    category = db.Column(db.String(80), nullable=False)
+    status = db.Column(db.String(10), nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint("property_id", "category", "status"),)
+
+# Distinct User-Agent strings, referenced by id from PageView (see useragents.py)
+class UserAgent(db.Model):
+    __tablename__ = "user_agent"
+    __bind_key__ = TELEMETRY
+    id = db.Column(db.Integer, primary_key=True)
+    ua = db.Column(db.String(300), nullable=False, unique=True)
+    kind = db.Column(db.String(20), nullable=False, default="browser")  # browser / bot / preview / unknown
+    is_bot = db.Column(db.Boolean, nullable=False, default=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class PageView(db.Model):
+    __bind_key__ = TELEMETRY
     id = db.Column(db.Integer, primary_key=True)
-    property_id = db.Column(db.Integer, db.ForeignKey("property.id"))
+    property_id = db.Column(db.Integer)
     section = db.Column(db.String(40))
-    user_agent = db.Column(db.String(300))
+    user_agent = db.Column(db.String(300))  # legacy rows only; new views use user_agent_id
+    user_agent_id = db.Column(db.Integer, db.ForeignKey("user_agent.id"))
+    is_bot = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     ip = db.Column(db.String(64))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    __table_args__ = (
+        db.Index("ix_page_view_property_created", "property_id", "created_at"),
+        db.Index("ix_page_view_property_section_created", "property_id", "section", "created_at"),
+    )
+
+# Pre-aggregated view counts, maintained by rollups.py as views are flushed
+class ViewRollupHourly(db.Model):
+    __tablename__ = "view_rollup_hourly"
+    __bind_key__ = TELEMETRY
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, nullable=False)
+    section = db.Column(db.String(40), nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (db.UniqueConstraint("property_id", "section", "hour"),)
+
+class ViewRollupDaily(db.Model):
+    __tablename__ = "view_rollup_daily"
+    __bind_key__ = TELEMETRY
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(db.Integer, nullable=False)
+    section = db.Column(db.String(40), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    __table_args__ = (
+        db.UniqueConstraint("property_id", "section", "day"),
+        db.Index("ix_view_rollup_daily_day", "day"),
+    )
 
 
 
+CONTENT_MODELS = (Contact, Rule, HowTo, IssueFlow, Emergency, LocalPlace, CheckinStep, CheckoutStep, FAQ)
+TELEMETRY_MODELS = (Message, MessageCount, PageView, ViewRollupHourly, ViewRollupDaily)
+
+def purge_telemetry(property_ids):
+    # Deleting a property can't cascade across binds; call after committing the delete.
+    for model in TELEMETRY_MODELS:
+        db.session.execute(db.delete(model).where(model.property_id.in_(property_ids)))
+    db.session.commit()
+
+@event.listens_for(Session, "before_flush")
+def _bump_content_versions(session, flush_context, instances):
+    touched = set()
+    with session.no_autoflush:
+        for obj in list(session.dirty) + list(session.deleted) + list(session.new):
+            if isinstance(obj, Property):
+                if obj not in session.new and obj not in session.deleted and session.is_modified(obj):
+                    touched.add(obj)
+            elif isinstance(obj, CONTENT_MODELS):
+                if obj in session.dirty and not session.is_modified(obj):
+                    continue
+                prop = obj.property or (session.get(Property, obj.prop_id) if obj.prop_id else None)
+                if prop is not None and prop not in session.new and prop not in session.deleted:
+                    touched.add(prop)
+    now = datetime.utcnow()
+    for prop in touched:
+        # Incremented by the UPDATE itself, so concurrent edits never land on the same version.
+        prop.content_version = Property.content_version + 1
+        prop.updated_at = now
+    # The flush expires the SQL-set column, so after_flush listeners can't see it move; they read this.
+    session.info["content_bumped"] = {prop.id for prop in touched}
+
 def seed(db):
     # Seed a single property for "Vibe: A Modern Rustic Apartment"
-    if Property.query.first():
+    if db.session.query(Property.id).first():
         return
 
     # Core property info
@@ -0,0 +1,41 @@
+from flask import url_for
+from static_export import SECTIONS
+
+# Shell assets every page links (see base.html).
+STATIC_FILES = ["css/style.css", "js/app.js", "img/emp-logo-fallback.png"]
+# Image proxy variants the welcome page uses: card in the gallery, full for the
+# hero and the lightbox. The smaller srcset candidates are cached when fetched.
+IMAGE_VARIANTS = ("card", "full")
+
+
+def image_urls(prop, img_src):
+    urls = []
+    if (prop.hero_url or "").strip():
+        urls.append(img_src(prop.hero_url, "full"))
+    for u in (prop.gallery_urls or "").split(","):
+        if u.strip():
+            urls += [img_src(u, variant) for variant in IMAGE_VARIANTS]
+    # With the proxy off these are the original, cross-origin URLs; leave them be.
+    return [u for u in urls if u.startswith("/")]
+
+
+def precache_urls(prop, img_src):
+    """Every URL a guest needs to read `prop`'s manual offline, in the order the
+    service worker should fetch them (pages first, then images)."""
+    urls = [url_for("property_home", slug=prop.slug)]
+    urls += [url_for("property_section", slug=prop.slug, section=s) for s in SECTIONS if s != "welcome"]
+    urls += [url_for("property_howto_detail", slug=prop.slug, id=h.id) for h in prop.howtos]
+    urls.append(url_for("property_qr", slug=prop.slug))
+    urls += [url_for("static", filename=name) for name in STATIC_FILES]
+    urls += image_urls(prop, img_src)
+    return list(dict.fromkeys(urls))
+
+
+def manifest(prop, version, img_src):
+    return {
+        "slug": prop.slug,
+        "version": version,
+        "scope": url_for("property_home", slug=prop.slug),
+        "message_url": url_for("create_message", slug=prop.slug),
+        "urls": precache_urls(prop, img_src),
+    }
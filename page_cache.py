@@ -0,0 +1,232 @@
+import os, shutil, hashlib, threading
+from collections import OrderedDict
+import storage
+
+
+class MemoryBackend:
+    # Per-process LRU bounded by the total size of the cached values.
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._by_group = {}
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, group, key):
+        with self._lock:
+            value = self._items.get((group, key))
+            if value is not None:
+                self._items.move_to_end((group, key))
+            return value
+
+    def set(self, group, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._pop((group, key))
+            self._items[(group, key)] = value
+            self._by_group.setdefault(group, set()).add(key)
+            self._size += len(value)
+            while self._size > self.max_bytes:
+                self._pop(next(iter(self._items)))
+
+    def delete_group(self, group):
+        with self._lock:
+            for key in list(self._by_group.get(group, ())):
+                self._pop((group, key))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear(); self._by_group.clear(); self._size = 0
+
+    def _pop(self, item):
+        value = self._items.pop(item, None)
+        if value is None:
+            return
+        self._size -= len(value)
+        keys = self._by_group.get(item[0])
+        if keys is not None:
+            keys.discard(item[1])
+            if not keys:
+                del self._by_group[item[0]]
+
+
+class FileBackend:
+    # Shared by every worker on the host: one directory per group, one file per key.
+    # Reads bump the file mtime so eviction is least-recently-used across workers.
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._size = self._tree_size(root)  # approximate: other workers write too
+
+    def _dir(self, group):
+        return os.path.join(self.root, hashlib.sha1(group.encode()).hexdigest())
+
+    def _path(self, group, key):
+        return os.path.join(self._dir(group), hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, group, key):
+        path = self._path(group, key)
+        try:
+            with open(path, "rb") as f:
+                value = f.read()
+            os.utime(path)
+            return value
+        except OSError:
+            return None
+
+    def set(self, group, key, value):
+        if len(value) > self.max_bytes:
+            return
+        d = self._dir(group)
+        path = self._path(group, key)
+        try:
+            os.makedirs(d, exist_ok=True)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            # Fails if delete_group moved the directory away meanwhile; the
+            # entry was invalidated before it landed, so just drop it.
+            storage.atomic_write(path, value)
+        except OSError:
+            return
+        with self._lock:
+            self._size += len(value) - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self._evict()
+
+    def delete_group(self, group):
+        # Move the directory aside first so a render finishing right now can't
+        # write back into it, then remove it at leisure.
+        d = self._dir(group)
+        trash = f"{d}.del-{os.getpid()}-{threading.get_ident()}"
+        try:
+            os.rename(d, trash)
+        except OSError:
+            return
+        with self._lock:
+            self._size -= self._tree_size(trash)
+        shutil.rmtree(trash, ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            self._size = 0
+
+    @staticmethod
+    def _tree_size(root):
+        total = 0
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                try:
+                    total += os.stat(os.path.join(dirpath, name)).st_size
+                except OSError:
+                    pass
+        return total
+
+    def _evict(self):
+        # Only runs once this process's running total passes the limit; the walk
+        # also picks up what other workers wrote and resets the total to match.
+        entries, total = [], 0
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
+
+
+class NullBackend:
+    def get(self, group, key): return None
+    def set(self, group, key, value): pass
+    def delete_group(self, group): pass
+    def clear(self): pass
+
+
+class PageCache:
+    # Rendered HTML for public property pages, keyed by (slug, section, locale)
+    # plus a variant (full page or XHR fragment).
+    # Entries are grouped by slug so an admin edit drops exactly that property.
+    # Each entry also records the content version it was rendered from, and a
+    # lookup with any other version is a miss: an edit saved through another
+    # worker only clears that worker's memory cache.
+
+    def __init__(self, app=None):
+        self.backend = NullBackend()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PAGE_CACHE_BACKEND", "memory")
+        app.config.setdefault("PAGE_CACHE_MAX_BYTES", 32 * 1024 * 1024)
+        app.config.setdefault("PAGE_CACHE_DIR", os.path.join(app.instance_path, "page_cache"))
+        kind = app.config["PAGE_CACHE_BACKEND"]
+        max_bytes = app.config["PAGE_CACHE_MAX_BYTES"]
+        if kind == "memory":
+            self.backend = MemoryBackend(max_bytes)
+        elif kind == "file":
+            self.backend = FileBackend(app.config["PAGE_CACHE_DIR"], max_bytes)
+        elif kind == "none":
+            self.backend = NullBackend()
+        else:
+            raise ValueError(f"Unknown PAGE_CACHE_BACKEND: {kind}")
+        app.extensions["page_cache"] = self
+
+    def _get(self, slug, key, version):
+        value = self.backend.get(slug, key)
+        if value is None:
+            return None
+        header, _, body = value.partition(b"\n")
+        pid, _, stored = header.decode().partition(" ")
+        if stored != str(version):
+            return None
+        return int(pid), body
+
+    def get(self, slug, section, locale, version, variant="page"):
+        # Returns (property_id, html) or None.
+        hit = self._get(slug, f"{section}|{locale}|{variant}", version)
+        if hit is None:
+            return None
+        return hit[0], hit[1].decode("utf-8")
+
+    def set(self, slug, section, locale, version, pid, html, variant="page"):
+        self.backend.set(slug, f"{section}|{locale}|{variant}",
+                         f"{pid} {version}\n".encode() + html.encode("utf-8"))
+
+    # Compressed copies of the same page, one per Content-Encoding, so a hit
+    # doesn't recompress. They share the slug group and are dropped with it.
+    def get_encoded(self, slug, section, locale, version, variant, encoding):
+        hit = self._get(slug, f"{section}|{locale}|{variant}|{encoding}", version)
+        return None if hit is None else hit[1]
+
+    def set_encoded(self, slug, section, locale, version, pid, variant, encoding, body):
+        self.backend.set(slug, f"{section}|{locale}|{variant}|{encoding}", f"{pid} {version}\n".encode() + body)
+
+    def invalidate(self, *slugs):
+        for slug in slugs:
+            if slug:
+                self.backend.delete_group(slug)
+
+    def clear(self):
+        self.backend.clear()
@@ -0,0 +1,119 @@
+import os, atexit, threading
+from datetime import datetime
+from models import db, PageView
+from useragents import UserAgentIds
+import rollups
+
+
+class ViewBuffer:
+    # Queues page views in memory and bulk-inserts them from a background thread.
+    # A batch is flushed when it reaches VIEW_FLUSH_SIZE rows or every
+    # VIEW_FLUSH_INTERVAL seconds; VIEW_MAX_UNFLUSHED caps how many views a
+    # crashed worker can lose.
+
+    def __init__(self, app=None):
+        self.app = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self.user_agents = UserAgentIds()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("VIEW_BUFFER_ENABLED", True)
+        app.config.setdefault("VIEW_FLUSH_SIZE", 100)
+        app.config.setdefault("VIEW_FLUSH_INTERVAL", 2.0)
+        app.config.setdefault("VIEW_MAX_UNFLUSHED", 500)
+        self.app = app
+        app.extensions["view_buffer"] = self
+        atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        return self.app.config["VIEW_BUFFER_ENABLED"] and not self.app.testing
+
+    def add(self, **row):
+        row.setdefault("created_at", datetime.utcnow())
+        if not self.enabled:
+            self._write([row])
+            return
+        self._ensure_worker()
+        with self._lock:
+            self._pending.append(row)
+            size = len(self._pending)
+        if size >= self.app.config["VIEW_MAX_UNFLUSHED"]:
+            # The worker is falling behind; flush inline so the loss cap holds.
+            self.flush()
+        elif size >= self.app.config["VIEW_FLUSH_SIZE"]:
+            self._wake.set()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if rows and not self._write(rows):
+                self._requeue(rows)
+                return 0
+            return len(rows)
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=10)
+        self.flush()
+
+    def _write(self, rows):
+        # Works on copies so a failed batch can be queued again unchanged.
+        batch = [dict(r) for r in rows]
+        with self.app.app_context():
+            try:
+                self.user_agents.intern(batch)
+                db.session.execute(db.insert(PageView), batch)
+                rollups.record([r for r in batch if not r.get("is_bot")])
+                db.session.commit()
+                return True
+            except Exception:
+                db.session.rollback()
+                # Ids of user agents inserted by the rolled-back transaction are gone.
+                self.user_agents.clear()
+                self.app.logger.exception("Failed to write %d page views", len(rows))
+                return False
+
+    def _requeue(self, rows):
+        # Put a failed batch back in front of newer views, keeping at most
+        # VIEW_MAX_UNFLUSHED so a database outage can't grow the buffer without bound.
+        cap = self.app.config["VIEW_MAX_UNFLUSHED"]
+        with self._lock:
+            pending = rows + self._pending
+            self._pending = pending[-cap:]
+            dropped = len(pending) - len(self._pending)
+        if dropped:
+            self.app.logger.error("Dropped %d page views", dropped)
+
+    def _ensure_worker(self):
+        # Started lazily (and restarted after fork) so gunicorn --preload works.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="view-buffer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.app.config["VIEW_FLUSH_INTERVAL"])
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("View buffer flush failed")
+
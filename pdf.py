@@ -0,0 +1,156 @@
+import zlib
+from datetime import datetime
+
+# Minimal PDF writer: A4 pages, the built-in Helvetica fonts (no embedding) and
+# filled rectangles, which is all the printed manual and its QR code need.
+A4 = (595.28, 841.89)
+FONTS = {"regular": ("F1", "Helvetica"), "bold": ("F2", "Helvetica-Bold")}
+
+# Helvetica advance widths (1/1000 em) for ASCII 32..126, from the standard AFM.
+_WIDTHS = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+# Characters outside WinAnsi that the seed content uses.
+_FALLBACKS = str.maketrans({"\u2010": "-", "\u2011": "-", "\u2212": "-", "\u2192": "->", "\u2190": "<-",
+                            "\u2713": "v", "\u2009": " ", "\u202f": " "})
+
+
+def text_width(s, size, bold=False):
+    w = sum(_WIDTHS[ord(c) - 32] if 32 <= ord(c) < 127 else 556 for c in s)
+    return w * size / 1000 * (1.08 if bold else 1.0)  # bold glyphs run ~8% wider
+
+
+def _encode(s):
+    raw = s.translate(_FALLBACKS).encode("cp1252", errors="replace")
+    return raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+def wrap(s, size, width, bold=False):
+    lines = []
+    for para in (s or "").splitlines() or [""]:
+        line = ""
+        for word in para.split():
+            candidate = f"{line} {word}" if line else word
+            if line and text_width(candidate, size, bold) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    return lines
+
+
+class Document:
+    def __init__(self, title, page_size=A4, margin=50):
+        self.title = title
+        self.width, self.height = page_size
+        self.margin = margin
+        self.pages = []
+        self.y = 0
+        self.new_page()
+
+    # ---- Drawing ----
+    def new_page(self):
+        self.pages.append([])
+        self.y = self.height - self.margin
+
+    def text(self, x, y, s, size=11, bold=False):
+        font = FONTS["bold" if bold else "regular"][0]
+        self.pages[-1].append(b"BT /%s %.1f Tf %.2f %.2f Td (%s) Tj ET" % (font.encode(), size, x, y, _encode(s)))
+
+    def rect(self, x, y, w, h, gray=0.0):
+        self.pages[-1].append(b"q %.3f g %.2f %.2f %.2f %.2f re f Q" % (gray, x, y, w, h))
+
+    # ---- Flow layout ----
+    @property
+    def content_width(self):
+        return self.width - 2 * self.margin
+
+    def ensure(self, height):
+        if self.y - height < self.margin + 20:  # keep clear of the footer
+            self.new_page()
+
+    def space(self, h):
+        self.y -= h
+
+    def paragraph(self, s, size=10.5, bold=False, indent=0, bullet=None, leading=1.35):
+        width = self.content_width - indent
+        for i, line in enumerate(wrap(s, size, width, bold)):
+            self.ensure(size * leading)
+            self.y -= size * leading
+            if bullet and i == 0:
+                self.text(self.margin + indent - 12, self.y, bullet, size, bold)
+            self.text(self.margin + indent, self.y, line, size, bold)
+
+    def heading(self, s, size=15, page_break=False):
+        if page_break and self.pages[-1]:
+            self.new_page()
+        self.ensure(size * 3)
+        self.space(size * 0.8)
+        self.paragraph(s, size=size, bold=True, leading=1.2)
+        self.space(size * 0.3)
+        self.rect(self.margin, self.y, self.content_width, 0.6, gray=0.7)
+        self.space(6)
+
+    def matrix(self, modules, size, x=None):
+        # Square boolean matrix (e.g. a QR code) drawn as filled cells, `size` points wide.
+        cell = size / len(modules)
+        self.ensure(size)
+        x = self.margin if x is None else x
+        top = self.y
+        for r, row in enumerate(modules):
+            c = 0
+            while c < len(row):
+                if row[c]:
+                    run = c
+                    while run < len(row) and row[run]:
+                        run += 1
+                    self.rect(x + c * cell, top - (r + 1) * cell, (run - c) * cell, cell)
+                    c = run
+                else:
+                    c += 1
+        self.y = top - size
+
+    # ---- Output ----
+    def render(self, footer=None):
+        """Serialise to PDF bytes; footer(page_number, page_count) adds a line to each page."""
+        count = len(self.pages)
+        if footer:
+            for n, ops in enumerate(self.pages, 1):
+                text = footer(n, count)
+                ops.append(b"BT /F1 8.0 Tf %.2f %.2f Td (%s) Tj ET"
+                           % (self.margin, self.margin - 20, _encode(text)))
+        objects = [
+            b"<< /Type /Catalog /Pages 2 0 R >>",
+            None,  # page tree, filled in once the page ids are known
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+            b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+            b"<< /Title (%s) /Producer (guest-manual) /CreationDate (D:%s) >>"
+            % (_encode(self.title), datetime.utcnow().strftime("%Y%m%d%H%M%SZ").encode()),
+        ]
+        kids = []
+        for ops in self.pages:
+            stream = zlib.compress(b"\n".join(ops))
+            objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream" % (len(stream), stream))
+            objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] "
+                           b"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents %d 0 R >>"
+                           % (self.width, self.height, len(objects)))
+            kids.append(len(objects))
+        objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+            b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, body in enumerate(objects, 1):
+            offsets.append(len(out))
+            out += b"%d 0 obj\n%s\nendobj\n" % (i, body)
+        xref = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+        out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+        out += b"trailer\n<< /Size %d /Root 1 0 R /Info 5 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+        return bytes(out)
@@ -0,0 +1,282 @@
+import os, re, html, shutil, zipfile, hashlib, threading
+from datetime import datetime
+from flask import current_app, has_app_context, render_template, url_for
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Property
+import qrcode
+import loading
+import pdf
+import qr_cache
+import storage
+
+# Bump when render_pdf() output changes, so cached PDFs are rebuilt on deploy.
+RENDERER_VERSION = "1"
+FORMATS = {"pdf": "application/pdf", "html": "text/html; charset=utf-8"}
+
+
+def plain(value):
+    # Admin-entered fields may carry simple HTML (they render |safe on the site).
+    text = re.sub(r"<\s*(br|/p|/li|/div)\s*/?>", "\n", value or "", flags=re.I)
+    return html.unescape(re.sub(r"<[^>]+>", "", text)).strip()
+
+
+def by_step(rows):
+    return sorted(rows, key=lambda s: s.step or 0)
+
+
+def qr_matrix(url, border=2):
+    qr = qrcode.QRCode(border=border)
+    qr.add_data(url)
+    qr.make(fit=True)
+    return qr.get_matrix()
+
+
+def render_pdf(p, url, qr_modules):
+    doc = pdf.Document(f"{p.name} - Guest Manual")
+    doc.paragraph(p.name, size=24, bold=True, leading=1.2)
+    if p.address_display:
+        doc.paragraph(p.address_display, size=11)
+    doc.space(18)
+    doc.matrix(qr_modules, 150)
+    doc.space(6)
+    doc.paragraph("Scan for the live manual: " + url, size=9)
+
+    doc.heading("Essentials")
+    for label, value in (("Wi-Fi network", p.wifi_ssid), ("Wi-Fi password", p.wifi_password),
+                         ("Check-in", p.checkin_time), ("Check-out", p.checkout_time),
+                         ("Quiet hours", p.quiet_hours), ("Parking", plain(p.parking)),
+                         ("Phone", p.phone_number), ("Email", p.email_address)):
+        if value:
+            doc.paragraph(f"{label}: {value}", indent=14, bullet="•")
+
+    def section(title, items, line, detail=None):
+        if not items:
+            return
+        doc.heading(title, page_break=True)
+        for item in items:
+            doc.ensure(40)  # don't strand an item's title at the foot of a page
+            doc.paragraph(line(item), bold=True)
+            if detail and detail(item):
+                doc.paragraph(detail(item), indent=14)
+            doc.space(4)
+
+    section("Check-in", by_step(p.checkin_steps), lambda s: f"{s.step or ''}. {s.title or ''}",
+            lambda s: "\n".join(x for x in (plain(s.body), s.tip and "Tip: " + plain(s.tip)) if x))
+    section("House rules", p.rules, lambda r: r.title or "",
+            lambda r: "\n".join(x for x in (plain(r.description), r.penalty and "Penalty: " + r.penalty) if x))
+    section("How-tos", p.howtos,
+            lambda h: " - ".join(x for x in (h.area, h.appliance, h.brand_model) if x),
+            lambda h: "\n".join(x for x in (plain(h.how), h.issues and "Common issues: " + plain(h.issues)) if x))
+    section("If something goes wrong", p.issues, lambda i: i.category or "",
+            lambda i: "\n".join(x for x in (plain(i.try_first), i.when_to_contact and "Contact us: " + plain(i.when_to_contact)) if x))
+    section("Emergency", p.emergencies,
+            lambda e: f"{e.etype or ''} - {e.name or ''}: {e.phone or ''}",
+            lambda e: "\n".join(x for x in (e.when, e.address, plain(e.notes)) if x))
+    section("Local guide", p.locals, lambda l: f"{l.category or ''} - {l.name or ''}",
+            lambda l: "\n".join(x for x in (plain(l.blurb), l.address, l.hours and "Hours: " + l.hours) if x))
+    section("Check-out", by_step(p.checkout_steps), lambda s: f"{s.step or ''}. {s.title or ''}",
+            lambda s: "\n".join(x for x in (plain(s.body), plain(s.notes)) if x))
+    section("FAQs", p.faqs, lambda f: f.q or "", lambda f: plain(f.a))
+    section("Contacts", p.contacts, lambda c: f"{c.role or ''} - {c.name or ''}",
+            lambda c: " / ".join(x for x in (c.phone, c.whatsapp and "WhatsApp " + c.whatsapp) if x))
+    return doc.render(footer=lambda n, count: f"{p.name}  -  page {n} of {count}  -  version {p.content_version}")
+
+
+class PrintArtifacts:
+    # Print-ready manual per property: a paginated HTML file and a PDF, both with
+    # the QR code embedded, stored as <PRINT_DIR>/<property id>/<key>.{pdf,html}.
+    # The key covers the content version, templates and public URL, so a file is
+    # only ever rebuilt after an edit. Committed edits queue a rebuild on a
+    # background thread (PRINT_REGEN_DELAY seconds later, so a burst of edits
+    # builds once); a download that arrives first builds it inline.
+
+    def __init__(self, app=None, release=""):
+        self.app = None
+        self.release = release
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._pid = None
+        if app is not None:
+            self.init_app(app, release)
+
+    def init_app(self, app, release=""):
+        app.config.setdefault("PRINT_DIR", os.path.join(app.instance_path, "print"))
+        app.config.setdefault("PRINT_BACKGROUND", True)
+        app.config.setdefault("PRINT_REGEN_DELAY", 3.0)
+        app.config.setdefault("PUBLIC_BASE_URL", "")
+        self.app = app
+        self.release = release
+        self.root = app.config["PRINT_DIR"]
+        os.makedirs(self.root, exist_ok=True)
+        app.extensions["print_artifacts"] = self
+        event.listen(Session, "after_flush", self._after_flush)
+        event.listen(Session, "after_commit", self._after_commit)
+        event.listen(Session, "after_rollback", self._after_rollback)
+
+    # ---- Keys and paths ----
+    def base_url(self):
+        # Never the request's Host header: the client picks it, and it would be
+        # printed on the manual and start a new set of cached files.
+        return qr_cache.public_base_url(self.app)
+
+    def key(self, prop_id, version, base_url):
+        raw = f"{RENDERER_VERSION}|{self.release}|{base_url}"
+        return f"v{version}-{hashlib.sha1(raw.encode()).hexdigest()[:10]}"
+
+    def path(self, prop_id, key, fmt):
+        return os.path.join(self.root, str(prop_id), f"{key}.{fmt}")
+
+    # ---- Building ----
+    def current(self, prop_id, fmt, base_url=None):
+        """(path, key) of the artifact for the property's current content, or None
+        if it hasn't been built yet (or there is no such property). Never builds."""
+        base_url = base_url or self.base_url()
+        version = db.session.query(Property.content_version).filter_by(id=prop_id).scalar()
+        if version is None:
+            return None
+        key = self.key(prop_id, version, base_url)
+        path = self.path(prop_id, key, fmt)
+        return (path, key) if os.path.exists(path) else None
+
+    def get(self, prop_id, fmt, base_url=None):
+        """(path, key) of the current artifact, building it now if needed; None if no such property."""
+        base_url = base_url or self.base_url()
+        version = db.session.query(Property.content_version).filter_by(id=prop_id).scalar()
+        if version is None:
+            return None
+        key = self.key(prop_id, version, base_url)
+        path = self.path(prop_id, key, fmt)
+        if not os.path.exists(path):
+            key = self.build(prop_id, base_url)
+            if key is None:  # deleted meanwhile
+                return None
+            path = self.path(prop_id, key, fmt)
+        return path, key
+
+    def build(self, prop_id, base_url):
+        with self.app.test_request_context(base_url=base_url):
+            p = loading.property_for("print_artifact", id=prop_id).first()
+            if p is None:
+                return None
+            key = self.key(p.id, p.content_version, base_url)
+            if all(os.path.exists(self.path(p.id, key, fmt)) for fmt in FORMATS):
+                return key
+            url = url_for("property_home", slug=p.slug, _external=True)
+            svg = qr_cache.render(url, "svg", box_size=8, border=2).decode("utf-8")
+            page = render_template("print/manual.html", p=p, url=url, qr_svg=Markup(svg[svg.index("<svg"):]),
+                                   checkin_steps=by_step(p.checkin_steps), checkout_steps=by_step(p.checkout_steps),
+                                   generated=datetime.utcnow())
+            os.makedirs(os.path.join(self.root, str(p.id)), exist_ok=True)
+            storage.atomic_write(self.path(p.id, key, "pdf"), render_pdf(p, url, qr_matrix(url)))
+            storage.atomic_write(self.path(p.id, key, "html"), page.encode("utf-8"))
+            self._prune(p.id, key)
+            return key
+
+    def _prune(self, prop_id, keep):
+        d = os.path.join(self.root, str(prop_id))
+        for name in os.listdir(d):
+            if not name.startswith(keep + ".") and not name.startswith(".tmp"):
+                try:
+                    os.remove(os.path.join(d, name))
+                except OSError:
+                    pass
+
+    def drop(self, prop_id):
+        shutil.rmtree(os.path.join(self.root, str(prop_id)), ignore_errors=True)
+
+    def write_zip(self, fileobj, props, base_url=None):
+        """Every property's PDF and HTML manual into one ZIP; returns the slugs left out.
+
+        With PRINT_BACKGROUND on, out-of-date manuals are queued for the worker
+        instead of being built inside the request, and listed in STALE.txt.
+        """
+        base_url = base_url or self.base_url()
+        background = self.app.config["PRINT_BACKGROUND"]
+        stale = {}
+        with zipfile.ZipFile(fileobj, "w", zipfile.ZIP_DEFLATED) as zf:
+            for p in props:
+                for fmt in FORMATS:
+                    found = self.current(p.id, fmt, base_url) if background else self.get(p.id, fmt, base_url)
+                    if found:
+                        zf.write(found[0], f"{p.slug}/{p.slug}.{fmt}")
+                    elif background:
+                        stale[p.id] = p.slug
+            if stale:
+                zf.writestr("STALE.txt", "Being rebuilt, download the ZIP again shortly:\n"
+                            + "".join(f"{slug}\n" for slug in stale.values()))
+        if stale:
+            self.schedule(list(stale), base_url)
+        return list(stale.values())
+
+    # ---- Background rebuilds ----
+    def schedule(self, prop_ids, base_url=None):
+        # With PRINT_BACKGROUND off, stale artifacts are simply rebuilt on next download.
+        if not self.app.config["PRINT_BACKGROUND"]:
+            return
+        base_url = base_url or self.base_url()
+        with self._lock:
+            for pid in prop_ids:
+                self._pending[pid] = base_url
+        self._ensure_worker()
+        self._wake.set()
+
+    def _mine(self):
+        # The listeners are global; only this app's sessions are its business.
+        return has_app_context() and current_app._get_current_object() is self.app
+
+    def _after_flush(self, session, flush_context):
+        if not self._mine():
+            return
+        touched = session.info.setdefault("print_touched", set())
+        touched.update(session.info.get("content_bumped", ()))
+        touched.update(obj.id for obj in session.new if isinstance(obj, Property))
+        for obj in session.deleted:
+            if isinstance(obj, Property):
+                session.info.setdefault("print_deleted", set()).add(obj.id)
+
+    def _after_commit(self, session):
+        if not self._mine():
+            return
+        touched = session.info.pop("print_touched", set())
+        for pid in session.info.pop("print_deleted", set()):
+            touched.discard(pid)
+            self.drop(pid)
+        if touched:
+            self.schedule(touched)
+
+    def _after_rollback(self, session):
+        if not self._mine():
+            return
+        session.info.pop("print_touched", None)
+        session.info.pop("print_deleted", None)
+
+    def _ensure_worker(self):
+        # Started lazily (and restarted after fork), like the view buffer's.
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name="print-artifacts", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # Debounce: an admin adding ten FAQs in a row triggers one build.
+            while self._wake.wait(self.app.config["PRINT_REGEN_DELAY"]):
+                self._wake.clear()
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            for pid, base_url in pending.items():
+                try:
+                    with self.app.app_context():
+                        self.build(pid, base_url)
+                except Exception:
+                    self.app.logger.exception("Building print manual for property %s failed", pid)
@@ -0,0 +1,105 @@
+import os, io, hashlib, threading
+from urllib.parse import urlsplit
+import qrcode
+import qrcode.image.svg
+import storage
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+DEFAULT_BASE_URL = "http://localhost:5000/"
+
+
+def public_base_url(app):
+    """Host QR codes point at: PUBLIC_BASE_URL, else SERVER_NAME, else localhost.
+    Never the request's Host header, which any client can set."""
+    configured = app.config.get("PUBLIC_BASE_URL")
+    if configured:
+        return configured.rstrip("/") + "/"
+    if app.config.get("SERVER_NAME"):
+        root = (app.config.get("APPLICATION_ROOT") or "/").rstrip("/")
+        return f"{app.config['PREFERRED_URL_SCHEME']}://{app.config['SERVER_NAME']}{root}/"
+    return DEFAULT_BASE_URL
+
+
+def public_url(app, endpoint, base_url=None, **values):
+    """Absolute URL for `endpoint` on the public host (see public_base_url)."""
+    parts = urlsplit(base_url or public_base_url(app))
+    adapter = app.url_map.bind(parts.netloc, script_name=parts.path or "/", url_scheme=parts.scheme)
+    return adapter.build(endpoint, values, force_external=True)
+
+
+class QRCache:
+    # QR images on disk, one file per (url, format, box size, border).
+    # The target URL carries the host and slug, so a rename or a new host simply
+    # produces a new key and never serves a stale code. Hits bump the file mtime;
+    # past max_files the least recently used images are removed.
+
+    def __init__(self, root, max_files=2000):
+        self.root = root
+        self.max_files = max_files
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._count = len(self._files())  # approximate: other workers write too
+
+    def key(self, url, fmt, box_size, border):
+        raw = f"{url}|{fmt}|{box_size}|{border}".encode()
+        return hashlib.sha256(raw).hexdigest()[:32]
+
+    def path(self, key, fmt):
+        return os.path.join(self.root, f"{key}.{fmt}")
+
+    def get(self, url, fmt="png", box_size=10, border=4):
+        # Returns (path, key), generating the image on first use.
+        key = self.key(url, fmt, box_size, border)
+        path = self.path(key, fmt)
+        try:
+            os.utime(path)
+            return path, key
+        except OSError:
+            pass
+        data = render(url, fmt, box_size, border)
+        storage.atomic_write(path, data)
+        with self._lock:
+            self._count += 1
+            over = self._count > self.max_files
+        if over:
+            self._evict(keep=path)
+        return path, key
+
+    def _files(self):
+        return [e for e in os.scandir(self.root) if e.is_file() and not e.name.startswith(".tmp")]
+
+    def _evict(self, keep):
+        # Down to 90% of the cap, oldest first.
+        entries = []
+        for e in self._files():
+            try:
+                entries.append((e.stat().st_mtime, e.path))
+            except OSError:
+                pass
+        entries.sort()
+        excess = len(entries) - int(self.max_files * 0.9)
+        removed = 0
+        for _, path in entries:
+            if removed >= excess:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        with self._lock:
+            self._count = len(entries) - removed
+
+
+def render(url, fmt="png", box_size=10, border=4):
+    qr = qrcode.QRCode(box_size=box_size, border=border)
+    qr.add_data(url)
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    if fmt == "svg":
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buf)
+    else:
+        qr.make_image().save(buf, format="PNG")
+    return buf.getvalue()
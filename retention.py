@@ -0,0 +1,137 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from sqlalchemy import func, text
+from models import db, TELEMETRY, PageView, ViewRollupHourly, ViewRollupDaily
+import rollups
+
+
+def cutoffs(app, now=None):
+    now = now or datetime.utcnow()
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (day - timedelta(days=app.config["RETENTION_RAW_DAYS"]),
+            day - timedelta(days=app.config["RETENTION_HOURLY_DAYS"]))
+
+
+def _engine():
+    return db.engines[TELEMETRY]
+
+
+def _execute(sql, params=None):
+    # Raw SQL defaults to the main bind; these tables live on the telemetry one.
+    return db.session.execute(text(sql), params, bind_arguments={"bind": _engine()})
+
+
+def _table_bytes(table):
+    # Approximate on-disk size of a table plus its indexes.
+    dialect = _engine().dialect.name
+    if dialect == "postgresql":
+        return _execute("SELECT pg_total_relation_size(:t)", {"t": table}).scalar() or 0
+    if dialect == "sqlite":
+        try:
+            return _execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = :t OR name IN "
+                "(SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :t)", {"t": table}).scalar() or 0
+        except Exception:
+            db.session.rollback()
+            page_size = _execute("PRAGMA page_size").scalar()
+            pages = _execute("PRAGMA page_count").scalar()
+            return page_size * pages  # whole file; dbstat is not compiled in
+    return 0
+
+
+def report(app):
+    """Rows and approximate bytes a retention run would reclaim."""
+    raw_cutoff, hourly_cutoff = cutoffs(app)
+    raw_total = db.session.query(func.count(PageView.id)).scalar()
+    raw_old = db.session.query(func.count(PageView.id)).filter(PageView.created_at < raw_cutoff).scalar()
+    hourly_total = db.session.query(func.count(ViewRollupHourly.id)).scalar()
+    hourly_old = (db.session.query(func.count(ViewRollupHourly.id))
+                  .filter(ViewRollupHourly.hour < hourly_cutoff).scalar())
+
+    def share(table, old, total):
+        return int(_table_bytes(table) * old / total) if total else 0
+
+    return {
+        "raw_cutoff": raw_cutoff, "hourly_cutoff": hourly_cutoff,
+        "raw_rows": raw_old, "raw_total": raw_total,
+        "raw_bytes": share(PageView.__tablename__, raw_old, raw_total),
+        "hourly_rows": hourly_old, "hourly_total": hourly_total,
+        "hourly_bytes": share(ViewRollupHourly.__tablename__, hourly_old, hourly_total),
+    }
+
+
+def fold(before):
+    """Make sure daily rollups account for every raw view older than `before`.
+
+    Views recorded before rollups existed (and never backfilled) are folded in
+    here, so deleting the raw rows never loses counts. Returns days corrected.
+    """
+    oldest = db.session.query(func.min(PageView.created_at)).filter(PageView.created_at < before).scalar()
+    if oldest is None:
+        return 0
+    day = func.date(PageView.created_at)
+    raw = (db.session.query(PageView.property_id, PageView.section, day, func.count(PageView.id))
+           .filter(PageView.created_at < before, PageView.property_id.isnot(None),
+                   PageView.is_bot.isnot(True))
+           .group_by(PageView.property_id, PageView.section, day))
+    have = {
+        (pid, section, d): n for pid, section, d, n in
+        db.session.query(ViewRollupDaily.property_id, ViewRollupDaily.section,
+                         ViewRollupDaily.day, ViewRollupDaily.count)
+        .filter(ViewRollupDaily.day >= oldest.date(), ViewRollupDaily.day < before.date())
+    }
+    missing = Counter()
+    for pid, section, d, n in raw:
+        if isinstance(d, str):
+            d = datetime.strptime(d, "%Y-%m-%d").date()
+        key = (pid, section or "", d)
+        if n > have.get(key, 0):
+            missing[key] = n - have.get(key, 0)
+    rollups.increment_daily(missing)
+    db.session.commit()
+    return len(missing)
+
+
+def _delete_batches(model, column, before, batch_size, pause):
+    deleted = 0
+    while True:
+        ids = db.session.query(model.id).filter(column < before).order_by(model.id).limit(batch_size)
+        n = db.session.execute(db.delete(model).where(model.id.in_(ids.scalar_subquery()))).rowcount
+        db.session.commit()
+        deleted += n
+        if n < batch_size:
+            return deleted
+        if pause:
+            time.sleep(pause)  # let buffered view flushes through between batches
+
+
+def reclaim():
+    dialect = _engine().dialect.name
+    if dialect == "sqlite":
+        mode = _execute("PRAGMA auto_vacuum").scalar()
+        db.session.commit()
+        with _engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if mode == 2:
+                conn.exec_driver_sql("PRAGMA incremental_vacuum")
+                return "incremental_vacuum"
+            conn.exec_driver_sql("VACUUM")
+            return "vacuum"
+    if dialect == "postgresql":
+        db.session.commit()
+        with _engine().connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for table in (PageView.__tablename__, ViewRollupHourly.__tablename__):
+                conn.exec_driver_sql(f"VACUUM (ANALYZE) {table}")
+        return "vacuum analyze"
+    return None
+
+
+def run(app, vacuum=True):
+    raw_cutoff, hourly_cutoff = cutoffs(app)
+    batch = app.config["RETENTION_BATCH_SIZE"]
+    pause = app.config["RETENTION_BATCH_PAUSE"]
+    folded = fold(raw_cutoff)
+    raw = _delete_batches(PageView, PageView.created_at, raw_cutoff, batch, pause)
+    hourly = _delete_batches(ViewRollupHourly, ViewRollupHourly.hour, hourly_cutoff, batch, pause)
+    reclaimed = reclaim() if vacuum and (raw or hourly) else None
+    return {"folded_days": folded, "raw_rows": raw, "hourly_rows": hourly, "reclaim": reclaimed}
@@ -0,0 +1,85 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import func
+from models import db, PageView, ViewRollupHourly, ViewRollupDaily
+import storage
+
+
+def _hour(ts):
+    return ts.replace(minute=0, second=0, microsecond=0)
+
+
+def _increment(model, bucket, counts):
+    if not counts:
+        return
+    rows = [
+        {"property_id": pid, "section": section, bucket: ts, "count": n}
+        for (pid, section, ts), n in counts.items()
+    ]
+    storage.add_counts(model, ["property_id", "section", bucket], rows)
+
+
+def record(rows):
+    """Fold a batch of page-view rows into the hourly and daily rollups.
+
+    Runs inside the caller's transaction so rollups and raw views commit together.
+    """
+    hourly, daily = Counter(), Counter()
+    for r in rows:
+        ts = r.get("created_at") or datetime.utcnow()
+        hourly[(r["property_id"], r["section"], _hour(ts))] += 1
+        daily[(r["property_id"], r["section"], ts.date())] += 1
+    _increment(ViewRollupHourly, "hour", hourly)
+    _increment(ViewRollupDaily, "day", daily)
+
+
+def increment_daily(counts):
+    # counts: {(property_id, section, date): n}
+    _increment(ViewRollupDaily, "day", counts)
+
+
+def _hour_of(col):
+    # SQL for the start of the hour containing `col`.
+    dialect = db.session.get_bind(mapper=PageView.__mapper__).dialect.name
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00", col)
+    if dialect in ("mysql", "mariadb"):
+        return func.date_format(col, "%Y-%m-%d %H:00:00")
+    return func.date_trunc("hour", col)
+
+
+def _grouped(bucket, parse):
+    # {(property_id, section, bucket): views}, counted by the database.
+    section = func.coalesce(PageView.section, "")
+    q = (db.session.query(PageView.property_id, section, bucket, func.count(PageView.id))
+         .filter(PageView.property_id.isnot(None), PageView.created_at.isnot(None),
+                 PageView.is_bot.isnot(True))
+         .group_by(PageView.property_id, section, bucket))
+    return {(pid, sec, parse(b) if isinstance(b, str) else b): n for pid, sec, b, n in q}
+
+
+def rebuild():
+    """Recompute rollups from PageView history. Returns the number of views read.
+
+    Only hours and days that still have raw views are rebuilt: older rollups are
+    all that's left once retention has deleted the raw rows, so they are kept.
+    """
+    oldest = db.session.query(func.min(PageView.created_at)).scalar()
+    if oldest is None:
+        return 0
+    hourly = _grouped(_hour_of(PageView.created_at), datetime.fromisoformat)
+    daily = _grouped(func.date(PageView.created_at), date.fromisoformat)
+    db.session.execute(db.delete(ViewRollupHourly).where(ViewRollupHourly.hour >= _hour(oldest)))
+    db.session.execute(db.delete(ViewRollupDaily).where(ViewRollupDaily.day >= oldest.date()))
+    _increment(ViewRollupHourly, "hour", hourly)
+    _increment(ViewRollupDaily, "day", daily)
+    db.session.commit()
+    return sum(daily.values())
+
+
+def views_by_property(days=30):
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    q = (db.session.query(ViewRollupDaily.property_id, func.sum(ViewRollupDaily.count))
+         .filter(ViewRollupDaily.day >= since)
+         .group_by(ViewRollupDaily.property_id))
+    return {pid: int(n) for pid, n in q}
@@ -0,0 +1,325 @@
+import re, math, sqlite3, threading
+from bisect import bisect_left
+from html import escape
+from markupsafe import Markup
+from flask import current_app, has_app_context
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+from models import db, Property, FAQ, HowTo, Rule, IssueFlow, LocalPlace
+
+# kind -> (model, section the result links to, title fields, body fields)
+INDEXED = {
+    "faq": (FAQ, "faqs", ("q",), ("a", "related")),
+    "howto": (HowTo, "how-to", ("appliance", "brand_model", "area"), ("how", "issues")),
+    "rule": (Rule, "rules", ("title",), ("description", "rationale", "penalty")),
+    "issue": (IssueFlow, "issues", ("category",), ("try_first", "when_to_contact", "info_needed")),
+    "local": (LocalPlace, "local", ("name",), ("category", "blurb", "address")),
+}
+KIND_OF = {model: kind for kind, (model, *_) in INDEXED.items()}
+KIND_OF[Property] = "info"
+
+# Highlight markers survive HTML escaping and are swapped for <mark> afterwards.
+HL_OPEN, HL_CLOSE = "\x02", "\x03"
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+COMPOUND_RE = re.compile(r"\w+(?:[-\u2010\u2011]\w+)+", re.UNICODE)
+
+
+def tokenize(value):
+    return [t.lower() for t in TOKEN_RE.findall(value or "")]
+
+
+def _keywords(*values):
+    # "Wi-Fi" is also findable as "wifi", "check-in" as "checkin".
+    words = {re.sub(r"[-\u2010\u2011]", "", m.group(0)).lower()
+             for v in values for m in COMPOUND_RE.finditer(v or "")}
+    return " ".join(sorted(words))
+
+
+def _essentials(prop):
+    # The property's own quick facts (Wi-Fi, times, parking) as one document.
+    lines = [
+        prop.wifi_ssid and f"Wi-Fi network: {prop.wifi_ssid}",
+        prop.wifi_password and f"Wi-Fi password: {prop.wifi_password}",
+        prop.checkin_time and f"Check-in from {prop.checkin_time}",
+        prop.checkout_time and f"Check-out by {prop.checkout_time}",
+        prop.quiet_hours and f"Quiet hours: {prop.quiet_hours}",
+        prop.parking and f"Parking: {prop.parking}",
+        prop.address_display and f"Address: {prop.address_display}",
+    ]
+    return {"kind": "info", "ref_id": prop.id, "prop_id": prop.id, "section": "welcome",
+            "title": "Essentials: Wi-Fi, check-in, parking", "body": "\n".join(l for l in lines if l)}
+
+
+def document(obj):
+    if isinstance(obj, Property):
+        doc = _essentials(obj)
+    else:
+        kind = KIND_OF[type(obj)]
+        _, section, title_fields, body_fields = INDEXED[kind]
+        title = " · ".join(v for v in (getattr(obj, f) for f in title_fields) if v)
+        body = "\n".join(v for v in (getattr(obj, f) for f in body_fields) if v)
+        doc = {"kind": kind, "ref_id": obj.id, "prop_id": obj.prop_id, "section": section,
+               "title": title, "body": body}
+    doc["keywords"] = _keywords(doc["title"], doc["body"])
+    return doc
+
+
+def property_documents(prop_id):
+    prop = db.session.get(Property, prop_id)
+    if prop is not None:
+        yield document(prop)
+    for kind, (model, *_) in INDEXED.items():
+        for obj in model.query.filter_by(prop_id=prop_id).order_by(model.id):
+            yield document(obj)
+
+
+def render_highlight(value):
+    return Markup(escape(value).replace(HL_OPEN, "<mark>").replace(HL_CLOSE, "</mark>"))
+
+
+def fts5_available():
+    try:
+        con = sqlite3.connect(":memory:")
+        con.execute("CREATE VIRTUAL TABLE t USING fts5(a)")
+        con.close()
+        return True
+    except sqlite3.Error:
+        return False
+
+
+class FTS5Backend:
+    # SQLite FTS5 table living next to the content tables. Rows are kept in step
+    # by an after_flush hook, so they commit or roll back with the content change.
+    # The table is built by init-db or `flask search-reindex`, never by a search:
+    # until it exists, searches are answered by a MemoryBackend.
+    name = "fts5"
+
+    def __init__(self):
+        self._ready = False
+        self._lock = threading.Lock()
+        self._fallback = None
+
+    def _table_exists(self, conn):
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'")).first() is not None
+
+    def ready(self, conn):
+        if not self._ready:
+            self._ready = self._table_exists(conn)
+        return self._ready
+
+    def ensure_built(self):
+        with self._lock:
+            if not self.ready(db.session.connection()):
+                self.rebuild()
+
+    def rebuild(self):
+        conn = db.session.connection()
+        conn.execute(text("DROP TABLE IF EXISTS search_index"))
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE search_index USING fts5("
+            "title, body, keywords, kind UNINDEXED, ref_id UNINDEXED, prop_id UNINDEXED, section UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"))
+        for (pid,) in db.session.query(Property.id):
+            self._insert(conn, list(property_documents(pid)))
+        db.session.commit()
+        self._ready = True
+
+    def _insert(self, conn, docs):
+        if docs:
+            conn.execute(text(
+                "INSERT INTO search_index (title, body, keywords, kind, ref_id, prop_id, section) "
+                "VALUES (:title, :body, :keywords, :kind, :ref_id, :prop_id, :section)"), docs)
+
+    def apply(self, conn, upserts, deletes):
+        if not self.ready(conn):
+            return  # the build will pick these rows up
+        for kind, ref_id in deletes + [(d["kind"], d["ref_id"]) for d in upserts]:
+            conn.execute(text("DELETE FROM search_index WHERE kind = :kind AND ref_id = :ref_id"),
+                         {"kind": kind, "ref_id": ref_id})
+        self._insert(conn, [d for d in upserts if d["prop_id"] is not None])
+
+    def reindex(self, conn, prop_ids):
+        if not self.ready(conn):
+            return
+        for pid in prop_ids:
+            conn.execute(text("DELETE FROM search_index WHERE prop_id = :pid"), {"pid": pid})
+            self._insert(conn, list(property_documents(pid)))
+
+    def search(self, prop_id, query, limit):
+        if not self.ready(db.session.connection()):
+            if self._fallback is None:
+                current_app.logger.warning("search_index is missing; run `flask search-reindex`")
+                self._fallback = MemoryBackend()
+            return self._fallback.search(prop_id, query, limit)
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Every term must match; the last one is a prefix so results update as you type.
+        match = " AND ".join(f'"{t}"' for t in terms[:-1])
+        match = (match + " AND " if match else "") + f'"{terms[-1]}"*'
+        rows = db.session.execute(text(
+            "SELECT kind, ref_id, section, "
+            "highlight(search_index, 0, :o, :c) AS title, "
+            "snippet(search_index, 1, :o, :c, '…', 16) AS snippet "
+            "FROM search_index WHERE search_index MATCH :match AND prop_id = :pid "
+            "ORDER BY bm25(search_index, 4.0, 1.0, 2.0) LIMIT :limit"),
+            {"o": HL_OPEN, "c": HL_CLOSE, "match": match, "pid": prop_id, "limit": limit})
+        return [dict(r._mapping) for r in rows]
+
+
+class MemoryBackend:
+    # In-process inverted index per property, rebuilt when the property's
+    # content_version moves (so every worker notices edits made by the others).
+    name = "memory"
+
+    def __init__(self):
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def apply(self, conn, upserts, deletes):
+        pass
+
+    def reindex(self, conn, prop_ids):
+        pass  # content_version moved, so the next search rebuilds
+
+    def ensure_built(self):
+        pass  # built per property on demand
+
+    def rebuild(self):
+        with self._lock:
+            self._indexes.clear()
+
+    def _index_for(self, prop_id):
+        version = db.session.query(Property.content_version).filter_by(id=prop_id).scalar()
+        idx = self._indexes.get(prop_id)
+        if idx is None or idx.version != version:
+            idx = _InvertedIndex(version, property_documents(prop_id))
+            with self._lock:
+                self._indexes[prop_id] = idx
+        return idx
+
+    def search(self, prop_id, query, limit):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        return self._index_for(prop_id).search(terms, limit)
+
+
+class _InvertedIndex:
+    def __init__(self, version, docs):
+        self.version = version
+        self.docs = []
+        self.postings = {}
+        for doc in docs:
+            i = len(self.docs)
+            self.docs.append(doc)
+            for weight, field in ((4, "title"), (1, "body"), (2, "keywords")):
+                for tok in tokenize(doc[field]):
+                    entry = self.postings.setdefault(tok, {})
+                    entry[i] = entry.get(i, 0) + weight
+        self.vocab = sorted(self.postings)
+
+    def _expand(self, term, prefix):
+        if not prefix:
+            return [term] if term in self.postings else []
+        out = []
+        i = bisect_left(self.vocab, term)
+        while i < len(self.vocab) and self.vocab[i].startswith(term):
+            out.append(self.vocab[i]); i += 1
+        return out
+
+    def search(self, terms, limit):
+        n = len(self.docs) or 1
+        scores, matched = None, set()
+        for pos, term in enumerate(terms):
+            words = self._expand(term, prefix=pos == len(terms) - 1)
+            term_scores = {}
+            for w in words:
+                idf = math.log(1 + n / len(self.postings[w]))
+                for i, tf in self.postings[w].items():
+                    term_scores[i] = term_scores.get(i, 0) + tf * idf
+            matched.update(words)
+            scores = term_scores if scores is None else {
+                i: s + term_scores[i] for i, s in scores.items() if i in term_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda kv: -kv[1])[:limit]
+        results = []
+        for i, _ in ranked:
+            doc = self.docs[i]
+            results.append({"kind": doc["kind"], "ref_id": doc["ref_id"], "section": doc["section"],
+                            "title": _mark(doc["title"], matched),
+                            "snippet": _snippet(doc["body"], matched)})
+        return results
+
+
+def _mark(value, words):
+    return TOKEN_RE.sub(lambda m: f"{HL_OPEN}{m.group(0)}{HL_CLOSE}" if m.group(0).lower() in words else m.group(0),
+                        value or "")
+
+
+def _snippet(body, words, width=16):
+    tokens = list(TOKEN_RE.finditer(body or ""))
+    hit = next((k for k, m in enumerate(tokens) if m.group(0).lower() in words), 0)
+    start = max(0, hit - width // 4)
+    end = min(len(tokens), start + width)
+    if not tokens:
+        return ""
+    chunk = body[tokens[start].start():tokens[end - 1].end()]
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(tokens) else ""
+    return prefix + _mark(chunk, words) + suffix
+
+
+class SearchIndex:
+    # Per-property search over FAQs, how-tos, rules, issue flows and local places.
+    # SEARCH_BACKEND: auto (FTS5 on SQLite when compiled in, else memory) / fts5 / memory.
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SEARCH_BACKEND", "auto")
+        app.extensions["search"] = self
+        self.app = app
+        event.listen(Session, "after_flush", self._after_flush)
+
+    def _backend(self):
+        if self.backend is None:
+            choice = self.app.config["SEARCH_BACKEND"]
+            if choice == "auto":
+                is_sqlite = db.engine.dialect.name == "sqlite"
+                choice = "fts5" if is_sqlite and fts5_available() else "memory"
+            self.backend = FTS5Backend() if choice == "fts5" else MemoryBackend()
+        return self.backend
+
+    def search(self, prop_id, query, limit=20):
+        return self._backend().search(prop_id, query, limit)
+
+    def rebuild(self):
+        self._backend().rebuild()
+
+    def ensure_built(self):
+        """Build the index if it doesn't exist yet (called by init_db)."""
+        self._backend().ensure_built()
+
+    def reindex(self, prop_ids):
+        # For writes that bypass the ORM flush (bulk imports); runs in the caller's transaction.
+        self._backend().reindex(db.session.connection(), prop_ids)
+
+    def _after_flush(self, session, flush_context):
+        # The listener is global; only this app's sessions are its business.
+        if not has_app_context() or current_app._get_current_object() is not self.app:
+            return
+        # Still sees the pre-flush new/dirty/deleted sets, with ids assigned.
+        changed = [o for o in list(session.new) + list(session.dirty) if type(o) in KIND_OF]
+        deleted = [o for o in session.deleted if type(o) in KIND_OF]
+        if not changed and not deleted:
+            return
+        upserts = [document(o) for o in changed if o in session.new or session.is_modified(o)]
+        deletes = [(KIND_OF[type(o)], o.id) for o in deleted]
+        self._backend().apply(session.connection(), upserts, deletes)
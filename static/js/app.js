@@ -3,14 +3,18 @@
   const t = params.get('theme');
   if(t){ document.documentElement.classList.add('theme-'+t); }
 })();
-document.addEventListener('DOMContentLoaded', () => {
-  const gallery = document.querySelectorAll('#gallery img[data-maybe]');
+function initGallery(root){
+  const gallery = root.querySelectorAll('#gallery img[data-maybe]');
   gallery.forEach(img => {
     const url = img.getAttribute('data-maybe'); if(!url) return;
+    const srcset = img.getAttribute('data-srcset');
+    if(srcset) img.srcset = srcset;
+    img.loading = 'lazy'; img.decoding = 'async';
     img.src = url; img.onerror = () => { const ph = img.closest('.ph'); if(ph) ph.style.display='none'; };
-    img.onclick = () => openLightbox(url);
+    img.onclick = () => openLightbox(img.getAttribute('data-full') || url);
   });
-});
+}
+document.addEventListener('DOMContentLoaded', () => initGallery(document));
 function openLightbox(src){
   let lb = document.getElementById('lightbox');
   if(!lb){
@@ -28,36 +32,96 @@ function openLightbox(src){
 }
 
 
-// Enhance property navigation: load sections without full page refresh
+// Enhance property navigation: swap in server-rendered section fragments
+// without a full page refresh. Fragments are kept in a small LRU and the
+// neighbouring tabs are prefetched so switching feels instant. The server
+// logs a view when it renders a tab; one shown from the LRU is reported
+// with a beacon instead.
 document.addEventListener('DOMContentLoaded', () => {
   const main = document.querySelector('main.container');
-  if (!main) return;
+  if (!main || !main.querySelector('.prop-nav')) return;
+
+  const MAX_ENTRIES = 8, MAX_AGE_MS = 60000;
+  const cache = new Map();
+
+  function remember(url, html) {
+    cache.delete(url);
+    cache.set(url, { html, at: Date.now() });
+    while (cache.size > MAX_ENTRIES) cache.delete(cache.keys().next().value);
+  }
+
+  function cached(url) {
+    const hit = cache.get(url);
+    if (!hit || Date.now() - hit.at > MAX_AGE_MS) return null;
+    cache.delete(url); cache.set(url, hit);
+    return hit.html;
+  }
+
+  function fetchFragment(url, prefetch) {
+    const headers = { 'X-Requested-With': 'XMLHttpRequest' };
+    if (prefetch) headers['X-Prefetch'] = '1';
+    return fetch(url, { headers }).then(resp => {
+      if (!resp.ok) throw new Error(resp.status);
+      return resp.text();
+    }).then(html => {
+      // Statically exported pages ignore the header and send the full document.
+      if (/<html[\s>]/i.test(html)) {
+        const doc = new DOMParser().parseFromString(html, 'text/html');
+        const newMain = doc.querySelector('main.container');
+        if (!newMain) throw new Error('no main');
+        html = newMain.innerHTML;
+      }
+      remember(url, html);
+      return html;
+    });
+  }
+
+  function prefetchNeighbours() {
+    const links = Array.from(main.querySelectorAll('.prop-nav a'));
+    const i = links.findIndex(a => a.classList.contains('active'));
+    if (i < 0) return;
+    const idle = window.requestIdleCallback || (fn => setTimeout(fn, 200));
+    idle(() => [links[i - 1], links[i + 1]].forEach(a => {
+      if (a && !cached(a.href)) fetchFragment(a.href, true).catch(() => {});
+    }));
+  }
+
+  function show(html) {
+    main.innerHTML = html;
+    initGallery(main);
+    attachPropNavHandlers();
+    prefetchNeighbours();
+  }
+
+  function countView(url) {
+    const nav = main.querySelector('.prop-nav');
+    const m = new URL(url, location.href).pathname.match(/^\/p\/[^/]+\/?([^/]*)$/);
+    if (!nav || !nav.dataset.viewUrl || !m || !navigator.sendBeacon) return;
+    navigator.sendBeacon(nav.dataset.viewUrl, new URLSearchParams({ section: m[1] || 'welcome' }));
+  }
+
+  function load(url) {
+    const html = cached(url);
+    if (html === null) return fetchFragment(url, false);
+    countView(url);
+    return Promise.resolve(html);
+  }
 
   function attachPropNavHandlers() {
     const nav = main.querySelector('.prop-nav');
     if (!nav) return;
     nav.querySelectorAll('a').forEach(link => {
       link.addEventListener('click', (e) => {
-        const href = link.getAttribute('href');
+        const href = link.href;
         if (!href) return;
         // Let modified/blank-target clicks behave normally
         if (link.target === '_blank' || e.metaKey || e.ctrlKey || e.shiftKey || e.altKey) return;
 
         e.preventDefault();
-        fetch(href, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
-          .then(resp => resp.text())
+        load(href)
           .then(html => {
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(html, 'text/html');
-            const newMain = doc.querySelector('main.container');
-            if (!newMain) {
-              // Fallback: if something went wrong, just navigate normally
-              window.location.href = href;
-              return;
-            }
-            main.innerHTML = newMain.innerHTML;
+            show(html);
             history.pushState({ url: href }, '', href);
-            attachPropNavHandlers();
             window.scrollTo({ top: 0, behavior: 'smooth' });
           })
           .catch(() => {
@@ -67,20 +131,67 @@ document.addEventListener('DOMContentLoaded', () => {
     });
   }
 
+  if (!main.querySelector('.flash-wrap')) remember(location.href, main.innerHTML);
   attachPropNavHandlers();
+  prefetchNeighbours();
 
   window.addEventListener('popstate', (event) => {
     const url = (event.state && event.state.url) || window.location.href;
-    fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
-      .then(resp => resp.text())
-      .then(html => {
-        const parser = new DOMParser();
-        const doc = parser.parseFromString(html, 'text/html');
-        const newMain = doc.querySelector('main.container');
-        if (!newMain) return;
-        main.innerHTML = newMain.innerHTML;
-        attachPropNavHandlers();
-      })
-      .catch(() => {});
+    load(url).then(show).catch(() => { window.location.href = url; });
   });
 });
+
+// As-you-type search: the nav search box asks /p/<slug>/search?format=json
+// and lists the top hits under the field (delegated, so it survives section swaps).
+// Static exports render no search form, so nothing here fires on them.
+(function(){
+  let timer = null, seq = 0;
+  function render(box, data) {
+    if (!data.results.length) { box.hidden = true; box.innerHTML = ''; return; }
+    box.innerHTML = data.results.map(r =>
+      '<a class="hit" href="' + r.url + '"><strong>' + r.title + '</strong>' +
+      (r.snippet ? '<span class="muted">' + r.snippet + '</span>' : '') + '</a>').join('');
+    box.hidden = false;
+  }
+  document.addEventListener('input', (e) => {
+    const input = e.target;
+    if (!input.matches || !input.matches('.prop-search input[name=q]')) return;
+    const form = input.closest('form'), box = form.querySelector('.prop-search-results');
+    clearTimeout(timer);
+    const q = input.value.trim();
+    if (q.length < 2) { box.hidden = true; return; }
+    timer = setTimeout(() => {
+      const mine = ++seq;
+      fetch(form.action + '?format=json&limit=8&q=' + encodeURIComponent(q), { headers: { 'Accept': 'application/json' } })
+        .then(resp => resp.json())
+        .then(data => { if (mine === seq) render(box, data); })
+        .catch(() => {});
+    }, 150);
+  });
+  document.addEventListener('click', (e) => {
+    document.querySelectorAll('.prop-search-results').forEach(box => {
+      if (!box.closest('form').contains(e.target)) box.hidden = true;
+    });
+  });
+})();
+
+// Offline manual: the service worker precaches this property's manifest and
+// holds contact-form posts made without signal until the guest is back online.
+(function(){
+  const meta = document.querySelector('meta[name="offline-manifest"]');
+  if (!meta || !('serviceWorker' in navigator)) return;
+  navigator.serviceWorker.register(meta.dataset.sw, { scope: '/p/' }).catch(() => {});
+  navigator.serviceWorker.ready.then(reg => {
+    reg.active.postMessage({ type: 'precache', manifest: meta.content });
+    window.addEventListener('online', () => reg.active && reg.active.postMessage({ type: 'online' }));
+  });
+  document.addEventListener('DOMContentLoaded', () => {
+    if (location.hash !== '#message-queued') return;
+    const main = document.querySelector('main.container');
+    const note = document.createElement('div');
+    note.className = 'flash-wrap';
+    note.innerHTML = '<div class="flash ok">You are offline — your message will be sent as soon as you are back online.</div>';
+    if (main) main.prepend(note);
+    history.replaceState(history.state, '', location.pathname + location.search);
+  });
+})();
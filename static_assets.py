@@ -0,0 +1,123 @@
+import os, json, gzip, hashlib, mimetypes
+from flask import send_file, g, abort
+from werkzeug.security import safe_join
+from compression import brotli, negotiate
+import storage
+
+COMPRESSORS = {"gzip": lambda data: gzip.compress(data, 9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS = {"br": lambda data: brotli.compress(data, quality=11), **COMPRESSORS}
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Images and fonts are compressed formats already.
+COMPRESSIBLE = {".css", ".js", ".mjs", ".map", ".json", ".svg", ".txt", ".html", ".xml"}
+MIN_SIZE = 256
+
+
+def fingerprint(name, digest):
+    root, ext = os.path.splitext(name)
+    return f"{root}.{digest}{ext}"
+
+
+class StaticAssets:
+    # Content-hashed copies of static/ in STATIC_BUILD_DIR, e.g.
+    # css/style.css -> css/style.<sha256[:10]>.css, plus .gz/.br variants of text
+    # files. url_for("static", ...) points at the hashed name, which is served
+    # with a year-long immutable Cache-Control and the best encoding the client
+    # accepts. Built at startup (only new hashes are written) or with
+    # `flask static-build`; a build that is already current is used as is, so a
+    # read-only deploy that ran `flask static-build` can start. Older builds stay
+    # on disk, so pages rendered before a deploy keep working.
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("STATIC_FINGERPRINT", True)
+        app.config.setdefault("STATIC_BUILD_DIR", os.path.join(app.instance_path, "static_build"))
+        self.app = app
+        self.root = app.config["STATIC_BUILD_DIR"]
+        app.extensions["static_assets"] = self
+        if not app.config["STATIC_FINGERPRINT"]:
+            return
+        if self.load() is None:
+            self.build()
+        app.url_defaults(self._url_defaults)
+        app.view_functions["static"] = self.serve
+
+    def _files(self):
+        # (name, contents, hashed name) of every file in static/
+        for dirpath, dirs, files in os.walk(self.app.static_folder):
+            dirs.sort()
+            for fname in sorted(files):
+                path = os.path.join(dirpath, fname)
+                name = os.path.relpath(path, self.app.static_folder).replace(os.sep, "/")
+                with open(path, "rb") as f:
+                    data = f.read()
+                yield name, data, fingerprint(name, hashlib.sha256(data).hexdigest()[:10])
+
+    def load(self):
+        """Use the existing build if it matches static/; returns the manifest, or
+        None when a build is needed. Writes nothing."""
+        try:
+            with open(os.path.join(self.root, "manifest.json")) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Each hashed file is written after its compressed variants.
+        if manifest != {name: hashed for name, _, hashed in self._files()} or not all(
+                os.path.isfile(os.path.join(self.root, hashed)) for hashed in manifest.values()):
+            return None
+        self.manifest = manifest
+        return manifest
+
+    def build(self):
+        """Hash, copy and precompress every static file; returns the manifest."""
+        manifest = {}
+        for name, data, hashed in self._files():
+            target = os.path.join(self.root, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE and len(data) >= MIN_SIZE:
+                for enc, compress in COMPRESSORS.items():
+                    if not os.path.exists(target + SUFFIXES[enc]):
+                        blob = compress(data)
+                        if len(blob) < len(data):
+                            storage.atomic_write(target + SUFFIXES[enc], blob)
+            if not os.path.exists(target):
+                storage.atomic_write(target, data)
+            manifest[name] = hashed
+        os.makedirs(self.root, exist_ok=True)
+        storage.atomic_write(os.path.join(self.root, "manifest.json"),
+                      json.dumps(manifest, indent=2, sort_keys=True).encode())
+        self.manifest = manifest
+        return manifest
+
+    def _url_defaults(self, endpoint, values):
+        # The static export copies static/ as is, so it keeps the plain names.
+        if endpoint == "static" and not g.get("static_export"):
+            hashed = self.manifest.get(values.get("filename"))
+            if hashed:
+                values["filename"] = hashed
+
+    def serve(self, filename):
+        if filename.endswith(tuple(SUFFIXES.values())):
+            # Precompressed siblings are only sent via negotiation, with Content-Encoding set.
+            abort(404)
+        path = safe_join(self.root, filename)
+        if path is None or filename == "manifest.json" or not os.path.isfile(path):
+            # Not a fingerprinted name (an old bookmark, a hand-written link).
+            return self.app.send_static_file(filename)
+        available = [enc for enc, suffix in SUFFIXES.items() if os.path.isfile(path + suffix)]
+        enc = negotiate(available)
+        resp = send_file(path + SUFFIXES[enc] if enc else path,
+                         mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                         etag=f"{os.path.basename(path)}-{enc or 'identity'}",
+                         max_age=31536000, conditional=True)
+        resp.cache_control.public = True
+        resp.cache_control.immutable = True
+        if enc:
+            resp.content_encoding = enc
+        if available:
+            resp.vary.add("Accept-Encoding")
+        return resp
@@ -0,0 +1,96 @@
+import os, json, shutil, hashlib
+from flask import render_template, g
+from models import Property, HowTo
+import loading
+from qr_cache import render as render_qr
+
+SECTIONS = ["welcome", "check-in", "rules", "how-to", "issues", "emergency",
+            "local", "checkout", "faqs", "social", "print", "reviews"]
+CONTENT_RELATIONS = ["contacts", "rules", "howtos", "issues", "emergencies", "locals",
+                     "checkin_steps", "checkout_steps", "faqs"]
+MANIFEST = ".export-manifest.json"
+
+
+def _row(obj):
+    return {c.key: getattr(obj, c.key) for c in obj.__table__.columns}
+
+
+def content_hash(prop, base_url="", release=""):
+    # `release` covers the templates and static files the pages are rendered with.
+    data = {"base_url": base_url, "release": release, "property": _row(prop)}
+    for rel in CONTENT_RELATIONS:
+        data[rel] = sorted((_row(o) for o in getattr(prop, rel)), key=lambda r: r["id"])
+    raw = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with open(path, mode, **({} if mode == "wb" else {"encoding": "utf-8"})) as f:
+        f.write(data)
+
+
+def _render(app, base_url, path, template, **ctx):
+    with app.test_request_context(path, base_url=base_url):
+        # No image proxy in the export; pages link the original images.
+        g.static_export = True
+        return render_template(template, **ctx)
+
+
+def export_property(app, out_dir, base_url, slug):
+    root = os.path.join(out_dir, "p", slug)
+    shutil.rmtree(root, ignore_errors=True)
+    for section in SECTIONS:
+        prop = loading.property_for(section, slug=slug).one()
+        path = f"/p/{slug}" if section == "welcome" else f"/p/{slug}/{section}"
+        html = _render(app, base_url, path, f"property/{section}.html", p=prop, section=section)
+        _write(os.path.join(out_dir, path.lstrip("/"), "index.html"), html)
+    prop = loading.property_for("howto_detail", slug=slug).one()
+    for h in HowTo.query.filter_by(prop_id=prop.id):
+        path = f"/p/{slug}/howto/{h.id}"
+        html = _render(app, base_url, path, "property/howto_detail.html", p=prop, h=h)
+        _write(os.path.join(out_dir, path.lstrip("/"), "index.html"), html)
+    _write(os.path.join(root, "qr.png"), render_qr(f"{base_url.rstrip('/')}/p/{slug}"))
+    # The print section links /p/<slug>/manual.pdf and manual.html.
+    artifacts = app.extensions.get("print_artifacts")
+    if artifacts is not None:
+        for fmt in ("pdf", "html"):
+            found = artifacts.get(prop.id, fmt, base_url.rstrip("/") + "/")
+            if found:
+                shutil.copyfile(found[0], os.path.join(root, f"manual.{fmt}"))
+
+
+def export_all(app, out_dir, base_url, force=False, release=""):
+    """Render every guest manual into `out_dir`.
+
+    Only properties whose content hash (content, base URL and `release`)
+    changed since the last run are re-rendered unless `force` is set.
+    Returns (exported, skipped, removed) slugs.
+    """
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    try:
+        with open(manifest_path) as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        previous = {}
+
+    exported, skipped, current = [], [], {}
+    for prop in Property.query.order_by(Property.id):
+        digest = content_hash(prop, base_url, release)
+        current[prop.slug] = digest
+        if not force and previous.get(prop.slug) == digest:
+            skipped.append(prop.slug)
+            continue
+        export_property(app, out_dir, base_url, prop.slug)
+        exported.append(prop.slug)
+
+    removed = [slug for slug in previous if slug not in current]
+    for slug in removed:
+        shutil.rmtree(os.path.join(out_dir, "p", slug), ignore_errors=True)
+
+    props = Property.query.order_by(Property.name).all()
+    _write(os.path.join(out_dir, "index.html"), _render(app, base_url, "/", "index.html", props=props))
+    shutil.copytree(app.static_folder, os.path.join(out_dir, "static"), dirs_exist_ok=True)
+    _write(manifest_path, json.dumps(current, indent=2, sort_keys=True))
+    return exported, skipped, removed
@@ -0,0 +1,61 @@
+import os, tempfile
+from models import db
+
+
+def atomic_write(path, data):
+    """Write bytes to `path` through a temp file and a rename, so readers
+    (other workers, nginx) never see a half-written file."""
+    d = os.path.dirname(path)
+    os.makedirs(d, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=d, prefix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _dialect_insert(model):
+    # insert() with ON CONFLICT support for the model's bind, or None.
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert
+
+
+def add_counts(model, keys, rows):
+    """Add each row's "count" to the stored row with the same `keys` columns,
+    inserting the ones that don't exist yet. Runs in the caller's transaction."""
+    insert = _dialect_insert(model)
+    if insert is not None:
+        stmt = insert(model)
+        stmt = stmt.on_conflict_do_update(index_elements=keys,
+                                          set_={"count": model.count + stmt.excluded["count"]})
+        db.session.execute(stmt, rows)
+        return
+    for row in rows:
+        res = db.session.execute(
+            db.update(model)
+            .where(*(getattr(model, k) == row[k] for k in keys))
+            .values(count=model.count + row["count"]))
+        if res.rowcount == 0:
+            db.session.execute(db.insert(model), [row])
+
+
+def insert_ignore(model, keys, rows):
+    """Insert rows, skipping any whose `keys` columns already exist (another
+    worker may have inserted them first). Runs in the caller's transaction."""
+    insert = _dialect_insert(model)
+    if insert is not None:
+        db.session.execute(insert(model).on_conflict_do_nothing(index_elements=keys), rows)
+    else:
+        db.session.execute(db.insert(model), rows)
@@ -0,0 +1,205 @@
+// Guest manual service worker, release {{ release }}.
+// Registered with scope /p/ by static/js/app.js on property pages.
+{% if enabled %}
+const RELEASE = {{ release|tojson }};
+const PREFIX = 'gm:';                       // gm:<slug>:<manifest version> per property
+const ASSETS = PREFIX + 'assets:' + RELEASE; // static files / images fetched outside a precache
+const CHECK_EVERY_MS = 5 * 60 * 1000;       // manifest revalidation per property, at most
+const NEVER_CACHE = /\/(search|offline\.json|manual\.(pdf|html))$/;
+const MATCH = { ignoreVary: true };
+
+const current = new Map();  // slug -> cache name
+const checked = new Map();  // manifest URL -> last check
+let freshNext = false;      // a message was just posted: show the server's flash
+
+self.addEventListener('install', () => self.skipWaiting());
+
+self.addEventListener('activate', (event) => {
+  event.waitUntil(caches.keys().then(names => Promise.all(
+    names.filter(n => n.startsWith(PREFIX + 'assets:') && n !== ASSETS).map(n => caches.delete(n))
+  )).then(() => self.clients.claim()));
+});
+
+function slugOf(url) {
+  const m = url.pathname.match(/^\/p\/([^/]+)/);
+  return m ? decodeURIComponent(m[1]) : null;
+}
+
+async function cacheFor(slug) {
+  if (!slug) return ASSETS;
+  if (!current.has(slug)) {
+    const names = (await caches.keys()).filter(n => n.startsWith(PREFIX + slug + ':'));
+    if (names.length) current.set(slug, names[names.length - 1]);
+  }
+  return current.get(slug) || ASSETS;
+}
+
+// ---- Precache (keyed on the manifest version) ----
+async function precache(manifestUrl) {
+  const resp = await fetch(manifestUrl, { cache: 'no-cache' });
+  if (!resp.ok) return;
+  const m = await resp.json();
+  const name = PREFIX + m.slug + ':' + m.version;
+  if (current.get(m.slug) === name && await caches.has(name)) return;
+  const cache = await caches.open(name);
+  const queue = m.urls.slice();
+  const worker = async () => {
+    for (let url = queue.shift(); url; url = queue.shift()) {
+      if (await cache.match(url, MATCH)) continue;
+      try {
+        const r = await fetch(url, { headers: { 'X-Prefetch': '1' } });
+        if (r.ok) await cache.put(url, r);
+      } catch (e) { /* offline again; the next check resumes */ }
+    }
+  };
+  await Promise.all([worker(), worker(), worker(), worker()]);
+  current.set(m.slug, name);
+  const stale = (await caches.keys()).filter(n => n.startsWith(PREFIX + m.slug + ':') && n !== name);
+  await Promise.all(stale.map(n => caches.delete(n)));
+}
+
+function maybeCheck(manifestUrl) {
+  if (Date.now() - (checked.get(manifestUrl) || 0) < CHECK_EVERY_MS) return Promise.resolve();
+  checked.set(manifestUrl, Date.now());
+  return precache(manifestUrl).catch(() => {});
+}
+
+// ---- Runtime caching ----
+function cacheKey(request) {
+  // Section fragments (app.js XHR navigation) share the page URL.
+  if (request.headers.get('X-Requested-With') !== 'XMLHttpRequest') return request.url;
+  return request.url + (request.url.includes('?') ? '&' : '?') + '_fragment=1';
+}
+
+function storable(resp) {
+  return resp.ok && resp.type === 'basic' && !/no-store/.test(resp.headers.get('Cache-Control') || '');
+}
+
+async function staleWhileRevalidate(event, slug) {
+  const request = event.request, key = cacheKey(request);
+  const cache = await caches.open(await cacheFor(slug));
+  const network = fetch(request).then(async resp => {
+    if (storable(resp)) await cache.put(key, resp.clone());
+    return resp;
+  });
+  const hit = freshNext && request.mode === 'navigate' ? null :
+    (await cache.match(key, MATCH)) || (await caches.match(key, MATCH));
+  if (request.mode === 'navigate') freshNext = false;
+  if (hit) {
+    event.waitUntil(network.catch(() => {}));
+    return hit;
+  }
+  try {
+    return await network;
+  } catch (e) {
+    if (request.mode === 'navigate' && slug) {
+      const home = await caches.match('/p/' + encodeURIComponent(slug), MATCH);
+      if (home) return home;
+    }
+    throw e;
+  }
+}
+
+async function cacheFirst(event) {
+  const hit = await caches.match(event.request, MATCH);
+  if (hit) return hit;
+  const resp = await fetch(event.request);
+  if (storable(resp)) {
+    const cache = await caches.open(ASSETS);
+    await cache.put(event.request, resp.clone());
+  }
+  return resp;
+}
+
+// ---- Offline messages (create_message) ----
+function openOutbox() {
+  return new Promise((resolve, reject) => {
+    const req = indexedDB.open('gm-outbox', 1);
+    req.onupgradeneeded = () => req.result.createObjectStore('messages', { keyPath: 'id', autoIncrement: true });
+    req.onsuccess = () => resolve(req.result);
+    req.onerror = () => reject(req.error);
+  });
+}
+
+function outbox(mode, fn) {
+  return openOutbox().then(db => new Promise((resolve, reject) => {
+    const tx = db.transaction('messages', mode);
+    const result = fn(tx.objectStore('messages'));
+    tx.oncomplete = () => resolve(result && result.result);
+    tx.onerror = () => reject(tx.error);
+  }));
+}
+
+async function sendMessage(event) {
+  const request = event.request;
+  const body = await request.clone().text();
+  try {
+    const resp = await fetch(request);
+    freshNext = true;
+    event.waitUntil(replay());
+    return resp;
+  } catch (e) {
+    await outbox('readwrite', store => store.add({
+      url: request.url, body, type: request.headers.get('Content-Type'), queued: Date.now()
+    }));
+    if (self.registration.sync) self.registration.sync.register('gm-outbox').catch(() => {});
+    const back = request.referrer || new URL(request.url).pathname.replace(/\/message$/, '');
+    return Response.redirect(back.split('#')[0] + '#message-queued', 303);
+  }
+}
+
+let replaying = null;
+function replay() {
+  // One replay at a time, or a message could be sent twice.
+  replaying = replaying || (async () => {
+    const queued = await outbox('readonly', store => store.getAll());
+    for (const m of queued) {
+      const resp = await fetch(m.url, {
+        method: 'POST', body: m.body, headers: { 'Content-Type': m.type }, redirect: 'manual'
+      });
+      if (resp.status >= 500) break;  // try again later
+      await outbox('readwrite', store => store.delete(m.id));
+    }
+  })().catch(() => {}).finally(() => { replaying = null; });
+  return replaying;
+}
+
+self.addEventListener('sync', (event) => {
+  if (event.tag === 'gm-outbox') event.waitUntil(replay());
+});
+
+self.addEventListener('message', (event) => {
+  const data = event.data || {};
+  if (data.type === 'precache') event.waitUntil(maybeCheck(new URL(data.manifest, self.location).pathname));
+  if (data.type === 'online') event.waitUntil(replay());
+});
+
+self.addEventListener('fetch', (event) => {
+  const request = event.request, url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+  const slug = slugOf(url);
+  if (request.method === 'POST' && slug && url.pathname.endsWith('/message')) {
+    event.respondWith(sendMessage(event));
+    return;
+  }
+  if (request.method !== 'GET' || NEVER_CACHE.test(url.pathname)) return;
+  if (url.pathname.startsWith('/img/')) {
+    event.respondWith(cacheFirst(event));  // proxy URLs are immutable
+  } else if (url.pathname.startsWith('/static/')) {
+    event.respondWith(staleWhileRevalidate(event, null));
+  } else if (slug) {
+    if (request.mode === 'navigate') {
+      event.waitUntil(maybeCheck(url.pathname.match(/^\/p\/[^/]+/)[0] + '/offline.json').then(replay));
+    }
+    event.respondWith(staleWhileRevalidate(event, slug));
+  }
+});
+{% else %}
+// Offline mode is switched off (OFFLINE_ENABLED=0): drop the caches and step aside.
+self.addEventListener('install', () => self.skipWaiting());
+self.addEventListener('activate', (event) => {
+  event.waitUntil(caches.keys()
+    .then(names => Promise.all(names.filter(n => n.startsWith('gm:')).map(n => caches.delete(n))))
+    .then(() => self.registration.unregister()));
+});
+{% endif %}
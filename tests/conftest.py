@@ -0,0 +1,75 @@
+import os, sys, tempfile
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# app.py builds an app at import time; keep that one (and anything it writes)
+# out of the real instance folder.
+_IMPORT_DIR = tempfile.mkdtemp(prefix="guest-manual-tests-")
+os.environ.update(
+    DATABASE_URL="sqlite:///" + os.path.join(_IMPORT_DIR, "import.db"),
+    DB_INIT_MODE="off", PRINT_BACKGROUND="0", VIEW_BUFFER_ENABLED="0",
+    STATIC_BUILD_DIR=os.path.join(_IMPORT_DIR, "static_build"),
+    QR_CACHE_DIR=os.path.join(_IMPORT_DIR, "qr_cache"),
+    PRINT_DIR=os.path.join(_IMPORT_DIR, "print"),
+    IMAGE_CACHE_DIR=os.path.join(_IMPORT_DIR, "image_cache"),
+    PAGE_CACHE_DIR=os.path.join(_IMPORT_DIR, "page_cache"),
+)
+os.environ.pop("TELEMETRY_DATABASE_URL", None)
+os.environ.pop("CONTENT_REPLICA_URL", None)
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build a fresh app on its own SQLite file under tmp_path; env overrides as kwargs."""
+    import app as app_module
+    import bootstrap
+
+    def make(seed=True, init=True, **env):
+        settings = {
+            "DATABASE_URL": "sqlite:///" + str(tmp_path / "app.db"),
+            "STATIC_BUILD_DIR": str(tmp_path / "static_build"),
+            "QR_CACHE_DIR": str(tmp_path / "qr_cache"),
+            "PRINT_DIR": str(tmp_path / "print"),
+            "IMAGE_CACHE_DIR": str(tmp_path / "image_cache"),
+            "PAGE_CACHE_DIR": str(tmp_path / "page_cache"),
+        }
+        settings.update(env)
+        for key, value in settings.items():
+            monkeypatch.setenv(key, str(value))
+        app = app_module.create_app()
+        app.config["TESTING"] = True
+        if init:
+            bootstrap.init_db(app, with_seed=seed)
+        return app
+
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin(client):
+    with client.session_transaction() as s:
+        s["authed"] = True
+    return client
+
+
+@pytest.fixture
+def admin_of():
+    """A logged-in test client for any app (for tests that build several)."""
+    def make(app):
+        client = app.test_client()
+        with client.session_transaction() as s:
+            s["authed"] = True
+        return client
+    return make
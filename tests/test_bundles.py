@@ -0,0 +1,20 @@
+import io, sys
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def test_yaml_bundle_round_trip(admin):
+    resp = admin.get("/admin/properties/export?format=yaml")
+    assert resp.status_code == 200 and resp.mimetype == "application/yaml"
+    body = resp.data.replace(SLUG.encode(), b"copy-of-the-apartment")
+    resp = admin.post("/admin/properties/import", data={"bundle": (io.BytesIO(body), "bundle.yaml")})
+    assert resp.status_code == 302
+    assert admin.get("/p/copy-of-the-apartment/faqs").status_code == 200
+
+
+def test_missing_pyyaml_is_a_clear_400(admin, monkeypatch):
+    monkeypatch.setitem(sys.modules, "yaml", None)  # import yaml raises ImportError
+    resp = admin.get("/admin/properties/export?format=yaml")
+    assert resp.status_code == 400
+    assert b"pip install pyyaml" in resp.data
+    assert admin.get("/admin/properties/export?format=json").status_code == 200
@@ -0,0 +1,28 @@
+import pytest
+
+SLUG = "vibe-modern-rustic-apartment"
+GZIP = {"Accept-Encoding": "gzip"}
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.mark.parametrize("path", [f"/p/{SLUG}/faqs", f"/p/{SLUG}/howto/1"])
+def test_encoded_response_has_its_own_etag(client, path):
+    plain = client.get(path, headers=IDENTITY)
+    assert plain.content_encoding is None
+    tag, weak = plain.get_etag()
+    assert not weak
+    for _ in range(2):  # render, then (for sections) the page cache's compressed copy
+        gz = client.get(path, headers=GZIP)
+        assert gz.content_encoding == "gzip"
+        assert gz.get_etag() == (f"{tag}-gzip", False)
+
+
+@pytest.mark.parametrize("path", [f"/p/{SLUG}/faqs", f"/p/{SLUG}/howto/1"])
+def test_revalidating_either_representation_is_a_304(client, path):
+    tag = client.get(path, headers=IDENTITY).get_etag()[0]
+    resp = client.get(path, headers={**GZIP, "If-None-Match": f'"{tag}-gzip"'})
+    assert resp.status_code == 304
+    assert resp.get_etag() == (f"{tag}-gzip", False)
+    resp = client.get(path, headers={**IDENTITY, "If-None-Match": f'"{tag}"'})
+    assert resp.status_code == 304
+    assert client.get(path, headers={**GZIP, "If-None-Match": '"something-else"'}).status_code == 200
@@ -0,0 +1,54 @@
+import csv, io, gc, tracemalloc
+from datetime import datetime
+import pytest
+from models import db, Message
+import data_export
+
+
+def _add_messages(n, start=0):
+    now = datetime.utcnow()
+    rows = [{"property_id": 1, "name": f"Guest {i}", "contact": "guest@example.com", "category": "General",
+             "status": "unread", "body": "The heater makes a noise at night. " * 4, "created_at": now}
+            for i in range(start, start + n)]
+    db.session.execute(db.insert(Message), rows)
+    db.session.commit()
+
+
+def _peak(fmt, gzip=False):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        total = sum(len(chunk) for chunk in data_export.stream("messages", fmt, gzip=gzip))
+        return tracemalloc.get_traced_memory()[1], total
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize("fmt,gzip", [("csv", False), ("ndjson", True)])
+def test_stream_memory_is_flat_in_row_count(make_app, fmt, gzip):
+    app = make_app(seed=False)
+    with app.app_context():
+        _add_messages(10_000)
+        small, small_bytes = _peak(fmt, gzip)
+        _add_messages(90_000, start=10_000)
+        large, large_bytes = _peak(fmt, gzip)
+    assert large_bytes > 8 * small_bytes  # ten times the rows really went through
+    # Output grew tenfold; peak memory must not (allow noise, not proportional growth).
+    assert large < small * 1.5 + 256 * 1024, (small, large)
+
+
+def test_csv_neutralises_formula_cells(make_app):
+    app = make_app(seed=False)
+    with app.app_context():
+        db.session.add_all([
+            Message(property_id=1, name="=HYPERLINK(\"http://evil\")", contact="+123", category="@SUM(A1)",
+                    body="-2+3"),
+            Message(property_id=1, name="Ana", contact="ana@example.com", category="Keys", body="Lost key"),
+        ])
+        db.session.commit()
+        text = b"".join(data_export.stream("messages", "csv")).decode()
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert rows[0]["name"] == "'=HYPERLINK(\"http://evil\")"
+    assert (rows[0]["contact"], rows[0]["category"], rows[0]["body"]) == ("'+123", "'@SUM(A1)", "'-2+3")
+    assert (rows[1]["name"], rows[1]["body"]) == ("Ana", "Lost key")
+    assert rows[0]["property_id"] == "1"
@@ -0,0 +1,123 @@
+import io, os, time, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pytest
+from PIL import Image
+from images import ImageStore, ImageFetchError, supported_formats
+
+
+def _jpeg(width=1600, height=900):
+    buf = io.BytesIO()
+    Image.new("RGB", (width, height), (200, 120, 40)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+PHOTO = _jpeg()
+
+
+class Origin(BaseHTTPRequestHandler):
+    hits = {}
+
+    def do_GET(self):
+        Origin.hits[self.path] = Origin.hits.get(self.path, 0) + 1
+        if self.path.startswith("/slow"):
+            time.sleep(2)
+        if self.path.startswith("/big"):
+            body, ctype = b"\0" * (20 * 1024 * 1024 + 1), "image/jpeg"
+        elif self.path.startswith("/page"):
+            body, ctype = b"<html></html>", "text/html"
+        else:
+            body, ctype = PHOTO, "image/jpeg"
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def origin():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Origin)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ImageStore(str(tmp_path / "images"), "secret", timeout=0.5)
+
+
+def test_fetches_origin_once_and_resizes(store, origin):
+    url = origin + "/photo.jpg?a"
+    path, etag = store.variant(url, 640, "jpeg")
+    with Image.open(path) as img:
+        assert (img.format, img.width) == ("JPEG", 640)
+    store.variant(url, 320, "jpeg")
+    assert store.variant(url, 640, "jpeg") == (path, etag)
+    assert Origin.hits["/photo.jpg?a"] == 1
+
+
+def test_identical_bytes_share_one_origin_file(store, origin):
+    first = store.origin(origin + "/photo.jpg?b")
+    second = store.origin(origin + "/photo.jpg?c")
+    assert first == second
+    assert len(os.listdir(os.path.join(store.root, "orig"))) == 1
+
+
+def test_rejects_non_images_oversized_and_slow_origins(store, origin):
+    with pytest.raises(ImageFetchError, match="Not an image"):
+        store.origin(origin + "/page")
+    with pytest.raises(ImageFetchError, match="too large"):
+        store.origin(origin + "/big.jpg")
+    with pytest.raises(ImageFetchError):
+        store.origin(origin + "/slow.jpg")
+    with pytest.raises(ImageFetchError, match="Unsupported"):
+        store.origin("file:///etc/passwd")
+
+
+def test_signed_tokens(store):
+    token = store.token("http://example.com/a.jpg")
+    assert store.url_for_token(token) == "http://example.com/a.jpg"
+    assert store.url_for_token(token[:-2] + "xx") is None
+    assert ImageStore(store.root, "other-secret").url_for_token(token) is None
+
+
+def _proxy_path(app, url, variant="card"):
+    with app.test_request_context():
+        return app.jinja_env.globals["img_src"](url, variant)
+
+
+def test_proxy_route_negotiates_format(app, client, origin):
+    path = _proxy_path(app, origin + "/photo.jpg?d")
+    resp = client.get(path, headers={"Accept": "image/jpeg"})
+    assert resp.status_code == 200 and resp.mimetype == "image/jpeg"
+    assert "Accept" in resp.headers["Vary"] and "immutable" in resp.headers["Cache-Control"]
+    assert client.get(path, headers={"If-None-Match": resp.headers["ETag"]}).status_code == 304
+    for fmt in ("webp", "avif"):
+        accept = f"image/{fmt},image/*"
+        if fmt not in supported_formats():
+            assert client.get(path, headers={"Accept": accept}).mimetype == "image/jpeg"
+            continue
+        resp = client.get(path, headers={"Accept": accept})
+        assert resp.mimetype == f"image/{fmt}"
+        with Image.open(io.BytesIO(resp.data)) as img:
+            assert img.format == fmt.upper()
+
+
+def test_proxy_route_rejects_tampered_tokens(app, client, origin):
+    path = _proxy_path(app, origin + "/photo.jpg?e")
+    token = path.split("/")[2]
+    assert client.get(path.replace(token, token[:-2] + "xx")).status_code == 404
+    assert client.get(path.rsplit("/", 1)[0] + "/huge").status_code == 404
+
+
+def test_proxy_route_falls_back_to_origin_when_fetch_fails(app, client, origin):
+    path = _proxy_path(app, origin + "/big.jpg?f")
+    resp = client.get(path)
+    assert resp.status_code == 302 and resp.location == origin + "/big.jpg?f"
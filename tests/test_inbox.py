@@ -0,0 +1,86 @@
+from datetime import datetime
+from flask_migrate import upgrade
+from sqlalchemy import func, text
+import inbox
+from models import db, Message, MessageCount
+from test_migrations import MIGRATIONS
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def fresh_counts(pid):
+    # What the counters should say, straight from the message table.
+    q = (db.session.query(Message.category, Message.status, func.count(Message.id))
+         .filter(Message.property_id == pid).group_by(Message.category, Message.status))
+    return {(c, s): n for c, s, n in q}
+
+
+def stored_counts(pid):
+    q = (db.session.query(MessageCount.category, MessageCount.status, MessageCount.count)
+         .filter(MessageCount.property_id == pid, MessageCount.count != 0))
+    return {(c, s): n for c, s, n in q}
+
+
+def post(client, category, body="hi"):
+    return client.post(f"/p/{SLUG}/message", data={"name": "G", "category": category, "body": body})
+
+
+def test_paging_walks_ties_on_created_at_by_id(app):
+    same = datetime(2026, 5, 1, 12, 0)
+    with app.app_context():
+        db.session.add_all(Message(property_id=1, category="General", body=str(i), created_at=same)
+                           for i in range(5))
+        db.session.add(Message(property_id=1, category="General", body="newest",
+                               created_at=datetime(2026, 5, 2)))
+        db.session.commit()
+        seen, cursor = [], None
+        while True:
+            rows, cursor = inbox.page(1, cursor=cursor, limit=2)
+            seen += [m.body for m in rows]
+            if cursor is None:
+                break
+        assert seen == ["newest", "4", "3", "2", "1", "0"]
+
+
+def test_counters_follow_new_messages_and_status_changes(app, client):
+    post(client, "Keys")
+    post(client, "  Keys ")
+    post(client, "")
+    with app.app_context():
+        assert stored_counts(1) == {("Keys", "unread"): 2, ("General", "unread"): 1}
+        ids = [m.id for m in Message.query.filter_by(category="Keys")]
+        assert inbox.set_status(1, ids, "handled") == 2
+        assert inbox.set_status(1, ids, "handled") == 0  # already there; no double counting
+        db.session.commit()
+        assert stored_counts(1) == {("Keys", "handled"): 2, ("General", "unread"): 1} == fresh_counts(1)
+        c = inbox.counts(1)
+        assert c["total"] == 3
+        assert c["status"] == {"unread": 1, "read": 0, "handled": 2}
+        assert inbox.unread_by_property() == {1: 1}
+
+
+def test_recount_matches_a_fresh_count(app, client):
+    for category in ("Keys", "Wifi", "Keys"):
+        post(client, category)
+    with app.app_context():
+        db.session.execute(db.update(MessageCount).values(count=MessageCount.count + 7))
+        db.session.add(MessageCount(property_id=1, category="Gone", status="read", count=3))
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=["inbox-recount"])
+    assert result.exit_code == 0, result.output
+    with app.app_context():
+        assert stored_counts(1) == fresh_counts(1) == {("Keys", "unread"): 2, ("Wifi", "unread"): 1}
+
+
+def test_migration_backfills_counters(make_app):
+    app = make_app(init=False, FLASK_RUN_FROM_CLI="true")
+    with app.app_context():
+        upgrade(directory=MIGRATIONS, revision="7c1d2b9e4f60")
+        with db.engine.begin() as conn:
+            conn.execute(text("INSERT INTO property (id, slug, name) VALUES (1, 'p', 'P')"))
+            conn.execute(text(
+                "INSERT INTO message (property_id, category, body, created_at) VALUES "
+                "(1, 'Keys', 'a', '2026-01-01'), (1, NULL, 'b', '2026-01-02'), "
+                "(1, ' ', 'c', '2026-01-03'), (1, 'Keys', 'd', '2026-01-04')"))
+        upgrade(directory=MIGRATIONS)
+        assert stored_counts(1) == fresh_counts(1) == {("Keys", "unread"): 2, ("General", "unread"): 2}
@@ -0,0 +1,19 @@
+SLUG = "vibe-modern-rustic-apartment"
+LOCAL = {"REMOTE_ADDR": "127.0.0.1"}  # what every request looks like behind a local nginx
+
+
+def test_metrics_need_a_token(make_app):
+    client = make_app(INSTRUMENTATION_ENABLED=1, METRICS_TOKEN="").test_client()
+    assert client.get(f"/p/{SLUG}").headers["Server-Timing"]
+    assert client.get("/metrics", environ_base=LOCAL).status_code == 404
+
+
+def test_metrics_check_the_token(make_app):
+    client = make_app(INSTRUMENTATION_ENABLED=1, METRICS_TOKEN="s3cret").test_client()
+    client.get(f"/p/{SLUG}")
+    assert client.get("/metrics", environ_base=LOCAL).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get("/metrics", headers={"Authorization": "Bearer ünï"}).status_code == 403
+    resp = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200
+    assert b"guestmanual_" in resp.data
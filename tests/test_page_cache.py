@@ -0,0 +1,86 @@
+import os
+import pytest
+from page_cache import FileBackend
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+@pytest.mark.parametrize("encoding", [None, "gzip"])
+@pytest.mark.parametrize("backend", ["memory", "file"])
+def test_edit_through_another_worker_is_not_served_stale(make_app, tmp_path, backend, encoding):
+    # Two apps on one database stand in for two gunicorn workers.
+    worker_a = make_app(PAGE_CACHE_BACKEND=backend, PAGE_CACHE_DIR=tmp_path / "a")
+    worker_b = make_app(init=False, PAGE_CACHE_BACKEND=backend, PAGE_CACHE_DIR=tmp_path / "b")
+    worker_b.extensions["db_ready"] = True
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+    b = worker_b.test_client()
+
+    before = b.get(f"/p/{SLUG}/faqs", headers=headers)
+    assert b.get(f"/p/{SLUG}/faqs", headers=headers).get_data() == before.get_data()  # cached
+
+    admin = worker_a.test_client()
+    with admin.session_transaction() as s:
+        s["authed"] = True
+    admin.post("/admin/1/faq", data={"q": "Is there a sauna?", "a": "Yes, floor 2."})
+
+    after = b.get(f"/p/{SLUG}/faqs", headers=headers)
+    assert after.headers["ETag"] != before.headers["ETag"]
+    assert after.headers.get("Content-Encoding") == encoding
+    body = after.get_data()
+    if encoding:
+        import gzip
+        body = gzip.decompress(body)
+    assert b"Is there a sauna?" in body
+
+
+def test_file_backend_keeps_a_running_size(tmp_path):
+    backend = FileBackend(str(tmp_path), max_bytes=1000)
+    for i in range(10):
+        backend.set("g", f"k{i}", b"x" * 200)
+    assert backend._size <= 1000
+    assert backend._size == FileBackend._tree_size(str(tmp_path))
+    backend.set("g", "k9", b"y" * 100)  # replacing an entry counts the difference
+    assert backend._size == FileBackend._tree_size(str(tmp_path))
+    backend.delete_group("g")
+    assert backend._size == 0
+    assert backend.get("g", "k9") is None
+
+
+def test_file_backend_write_after_invalidation_is_dropped(tmp_path, monkeypatch):
+    backend = FileBackend(str(tmp_path), max_bytes=10_000)
+    backend.set("g", "k", b"old")
+    real_replace = os.replace
+
+    def invalidate_midway(src, dst):
+        backend.delete_group("g")  # an admin edit lands while this render is writing
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", invalidate_midway)
+    backend.set("g", "k", b"stale")
+    monkeypatch.setattr(os, "replace", real_replace)
+    assert backend.get("g", "k") is None
+
+
+def test_edit_turns_a_304_into_a_200(admin):
+    path = f"/p/{SLUG}/faqs"
+    tag = admin.get(path).headers["ETag"]
+    assert admin.get(path, headers={"If-None-Match": tag}).status_code == 304
+    admin.post("/admin/1/faq", data={"q": "Is there a sauna?", "a": "Yes, floor 2."})
+    resp = admin.get(path, headers={"If-None-Match": tag})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] != tag
+
+
+def test_concurrent_edits_each_move_the_version(app):
+    from models import db, Property, Rule
+    with app.app_context():
+        prop = db.session.get(Property, 1)
+        start = prop.content_version
+        rule = Rule.query.filter_by(prop_id=1).first()
+        # Another worker's edit commits after this session loaded the property.
+        with db.engine.begin() as conn:
+            conn.execute(db.update(Property).where(Property.id == 1)
+                         .values(content_version=Property.content_version + 1))
+        rule.title = "No parties"
+        db.session.commit()
+        assert db.session.get(Property, 1).content_version == start + 2
@@ -0,0 +1,82 @@
+import io, time, zipfile
+import pytest
+from models import db, Property
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def manual_html(app, host):
+    return app.test_client().get(f"/p/{SLUG}/manual.html", headers={"Host": host}).get_data(as_text=True)
+
+
+def test_manual_never_uses_the_request_host(make_app):
+    app = make_app(PUBLIC_BASE_URL="", PRINT_BACKGROUND="0")
+    html = manual_html(app, "evil.example")
+    assert f"http://localhost:5000/p/{SLUG}" in html
+    assert "evil.example" not in html
+    app.config["PUBLIC_BASE_URL"] = "https://manual.example.com"
+    assert f"https://manual.example.com/p/{SLUG}" in manual_html(app, "evil.example")
+
+
+def test_manual_for_a_property_deleted_mid_request_is_404(make_app, monkeypatch):
+    app = make_app(PRINT_BACKGROUND="0")
+    artifacts = app.extensions["print_artifacts"]
+    # The slug lookup saw the property; it is gone by the time the build runs.
+    monkeypatch.setattr(artifacts, "build", lambda prop_id, base_url: None)
+    assert app.test_client().get(f"/p/{SLUG}/manual.pdf").status_code == 404
+    with app.app_context():
+        pid = db.session.query(Property.id).filter_by(slug=SLUG).scalar()
+        db.session.delete(db.session.get(Property, pid))
+        db.session.commit()
+        assert artifacts.get(pid, "pdf") is None
+
+
+def wait_for(predicate, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def built(app, pid):
+    artifacts = app.extensions["print_artifacts"]
+    with app.app_context():
+        return all(artifacts.current(pid, fmt) for fmt in ("pdf", "html"))
+
+
+def test_edit_schedules_a_background_rebuild(make_app, admin_of):
+    app = make_app(PRINT_BACKGROUND="1", PRINT_REGEN_DELAY="0.05")
+    assert not built(app, 1)
+    admin_of(app).post("/admin/1/faq", data={"q": "Late check-out?", "a": "Ask us."})
+    assert wait_for(lambda: built(app, 1))
+    with app.app_context():
+        path, _ = app.extensions["print_artifacts"].current(1, "html")
+    html = open(path, encoding="utf-8").read()
+    assert "Late check-out?" in html
+
+
+def test_only_the_committing_app_schedules(make_app, admin_of, monkeypatch):
+    first = make_app(PRINT_BACKGROUND="1", PRINT_REGEN_DELAY="60")
+    second = make_app(PRINT_BACKGROUND="1", PRINT_REGEN_DELAY="60", init=False)
+    calls = []
+    for app in (first, second):
+        monkeypatch.setattr(app.extensions["print_artifacts"], "schedule",
+                            lambda ids, base_url=None, app=app: calls.append((app, set(ids))))
+    admin_of(second).post("/admin/1/faq", data={"q": "Pets?", "a": "No."})
+    assert calls == [(second, {1})]
+
+
+def test_zip_queues_stale_manuals_instead_of_building_them(make_app, admin_of, monkeypatch):
+    app = make_app(PRINT_BACKGROUND="1", PRINT_REGEN_DELAY="60")
+    artifacts = app.extensions["print_artifacts"]
+    monkeypatch.setattr(artifacts, "build", lambda *a: pytest.fail("built inside the request"))
+    scheduled = []
+    monkeypatch.setattr(artifacts, "schedule", lambda ids, base_url=None: scheduled.extend(ids))
+    resp = admin_of(app).get("/admin/print.zip")
+    assert resp.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(resp.data)) as zf:
+        assert zf.namelist() == ["STALE.txt"]
+        assert SLUG in zf.read("STALE.txt").decode()
+    assert scheduled == [1]
@@ -0,0 +1,53 @@
+import os
+from qr_cache import QRCache, public_url
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def qr_key(client, host):
+    # The ETag is the cache key, a hash of the URL the code points at.
+    resp = client.get(f"/p/{SLUG}/qr.svg", headers={"Host": host})
+    assert resp.status_code == 200
+    return resp.headers["ETag"].strip('"')
+
+
+def test_qr_points_at_public_base_url_not_request_host(make_app):
+    app = make_app(PUBLIC_BASE_URL="https://manual.example.com")
+    client = app.test_client()
+    expected = public_url(app, "property_home", slug=SLUG)
+    assert expected == f"https://manual.example.com/p/{SLUG}"
+    key = QRCache(app.config["QR_CACHE_DIR"]).key(expected, "svg", 10, 4)
+    assert qr_key(client, "evil.example") == key
+    assert qr_key(client, "other.example") == key
+
+
+def test_qr_falls_back_to_server_name_then_localhost(make_app):
+    app = make_app(PUBLIC_BASE_URL="")
+    assert public_url(app, "property_home", slug=SLUG) == f"http://localhost:5000/p/{SLUG}"
+    app.config.update(SERVER_NAME="guests.example.org", PREFERRED_URL_SCHEME="https")
+    assert public_url(app, "property_home", slug=SLUG) == f"https://guests.example.org/p/{SLUG}"
+
+
+def test_qr_cache_is_capped(tmp_path):
+    cache = QRCache(str(tmp_path), max_files=10)
+    first, _ = cache.get("https://x/p/0", "svg")
+    for i in range(1, 30):
+        cache.get(f"https://x/p/{i}", "svg")
+        cache.get("https://x/p/0", "svg")  # kept warm
+    files = [n for n in os.listdir(tmp_path) if not n.startswith(".tmp")]
+    assert len(files) <= 10
+    assert os.path.exists(first)
+    # A fresh instance picks up what is already on disk.
+    assert QRCache(str(tmp_path), max_files=10)._count == len(files)
+
+
+def test_qr_revalidates_and_follows_a_base_url_change(make_app):
+    app = make_app(PUBLIC_BASE_URL="https://old.example.com")
+    client = app.test_client()
+    resp = client.get(f"/p/{SLUG}/qr.png")
+    assert "no-cache" in resp.headers["Cache-Control"] and "immutable" not in resp.headers["Cache-Control"]
+    old = resp.headers["ETag"]
+    assert client.get(f"/p/{SLUG}/qr.png", headers={"If-None-Match": old}).status_code == 304
+    app.config["PUBLIC_BASE_URL"] = "https://new.example.com"
+    resp = client.get(f"/p/{SLUG}/qr.png", headers={"If-None-Match": old})
+    assert resp.status_code == 200 and resp.headers["ETag"] != old
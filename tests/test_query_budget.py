@@ -0,0 +1,55 @@
+import pytest
+from models import db, Property, Contact, Rule, HowTo, IssueFlow, Emergency, LocalPlace, CheckinStep, CheckoutStep, FAQ
+from static_export import SECTIONS
+import loading
+
+SLUG = "vibe-modern-rustic-apartment"
+CHILDREN = (Contact, Rule, HowTo, IssueFlow, Emergency, LocalPlace, CheckinStep, CheckoutStep, FAQ)
+
+
+def _row(model, pid, i):
+    values = {c.name: f"{model.__name__} {i}" for c in model.__table__.columns
+              if c.name not in ("id", "prop_id") and isinstance(c.type, (db.String, db.Text))}
+    if "step" in model.__table__.columns:
+        values["step"] = 100 + i
+    return model(prop_id=pid, **values)
+
+
+@pytest.fixture
+def budget_app(make_app):
+    # Page cache off so every request renders; views buffered as in production.
+    app = make_app(QUERY_BUDGET_MODE="raise", PAGE_CACHE_BACKEND="none", VIEW_BUFFER_ENABLED=1)
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    with app.app_context():
+        pid = db.session.query(Property.id).filter_by(slug=SLUG).scalar()
+        # Several rows per relationship, so a lazy load per row would show up.
+        db.session.add_all(_row(model, pid, i) for model in CHILDREN for i in range(5))
+        db.session.commit()
+    return app
+
+
+@pytest.mark.parametrize("section", SECTIONS)
+def test_section_stays_within_query_budget(budget_app, section):
+    client = budget_app.test_client()
+    path = f"/p/{SLUG}" if section == "welcome" else f"/p/{SLUG}/{section}"
+    # QueryBudgetExceeded propagates out of the test client and fails the test.
+    assert client.get(path).status_code == 200
+    assert client.get(path, headers={"X-Requested-With": "XMLHttpRequest"}).status_code == 200
+
+
+def test_howto_detail_and_manage_stay_within_budget(budget_app):
+    client = budget_app.test_client()
+    with budget_app.app_context():
+        ids = [h.id for h in HowTo.query.filter(HowTo.prop_id == 1)]
+    for hid in ids:
+        assert client.get(f"/p/{SLUG}/howto/{hid}").status_code == 200
+    with client.session_transaction() as s:
+        s["authed"] = True
+    assert client.get("/admin/property/1/manage").status_code == 200
+
+
+def test_lazy_load_in_a_template_raises(budget_app, monkeypatch):
+    # A section that stops eager-loading what its template walks must fail.
+    monkeypatch.setitem(loading.SECTION_LOADS, "faqs", ())
+    with pytest.raises(loading.QueryBudgetExceeded):
+        budget_app.test_client().get(f"/p/{SLUG}/faqs")
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import text
+import search
+from models import db
+
+SLUG = "vibe-modern-rustic-apartment"
+pytestmark = pytest.mark.skipif(not search.fts5_available(), reason="SQLite without FTS5")
+
+
+def has_index(app):
+    with app.app_context():
+        return db.session.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE name = 'search_index'")).first() is not None
+
+
+def hits(client, q):
+    resp = client.get(f"/p/{SLUG}/search?format=json&q={q}")
+    assert resp.status_code == 200
+    return resp.get_json()["results"]
+
+
+def test_init_db_builds_the_index_and_searches_never_rebuild(make_app, monkeypatch):
+    app = make_app(SEARCH_BACKEND="fts5")
+    assert has_index(app)
+    monkeypatch.setattr(search.FTS5Backend, "rebuild", lambda self: pytest.fail("rebuilt in a request"))
+    assert hits(app.test_client(), "wifi")
+
+
+def test_missing_index_falls_back_until_reindexed(make_app):
+    app = make_app(SEARCH_BACKEND="fts5")
+    with app.app_context():
+        db.session.execute(text("DROP TABLE search_index"))
+        db.session.commit()
+    app = make_app(SEARCH_BACKEND="fts5", init=False)  # a worker started on that database
+    app.extensions["db_ready"] = True
+    client = app.test_client()
+    assert hits(client, "wifi")
+    assert not has_index(app)
+    assert app.test_cli_runner().invoke(args=["search-reindex"]).exit_code == 0
+    assert has_index(app)
+    assert hits(client, "wifi")
@@ -0,0 +1,50 @@
+import os, json, stat
+import pytest
+
+
+def tree(root):
+    return {os.path.join(d, n): os.stat(os.path.join(d, n)).st_mtime_ns
+            for d, _, files in os.walk(root) for n in files}
+
+
+def test_current_build_is_reused_without_writing(make_app, tmp_path):
+    build_dir = tmp_path / "static_build"
+    make_app(init=False)  # first start builds
+    before = tree(build_dir)
+    app = make_app(init=False)
+    assert tree(build_dir) == before
+    assert app.extensions["static_assets"].manifest["css/style.css"].startswith("css/style.")
+
+
+@pytest.mark.skipif(os.geteuid() == 0, reason="root ignores directory permissions")
+def test_read_only_build_dir_starts(make_app, tmp_path):
+    build_dir = tmp_path / "static_build"
+    make_app(init=False)
+    for d, _, _ in os.walk(build_dir):
+        os.chmod(d, stat.S_IRUSR | stat.S_IXUSR)
+    try:
+        app = make_app(init=False)
+        resp = app.test_client().get("/static/" + app.extensions["static_assets"].manifest["js/app.js"])
+        assert resp.status_code == 200
+    finally:
+        for d, _, _ in os.walk(build_dir):
+            os.chmod(d, stat.S_IRWXU)
+
+
+def test_changed_static_file_triggers_a_build(make_app, tmp_path):
+    build_dir = tmp_path / "static_build"
+    app = make_app(init=False)
+    assets = app.extensions["static_assets"]
+    manifest = dict(assets.manifest)
+    manifest["css/style.css"] = "css/style.0000000000.css"
+    (build_dir / "manifest.json").write_text(json.dumps(manifest))
+    assert assets.load() is None
+    assert make_app(init=False).extensions["static_assets"].manifest != manifest
+
+
+def test_precompressed_siblings_are_not_served_directly(app):
+    client = app.test_client()
+    css = app.extensions["static_assets"].manifest["css/style.css"]
+    assert client.get(f"/static/{css}", headers={"Accept-Encoding": "gzip"}).headers["Content-Encoding"] == "gzip"
+    assert client.get(f"/static/{css}.gz").status_code == 404
+    assert client.get(f"/static/{css}.br").status_code == 404
@@ -0,0 +1,43 @@
+import app as app_module
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def export(app, out):
+    result = app.test_cli_runner().invoke(args=["export-static", str(out)])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def test_reexport_skips_unchanged_properties(make_app, tmp_path):
+    app = make_app()
+    assert "Exported 1, unchanged 0" in export(app, tmp_path / "site")
+    assert "Exported 0, unchanged 1" in export(app, tmp_path / "site")
+    assert (tmp_path / "site" / "p" / SLUG / "faqs" / "index.html").exists()
+
+
+def test_exported_pages_have_no_dynamic_search(make_app, tmp_path):
+    export(make_app(), tmp_path / "site")
+    pages = list((tmp_path / "site").rglob("index.html"))
+    assert len(pages) > 12
+    for page in pages:
+        html = page.read_text(encoding="utf-8")
+        assert "/search" not in html and "prop-search" not in html, page
+
+
+def test_template_or_static_change_reexports_everything(make_app, tmp_path, monkeypatch):
+    app = make_app()
+    export(app, tmp_path / "site")
+    # What release_digest() returns after an edit to templates/ or static/.
+    monkeypatch.setattr(app_module, "release_digest", lambda app: "edited")
+    assert "Exported 1, unchanged 0" in export(app, tmp_path / "site")
+    assert "Exported 0, unchanged 1" in export(app, tmp_path / "site")
+
+
+def test_print_links_resolve_in_the_export(make_app, tmp_path):
+    export(make_app(), tmp_path / "site")
+    html = (tmp_path / "site" / "p" / SLUG / "print" / "index.html").read_text(encoding="utf-8")
+    for fmt in ("pdf", "html"):
+        assert f"/p/{SLUG}/manual.{fmt}" in html
+        assert (tmp_path / "site" / "p" / SLUG / f"manual.{fmt}").stat().st_size > 0
+    assert (tmp_path / "site" / "p" / SLUG / "manual.pdf").read_bytes().startswith(b"%PDF")
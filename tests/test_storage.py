@@ -0,0 +1,39 @@
+import os
+import pytest
+import storage
+from models import db, MessageCount, UserAgent
+
+
+def test_atomic_write_leaves_no_temp_file_behind(tmp_path, monkeypatch):
+    path = tmp_path / "new" / "file.bin"
+    storage.atomic_write(str(path), b"one")
+    assert path.read_bytes() == b"one"
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(os, "replace", fail)
+    with pytest.raises(OSError):
+        storage.atomic_write(str(path), b"two")
+    assert path.read_bytes() == b"one"
+    assert os.listdir(path.parent) == ["file.bin"]
+
+
+@pytest.mark.parametrize("on_conflict", [True, False])
+def test_add_counts_and_insert_ignore(app, monkeypatch, on_conflict):
+    if not on_conflict:  # the path taken on databases without ON CONFLICT
+        monkeypatch.setattr(storage, "_dialect_insert", lambda model: None)
+    keys = ["property_id", "category", "status"]
+    with app.app_context():
+        storage.add_counts(MessageCount, keys, [{"property_id": 1, "category": "Keys", "status": "unread", "count": 2}])
+        storage.add_counts(MessageCount, keys, [{"property_id": 1, "category": "Keys", "status": "unread", "count": -1},
+                                                {"property_id": 1, "category": "Wifi", "status": "read", "count": 1}])
+        db.session.commit()
+        assert sorted((c.category, c.count) for c in MessageCount.query) == [("Keys", 1), ("Wifi", 1)]
+
+        storage.insert_ignore(UserAgent, ["ua"], [{"ua": "a", "kind": "browser", "is_bot": False}])
+        if on_conflict:
+            storage.insert_ignore(UserAgent, ["ua"], [{"ua": "a", "kind": "browser", "is_bot": False},
+                                                      {"ua": "b", "kind": "bot", "is_bot": True}])
+        db.session.commit()
+        assert {u.ua for u in UserAgent.query} == ({"a", "b"} if on_conflict else {"a"})
@@ -0,0 +1,72 @@
+import re
+import sqlalchemy as sa
+from flask_migrate import upgrade
+from models import db
+from test_migrations import MIGRATIONS, schema_diff
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def count(url, table):
+    engine = sa.create_engine(url)
+    try:
+        with engine.connect() as conn:
+            if not sa.inspect(conn).has_table(table):
+                return None
+            return conn.execute(sa.text(f"SELECT COUNT(*) FROM {table}")).scalar()
+    finally:
+        engine.dispose()
+
+
+def split_app(make_app, tmp_path, **env):
+    urls = {"DATABASE_URL": "sqlite:///" + str(tmp_path / "content.db"),
+            "TELEMETRY_DATABASE_URL": "sqlite:///" + str(tmp_path / "telemetry.db")}
+    return make_app(**urls, **env), urls
+
+
+def test_views_and_messages_land_in_the_telemetry_file(make_app, tmp_path):
+    app, urls = split_app(make_app, tmp_path, PAGE_CACHE_BACKEND="none")
+    client = app.test_client()
+    for section in ("", "/faqs", "/rules"):
+        assert client.get(f"/p/{SLUG}{section}").status_code == 200
+    client.post(f"/p/{SLUG}/message", data={"name": "A", "contact": "a@x", "body": "Hi"})
+
+    assert count(urls["TELEMETRY_DATABASE_URL"], "page_view") == 3
+    assert count(urls["TELEMETRY_DATABASE_URL"], "message") == 1
+    assert count(urls["DATABASE_URL"], "page_view") is None
+    assert count(urls["DATABASE_URL"], "message") is None
+    assert count(urls["TELEMETRY_DATABASE_URL"], "property") is None
+
+    # The dashboard lists properties from one file and their views from the other.
+    with client.session_transaction() as s:
+        s["authed"] = True
+    html = client.get("/admin").get_data(as_text=True)
+    row = re.search(r"<td>%s</td>.*?</tr>" % SLUG, html, re.S).group(0)
+    assert re.findall(r"<td>(\d+)</td>", row) == ["3"]
+
+
+def test_property_delete_purges_its_telemetry(make_app, tmp_path):
+    app, urls = split_app(make_app, tmp_path)
+    client = app.test_client()
+    client.get(f"/p/{SLUG}")
+    client.post(f"/p/{SLUG}/message", data={"name": "A", "contact": "a@x", "body": "Hi"})
+    assert count(urls["TELEMETRY_DATABASE_URL"], "page_view") == 1
+    with client.session_transaction() as s:
+        s["authed"] = True
+    assert client.post("/admin/property/1/delete").status_code == 302
+    for table in ("page_view", "message", "message_count", "view_rollup_hourly", "view_rollup_daily"):
+        assert count(urls["TELEMETRY_DATABASE_URL"], table) == 0, table
+
+
+def test_upgrade_stamps_both_databases(make_app, tmp_path):
+    app, urls = split_app(make_app, tmp_path, init=False, FLASK_RUN_FROM_CLI="true")
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        head = db.session.execute(sa.text("SELECT version_num FROM alembic_version")).scalar()
+        assert head is not None
+        with db.engines["telemetry"].connect() as conn:
+            assert conn.execute(sa.text("SELECT version_num FROM alembic_version_telemetry")).scalar() == head
+        assert not sa.inspect(db.engines["telemetry"]).has_table("alembic_version")
+        assert not sa.inspect(db.engine).has_table("alembic_version_telemetry")
+        assert schema_diff(app, None) == []
+        assert schema_diff(app, "telemetry") == []
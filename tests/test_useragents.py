@@ -0,0 +1,52 @@
+import pytest
+import useragents
+from models import db, PageView, UserAgent
+
+SLUG = "vibe-modern-rustic-apartment"
+CHROME = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Version/17.0 Mobile Safari/604.1"
+
+
+@pytest.mark.parametrize("ua, kind", [
+    (CHROME, "browser"),
+    ("WhatsApp/2.23.20.0 A", "preview"),
+    ("facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)", "preview"),
+    ("Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)", "bot"),
+    ("curl/8.4.0", "bot"),
+    ("", "unknown"),
+    (None, "unknown"),
+    ("   ", "unknown"),
+])
+def test_classify(ua, kind):
+    assert useragents.classify(ua) == kind
+    assert useragents.is_bot(ua) == (kind in ("bot", "preview"))
+
+
+def test_intern_stores_each_string_once(app):
+    ids = useragents.UserAgentIds(size=2)
+    with app.app_context():
+        rows = [{"user_agent": ua} for ua in (CHROME, "curl/8.4.0", CHROME, "")]
+        ids.intern(rows)
+        db.session.commit()
+        assert all("user_agent" not in r for r in rows)
+        assert rows[0]["user_agent_id"] == rows[2]["user_agent_id"] != rows[1]["user_agent_id"]
+        stored = {u.ua: u for u in UserAgent.query}
+        assert set(stored) == {CHROME, "curl/8.4.0", ""}
+        assert (stored["curl/8.4.0"].kind, stored["curl/8.4.0"].is_bot) == ("bot", True)
+        assert (stored[""].kind, stored[""].is_bot) == ("unknown", False)
+        # A fresh cache (another worker) resolves to the same ids without new rows.
+        again = useragents.UserAgentIds().intern([{"user_agent": CHROME}])
+        assert again[0]["user_agent_id"] == rows[0]["user_agent_id"]
+        assert UserAgent.query.count() == 3
+
+
+@pytest.mark.parametrize("policy, stored", [("skip", ["browser", "unknown"]), ("tag", ["browser", "bot", "unknown"])])
+def test_bot_policy(make_app, policy, stored):
+    app = make_app(VIEW_BOT_POLICY=policy, PAGE_CACHE_BACKEND="none")
+    client = app.test_client()
+    for ua in (CHROME, "Googlebot/2.1", ""):
+        client.get(f"/p/{SLUG}", headers={"User-Agent": ua})
+    with app.app_context():
+        views = PageView.query.order_by(PageView.id).all()
+        kinds = [db.session.get(UserAgent, v.user_agent_id).kind for v in views]
+        assert kinds == stored
+        assert [v.is_bot for v in views] == [k == "bot" for k in stored]
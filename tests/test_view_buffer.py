@@ -0,0 +1,90 @@
+import time
+import pytest
+import pageviews
+from models import db, PageView
+
+
+@pytest.fixture
+def buffered(make_app):
+    """An app whose ViewBuffer runs its worker thread; settings as kwargs."""
+    apps = []
+
+    def make(**env):
+        app = make_app(VIEW_BUFFER_ENABLED=1, **{"VIEW_FLUSH_INTERVAL": 60, **env})
+        app.config["TESTING"] = False  # ViewBuffer writes synchronously under test
+        apps.append(app)
+        return app, app.extensions["view_buffer"]
+
+    yield make
+    for app in apps:
+        app.extensions["view_buffer"].close()
+
+
+def stored(app):
+    with app.app_context():
+        return [s for (s,) in db.session.query(PageView.section).order_by(PageView.id)]
+
+
+def wait_for(app, n, timeout=5):
+    deadline = time.monotonic() + timeout
+    while len(stored(app)) < n and time.monotonic() < deadline:
+        time.sleep(0.02)
+    return stored(app)
+
+
+def add(buf, *sections):
+    for s in sections:
+        buf.add(property_id=1, section=s, user_agent="Mozilla/5.0", is_bot=False)
+
+
+def test_flushes_when_batch_is_full(buffered):
+    app, buf = buffered(VIEW_FLUSH_SIZE=3)
+    add(buf, "a", "b")
+    time.sleep(0.1)
+    assert stored(app) == []
+    add(buf, "c")
+    assert wait_for(app, 3) == ["a", "b", "c"]
+
+
+def test_flushes_on_interval(buffered):
+    app, buf = buffered(VIEW_FLUSH_INTERVAL=0.05)
+    add(buf, "a")
+    assert wait_for(app, 1) == ["a"]
+
+
+def test_flushes_inline_at_max_unflushed(buffered):
+    app, buf = buffered(VIEW_MAX_UNFLUSHED=3)
+    add(buf, "a", "b")
+    assert stored(app) == []
+    add(buf, "c")
+    assert stored(app) == ["a", "b", "c"]
+
+
+def test_close_drains_the_queue(buffered):
+    app, buf = buffered()
+    add(buf, "a", "b")
+    buf.close()
+    assert stored(app) == ["a", "b"]
+    assert not buf._thread.is_alive()
+
+
+def test_failed_batch_is_requeued_up_to_the_cap(buffered, monkeypatch):
+    app, buf = buffered(VIEW_MAX_UNFLUSHED=3)
+    record = pageviews.rollups.record
+
+    def down(rows):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(pageviews.rollups, "record", down)
+    add(buf, "a", "b")
+    assert buf.flush() == 0
+    assert [r["section"] for r in buf._pending] == ["a", "b"]
+    # The inline flush at the cap fails too; the oldest views are dropped.
+    add(buf, "c", "d")
+    assert [r["section"] for r in buf._pending] == ["b", "c", "d"]
+    assert stored(app) == []
+
+    monkeypatch.setattr(pageviews.rollups, "record", record)
+    assert buf.flush() == 3
+    assert stored(app) == ["b", "c", "d"]
+    assert buf._pending == []
@@ -0,0 +1,30 @@
+from models import db, PageView
+
+SLUG = "vibe-modern-rustic-apartment"
+
+
+def sections(app):
+    with app.app_context():
+        return [s for (s,) in db.session.query(PageView.section).order_by(PageView.id)]
+
+
+def test_prefetch_logs_nothing_and_beacon_logs_the_tab(make_app):
+    app = make_app(PAGE_CACHE_BACKEND="none")
+    client = app.test_client()
+    page = client.get(f"/p/{SLUG}").get_data(as_text=True)
+    assert f'data-view-url="/p/{SLUG}/view"' in page
+    xhr = {"X-Requested-With": "XMLHttpRequest"}
+    client.get(f"/p/{SLUG}/rules", headers={**xhr, "X-Prefetch": "1"})
+    assert sections(app) == ["welcome"]
+    # The guest opens the prefetched tab; app.js shows it from memory and reports it.
+    assert client.post(f"/p/{SLUG}/view", data={"section": "rules"}).status_code == 204
+    assert sections(app) == ["welcome", "rules"]
+
+
+def test_beacon_rejects_unknown_sections_and_properties(make_app):
+    app = make_app()
+    client = app.test_client()
+    assert client.post(f"/p/{SLUG}/view", data={"section": "admin"}).status_code == 400
+    assert client.post("/p/no-such-place/view", data={"section": "rules"}).status_code == 404
+    assert client.get(f"/p/{SLUG}/view").status_code == 404
+    assert sections(app) == []
@@ -0,0 +1,123 @@
+import re, threading
+from collections import OrderedDict
+from functools import lru_cache
+from models import db, UserAgent, PageView
+import storage
+
+MAX_LENGTH = 300
+
+# Link unfurlers: chat apps and social networks fetching a manual link to build
+# a preview card. Checked before BOT_RE since several also say "bot".
+PREVIEW_RE = re.compile(
+    r"WhatsApp|facebookexternalhit|Facebot|Twitterbot|Slackbot|Slack-ImgProxy|TelegramBot|Discordbot|"
+    r"LinkedInBot|SkypeUriPreview|redditbot|vkShare|Embedly|Iframely|Google-PageRenderer|"
+    r"Mastodon|KakaoTalk-scrap",
+    re.IGNORECASE,
+)
+BOT_RE = re.compile(
+    r"bot\b|bot/|crawl|spider|slurp|archiver|scrape|fetch|monitor|uptime|checker|"
+    r"curl/|wget/|httpie|python-requests|python-urllib|aiohttp|go-http-client|java/|okhttp|"
+    r"libwww|node-fetch|axios/|headlesschrome|phantomjs|lighthouse|pingdom|preview",
+    re.IGNORECASE,
+)
+
+
+BOT_KINDS = ("bot", "preview")
+
+
+@lru_cache(maxsize=4096)
+def classify(ua):
+    """Return "browser", "preview" (link unfurler), "bot" or "unknown" (no
+    User-Agent at all, e.g. privacy tools; counted like a browser)."""
+    if not ua or not ua.strip():
+        return "unknown"
+    if PREVIEW_RE.search(ua):
+        return "preview"
+    if BOT_RE.search(ua):
+        return "bot"
+    return "browser"
+
+
+def is_bot(ua):
+    return classify(ua) in BOT_KINDS
+
+
+def normalize(ua):
+    return (ua or "").strip()[:MAX_LENGTH]
+
+
+class UserAgentIds:
+    # ua string -> user_agent.id, with a bounded in-process LRU in front of the
+    # lookup table. Ids never change once assigned, so entries never go stale.
+
+    def __init__(self, size=2048):
+        self.size = size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cached(self, ua):
+        with self._lock:
+            uid = self._ids.get(ua)
+            if uid is not None:
+                self._ids.move_to_end(ua)
+            return uid
+
+    def _remember(self, ua, uid):
+        with self._lock:
+            self._ids[ua] = uid
+            self._ids.move_to_end(ua)
+            while len(self._ids) > self.size:
+                self._ids.popitem(last=False)
+
+    def resolve(self, strings):
+        """Map each UA string to its id, inserting unseen ones. Runs in the caller's transaction."""
+        out, missing = {}, set()
+        for ua in strings:
+            uid = self._cached(ua)
+            if uid is None:
+                missing.add(ua)
+            else:
+                out[ua] = uid
+        if missing:
+            found = dict(db.session.query(UserAgent.ua, UserAgent.id).filter(UserAgent.ua.in_(missing)))
+            new = [{"ua": ua, "kind": classify(ua), "is_bot": is_bot(ua)}
+                   for ua in missing if ua not in found]
+            if new:
+                storage.insert_ignore(UserAgent, ["ua"], new)
+                # Another worker may have inserted some of them first; read back either way.
+                found.update(db.session.query(UserAgent.ua, UserAgent.id)
+                             .filter(UserAgent.ua.in_([r["ua"] for r in new])))
+            for ua, uid in found.items():
+                self._remember(ua, uid)
+            out.update(found)
+        return out
+
+    def intern(self, rows):
+        """Replace each row's "user_agent" string with "user_agent_id", in place."""
+        ids = self.resolve({r["user_agent"] for r in rows if "user_agent" in r})
+        for r in rows:
+            if "user_agent" in r:
+                r["user_agent_id"] = ids.get(r.pop("user_agent"))
+        return rows
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+def backfill(ids, batch_size=5000):
+    """Move legacy PageView.user_agent strings into the lookup table. Returns rows converted."""
+    done = 0
+    while True:
+        rows = (db.session.query(PageView.id, PageView.user_agent)
+                .filter(PageView.user_agent.isnot(None), PageView.user_agent_id.is_(None))
+                .order_by(PageView.id).limit(batch_size).all())
+        if not rows:
+            return done
+        resolved = ids.resolve({normalize(ua) for _, ua in rows})
+        db.session.execute(db.update(PageView), [
+            {"id": pid, "user_agent_id": resolved[normalize(ua)], "user_agent": None,
+             "is_bot": is_bot(normalize(ua))}
+            for pid, ua in rows])
+        db.session.commit()
+        done += len(rows)